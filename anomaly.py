@@ -0,0 +1,107 @@
+# anomaly.py
+"""
+Streaming anomaly detection over every numeric plant variable at once.
+
+Each channel keeps a slow exponentially weighted mean (its baseline) and a fast one; the spread of
+values around the fast mean is the channel's short-term noise. A tick scores the new value as
+(value - baseline) / noise and then folds it in. Measuring noise against the fast mean keeps a slow
+drift from widening its own yardstick, so drifts keep scoring high until the baseline catches up.
+The whole tick is a handful of NumPy operations on one vector of values, so its cost stays flat as
+channels are added; nothing is rescanned over history.
+"""
+import threading
+
+import numpy as np
+
+from decoding import VarType, variable_type
+
+
+def numeric_channels(variable_names):
+    """The continuous (float) variables among `variable_names`; codes, flags and clocks are skipped."""
+    return [name for name in dict.fromkeys(variable_names) if variable_type(name) is VarType.FLOAT]
+
+
+class AnomalyDetector:
+    """
+    EWMA baseline per channel, updated one tick at a time with irregular spacing. Values are passed
+    as an array aligned with `channels`; NaN means "no value this tick" and leaves that channel alone.
+    """
+
+    def __init__(self, channels, tau, noise_tau, warmup, min_std=1e-3, relative_std=0.0, clip=4.0):
+        self.channels = list(channels)
+        self.tau = tau  # Baseline time constant
+        self.noise_tau = noise_tau  # Fast mean the noise is measured around
+        self.warmup = warmup  # Samples a channel needs before it is scored
+        self.min_std = min_std
+        self.relative_std = relative_std  # Noise floor as a fraction of the baseline
+        self.clip = clip  # Residuals are capped at this many std in the variance, so outliers don't widen it
+        n = len(self.channels)
+        self.mean = np.zeros(n)
+        self.fast = np.zeros(n)
+        self.variance = np.zeros(n)  # Of values around the fast mean
+        self.weight = np.zeros(n)  # Total EWMA weight behind `variance`, to unbias it while it builds up
+        self.count = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n)
+        self.latest = np.full(n, np.nan)
+        self.expected = np.full(n, np.nan)  # Baseline each value was scored against
+        self.last_time = None
+        self._positions_for = None
+        self._positions = None
+        self._lock = threading.Lock()
+
+    def due(self, timestamp, interval=0.0):
+        """Whether a tick at `timestamp` would be taken (cheap check before gathering values)."""
+        return self.last_time is None or timestamp - self.last_time >= max(interval, 1e-9)
+
+    def positions_in(self, variables):
+        """Index of each channel in the `variables` list (-1 if absent), cached for the last list seen."""
+        if variables is not self._positions_for:
+            index = {name: i for i, name in enumerate(variables)}
+            self._positions = np.array([index.get(channel, -1) for channel in self.channels], dtype=np.int64)
+            self._positions_for = variables
+        return self._positions
+
+    def gather(self, variables, values):
+        """Picks this detector's channels out of a value vector laid out like `variables`."""
+        positions = self.positions_in(variables)
+        if positions.size == 0:
+            return np.empty(0)
+        return np.where(positions >= 0, np.asarray(values, dtype=float)[positions], np.nan)
+
+    def update(self, timestamp, values, interval=0.0):
+        """Scores and absorbs one tick. Returns False if another caller already took this tick."""
+        values = np.asarray(values, dtype=float)
+        with self._lock:
+            if not self.due(timestamp, interval):
+                return False
+            dt = None if self.last_time is None else timestamp - self.last_time
+            alpha = 1.0 if dt is None else -np.expm1(-dt / self.tau)
+            alpha_fast = 1.0 if dt is None else -np.expm1(-dt / self.noise_tau)
+            present = ~np.isnan(values)
+            first = present & (self.count == 0)
+            self.mean[first] = self.fast[first] = values[first]
+            residual = np.where(present, values - self.mean, 0.0)
+            noise = np.where(present, values - self.fast, 0.0)
+            spread = np.sqrt(np.divide(self.variance, self.weight, out=np.zeros_like(self.variance),
+                                       where=self.weight > 0))
+            scale = np.maximum(spread, np.maximum(self.min_std, self.relative_std * np.abs(self.mean)))
+            self.score = np.where(present & (self.count >= self.warmup), residual / scale, 0.0)
+            self.expected = np.where(present, self.mean, np.nan)
+            self.latest = values
+            self.mean += alpha * residual
+            self.fast += alpha_fast * noise
+            bounded = np.clip(noise, -self.clip * scale, self.clip * scale)
+            scored = present & ~first
+            self.variance = np.where(scored, (1 - alpha) * (self.variance + alpha * bounded * bounded), self.variance)
+            self.weight = np.where(scored, (1 - alpha) * self.weight + alpha, self.weight)
+            self.count += present
+            self.last_time = timestamp
+            return True
+
+    def unusual(self, threshold, limit=None):
+        """Channels whose latest |z| is at least `threshold`, most unusual first, as table rows."""
+        with self._lock:
+            flagged = np.flatnonzero(np.abs(self.score) >= threshold)
+            ranked = flagged[np.argsort(-np.abs(self.score[flagged]), kind="stable")][:limit]
+            return [{"Variable": self.channels[i], "Score (σ)": round(float(self.score[i]), 1),
+                     "Value": float(self.latest[i]), "Baseline": float(self.expected[i])} for i in ranked]
@@ -0,0 +1,128 @@
+# async_client.py
+"""
+Asyncio fetch engine: fetches a whole snapshot concurrently on a dedicated event-loop thread.
+
+Needs the optional `httpx` package; `AVAILABLE` is False without it and callers should stay on
+the synchronous client.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import config  # Import configuration
+from decoding import ErrorKind, decode, error_reading
+
+try:
+    import httpx
+except ImportError:  # Optional dependency
+    httpx = None
+
+AVAILABLE = httpx is not None
+
+
+class AsyncFetchEngine:
+    """
+    Runs an event loop in a daemon thread and issues every variable request of a snapshot at once,
+    bounded by a semaphore. Each request has its own timeout and the whole snapshot a deadline;
+    requests still outstanding at the deadline are cancelled and reported as timeouts.
+
+    Fetches are tagged with an `owner` (e.g. a browser session): starting a new fetch for the same
+    owner cancels the previous one, so a superseded rerun doesn't keep the webserver busy. The
+    waiting thread can't start that newer fetch itself, so it also polls a `cancelled` callback
+    (e.g. "has this session asked for a rerun?") and other threads can call `cancel(owner)`.
+    """
+
+    def __init__(self, max_concurrency=None, request_timeout=None, snapshot_deadline=None):
+        if not AVAILABLE:
+            raise RuntimeError("The async fetch engine needs the 'httpx' package (pip install httpx)")
+        self.max_concurrency = max_concurrency or config.ASYNC_MAX_CONCURRENCY
+        self.request_timeout = request_timeout or config.ASYNC_REQUEST_TIMEOUT_SECONDS
+        self.snapshot_deadline = snapshot_deadline or config.ASYNC_SNAPSHOT_DEADLINE_SECONDS
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-fetch", daemon=True)
+        self._thread.start()
+        self._client = asyncio.run_coroutine_threadsafe(self._make_client(), self._loop).result()
+        self._in_flight = {}  # owner -> concurrent Future of that owner's latest snapshot
+        self._lock = threading.Lock()
+
+    async def _make_client(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        return httpx.AsyncClient(limits=limits, timeout=self.request_timeout)
+
+    async def _fetch_one(self, variable_name, semaphore):
+        async with semaphore:
+            started = time.perf_counter()  # Round trip excludes the wait for a semaphore slot
+            try:
+                response = await self._client.get(config.WEBSERVER_URL, params={"Variable": variable_name})
+                response.raise_for_status()
+            except httpx.ConnectError:
+                reading = error_reading(ErrorKind.CONNECTION)
+            except httpx.TimeoutException:
+                reading = error_reading(ErrorKind.TIMEOUT)
+            except httpx.HTTPError as e:
+                reading = error_reading(ErrorKind.HTTP, str(e))
+            else:
+                reading = decode(variable_name, response.text)
+            return reading.stamp(time.time(), time.perf_counter() - started)
+
+    async def _fetch_all(self, variable_names, deadline):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = {asyncio.ensure_future(self._fetch_one(name, semaphore)): name for name in variable_names}
+        readings = {}
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+        for task in pending:
+            task.cancel()
+            readings[tasks[task]] = error_reading(ErrorKind.TIMEOUT, "Snapshot deadline exceeded").stamp(
+                time.time(), deadline)
+        for task in done:
+            readings[tasks[task]] = task.result()
+        return readings
+
+    def fetch_snapshot(self, variable_names, owner=None, deadline=None, cancelled=None):
+        """
+        Fetches all `variable_names` concurrently and blocks until the snapshot is complete or the
+        deadline passes. Returns {variable_name: Reading}. If the fetch is cancelled first (a newer
+        fetch for the same `owner`, `cancel(owner)`, or the `cancelled()` callback returning True
+        while waiting), its outstanding requests are dropped and every variable comes back as a
+        CANCELLED reading.
+        """
+        variable_names = list(dict.fromkeys(variable_names))
+        coroutine = self._fetch_all(variable_names, deadline or self.snapshot_deadline)
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        if owner is not None:
+            with self._lock:
+                previous = self._in_flight.get(owner)
+                self._in_flight[owner] = future
+            if previous is not None:
+                previous.cancel()
+        try:
+            while True:
+                try:
+                    return future.result(timeout=config.ASYNC_CANCEL_POLL_SECONDS)
+                except concurrent.futures.TimeoutError:
+                    if cancelled is not None and cancelled():
+                        future.cancel()
+        except concurrent.futures.CancelledError:
+            return {name: error_reading(ErrorKind.CANCELLED, "Superseded by a newer rerun") for name in variable_names}
+        finally:
+            if owner is not None:
+                with self._lock:
+                    if self._in_flight.get(owner) is future:
+                        del self._in_flight[owner]
+
+    def cancel(self, owner):
+        """Cancels `owner`'s fetch in flight, if any (from any thread). Returns True if one was cancelled."""
+        with self._lock:
+            future = self._in_flight.get(owner)
+        return future is not None and future.cancel()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
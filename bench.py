@@ -0,0 +1,276 @@
+# bench.py
+"""
+Microbenchmarks for the dashboard's hot helpers, with stored baselines and a regression gate.
+
+    python bench.py [--save] [--threshold 20] [--baseline PATH] [--only decode,display_metric]
+
+Each benchmark times one helper in isolation, with Streamlit's element calls stubbed out (utils.st
+is swapped for an object that accepts and ignores everything), so only the helper's own work is
+measured:
+
+* decode / fetch_variable_value: parsing webserver text into Readings, and the cached lookup path
+* gauge_spec / display_gauge_plotly / display_gauge_svg: band and threshold computation, and the
+  whole gauge helper including figure (or SVG) construction
+* display_metric: the delta logic and the session's previous-value store
+* history_append: main.py's shared history sampling path (HistoryStore.append_if_due)
+
+A timing is the best of several repeats of an auto-sized loop, in microseconds per call. --save
+writes the timings as the baseline; otherwise they are compared with it, and the exit status is 1
+when any helper is slower than its baseline by more than --threshold percent. Baselines are only
+comparable on the machine (and Python) that saved them.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import sys
+import timeit
+
+import config
+import gauges
+import utils
+from decoding import Reading, decode
+from history import HistoryStore
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(ROOT, "bench_baseline.json")
+
+
+# --- Streamlit Stub ---
+
+class _Null:
+    """Stands in for st and every element it returns: calls, attributes and `with` all do nothing."""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _StubStreamlit(_Null):
+    def __init__(self):
+        self.session_state = {}
+
+
+@contextlib.contextmanager
+def stubbed_streamlit():
+    """Runs utils' display helpers against the stub, serving cached readings as if always fresh."""
+    real_st, real_fresh = utils.st, utils.FRESH_SECONDS
+    utils.st, utils.FRESH_SECONDS = _StubStreamlit(), math.inf  # Never fall through to the network
+    try:
+        yield utils.st
+    finally:
+        utils.st, utils.FRESH_SECONDS = real_st, real_fresh
+
+
+# --- Benchmarks ---
+# Each builds its fixtures and returns the zero-argument callable to time.
+
+DECODE_SAMPLES = [
+    ("CORE_TEMP", "312.4567"), ("CORE_PRESSURE", " 151.2 "), ("CORE_STATE", "3"),
+    ("GENERATOR_0_BREAKER", "FALSE"), ("CORE_STEAM_PRESENT", "1"), ("TIME_STAMP", "12:34:56"),
+    ("COOLANT_CORE_CIRCULATION_PUMP_0_STATUS", "2"), ("CORE_WEAR", "nan"), ("CORE_INTEGRITY", ""),
+    ("CORE_TEMP_MAX", "not a number"),
+]
+
+
+def bench_decode():
+    def run():
+        for name, text in DECODE_SAMPLES:
+            decode(name, text)
+    return run
+
+
+def bench_fetch_variable_value():
+    names = [name for name, _ in DECODE_SAMPLES]
+    utils._reading_cache().put_many({name: decode(name, text) for name, text in DECODE_SAMPLES})
+
+    def run():
+        for name in names:
+            utils.fetch_variable_value(name)
+    return run
+
+
+def bench_gauge_spec():
+    def run():
+        gauges.gauge_spec("Core Temp", 312.4, 0, 500, op_min=150, op_max=450, unit="°C")
+        gauges.gauge_spec("Pressure", 72.0, 0, 100, op_max=80, unit="bar")
+        gauges.gauge_spec("Voltage", None, 20000, 30000, op_min=24500, op_max=25500, unit="V")
+    return run
+
+
+def _gauge_readings():
+    return {"CORE_TEMP": Reading(312.4), "CORE_TEMP_MIN": Reading(0.0), "CORE_TEMP_MAX": Reading(500.0),
+            "CORE_TEMP_OPERATIVE": Reading(150.0)}
+
+
+def _bench_display_gauge(backend):
+    readings = _gauge_readings()
+
+    def run():
+        real_backend, config.GAUGE_BACKEND = config.GAUGE_BACKEND, backend
+        try:
+            utils.display_gauge("Core Temp", "CORE_TEMP", "CORE_TEMP_MIN", "CORE_TEMP_MAX",
+                                op_min_input="CORE_TEMP_OPERATIVE", op_max_input=450, unit="°C",
+                                readings=readings)
+        finally:
+            config.GAUGE_BACKEND = real_backend
+    return run
+
+
+def bench_display_gauge_plotly():
+    return _bench_display_gauge("plotly")
+
+
+def bench_display_gauge_svg():
+    return _bench_display_gauge("svg")
+
+
+def bench_display_metric():
+    # Alternating values so every call after the first computes and shows a delta
+    snapshots = [{"CORE_TEMP": Reading(300.0 + i), "CORE_STATE": Reading(i % 4),
+                  "CORE_STEAM_PRESENT": Reading(bool(i % 2))} for i in range(2)]
+    turn = [0]
+
+    def run():
+        readings = snapshots[turn[0] % 2]
+        turn[0] += 1
+        utils.display_metric("Core Temp", "CORE_TEMP", readings=readings)
+        utils.display_metric("Core State", "CORE_STATE", readings=readings)
+        utils.display_metric("Steam Present?", "CORE_STEAM_PRESENT", readings=readings)
+    return run
+
+
+def bench_history_append():
+    store = HistoryStore(config.HISTORY_CHANNELS, config.MAX_HISTORY_POINTS, gap_seconds=config.HISTORY_GAP_SECONDS)
+    readings = {"CORE_TEMP": Reading(312.4), "CORE_PRESSURE": Reading(151.2)}
+    clock = [0.0]
+
+    def sample():  # Same shape as main.py's _history_sample
+        values = {"TOTAL_KW": 1234.5}
+        for channel in ("CORE_TEMP", "CORE_PRESSURE"):
+            reading = readings[channel]
+            values[channel] = reading.value if reading.is_numeric else None
+        return clock[0], values
+
+    def run():
+        clock[0] += 1.0  # Sim time moves on, so every sample is stored
+        store.append_if_due(sample, 0.0, timestamp=1_700_000_000.0 + clock[0])
+    return run
+
+
+BENCHMARKS = {
+    "decode": bench_decode,
+    "fetch_variable_value": bench_fetch_variable_value,
+    "gauge_spec": bench_gauge_spec,
+    "display_gauge_plotly": bench_display_gauge_plotly,
+    "display_gauge_svg": bench_display_gauge_svg,
+    "display_metric": bench_display_metric,
+    "history_append": bench_history_append,
+}
+
+
+# --- Running & Comparing ---
+
+def measure(fn, repeat):
+    """Best-of-`repeat` microseconds per call, each repeat an auto-sized loop of about 0.2 s."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def run_benchmarks(names, repeat):
+    results = {}
+    with stubbed_streamlit():
+        for name in names:
+            results[name] = measure(BENCHMARKS[name](), repeat)
+            print(f"  {name:<24} {results[name]:>10.2f} µs", file=sys.stderr)
+    return results
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results):
+    baseline = {"machine": platform.node(), "python": platform.python_version(), "results": results}
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+
+
+def compare(results, baseline, threshold):
+    """Rows (name, µs, baseline µs or None, change % or None, status) and whether anything regressed."""
+    rows, regressed = [], False
+    for name, micros in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append((name, micros, None, None, "new"))
+            continue
+        change = (micros - base) / base * 100
+        status = "REGRESSED" if change > threshold else ("faster" if change < -threshold else "ok")
+        regressed = regressed or status == "REGRESSED"
+        rows.append((name, micros, base, change, status))
+    return rows, regressed
+
+
+def print_report(rows, threshold):
+    header = f"{'benchmark':<24} {'µs/call':>10} {'baseline':>10} {'change':>8}  status (±{threshold:g}%)"
+    print(header)
+    print("-" * len(header))
+    for name, micros, base, change, status in rows:
+        base_text = "-" if base is None else f"{base:.2f}"
+        change_text = "-" if change is None else f"{change:+.1f}%"
+        print(f"{name:<24} {micros:>10.2f} {base_text:>10} {change_text:>8}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark the dashboard's hot helpers.")
+    parser.add_argument("--save", action="store_true", help="Store this run's timings as the baseline")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Percent slower than baseline that counts as a regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--only", help="Comma-separated benchmarks to run (default all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per benchmark (best one counts)")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+
+    print("Running benchmarks...", file=sys.stderr)
+    results = run_benchmarks(names, args.repeat)
+    baseline = load_baseline(args.baseline)
+    if args.save:
+        if baseline is not None:  # Keep the timings of benchmarks not run this time
+            results = dict(baseline["results"], **results)
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save first.")
+        return
+    if baseline.get("python") != platform.python_version() or baseline.get("machine") != platform.node():
+        print(f"Note: baseline was saved on {baseline.get('machine')} (Python {baseline.get('python')})",
+              file=sys.stderr)
+    rows, regressed = compare(results, baseline, args.threshold)
+    print_report(rows, args.threshold)
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# catalog.py
+"""
+Which variables the webserver actually serves.
+
+config.VARIABLES is incomplete, the tabs ask for names outside it, and some of those (placeholders
+such as FUEL_LEVEL_PERCENT) don't exist at all, so every refresh spent a request on an error.
+discover() probes candidate names concurrently and records which exist and what type their text
+looks like; VariableCatalog keeps that on disk (config.CATALOG_PATH), so the next start knows at
+once. The collector, prefetcher and fetch helpers skip names the catalog has seen missing, and
+decoding.py falls back to the discovered types for names it has no rule for.
+
+    python catalog.py [--recheck]
+
+probes the candidates now (the collector and dashboard also probe unchecked names on their own).
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import threading
+import time
+
+import requests
+
+import config  # Import configuration
+import decoding
+import plant
+
+EXISTS, MISSING = "exists", "missing"
+
+
+def candidate_names():
+    """Names worth probing: the configured variables, every equipment field and the known extras."""
+    groups = plant.TURBINES.variables() + plant.GENERATORS.variables() + plant.CIRCULATION_PUMPS.variables()
+    return list(dict.fromkeys(config.VARIABLES + groups + config.CATALOG_EXTRA_CANDIDATES))
+
+
+def infer_type(text):
+    """Type name (as in config.VARIABLE_TYPES) that a raw value looks like, or None for an empty value."""
+    text = text.strip()
+    if not text:
+        return None
+    if text.upper() in ("TRUE", "FALSE"):
+        return "bool"
+    try:
+        float(text)
+    except ValueError:
+        return "text"
+    return "float"  # Integer-looking text may still be a float that happens to be whole
+
+
+def probe(variable_name, session=None):
+    """
+    (status, inferred type) for one name: MISSING when the server answers 404 (unknown variable),
+    EXISTS on success. Status is None when the server couldn't be reached or answered with any
+    other error, e.g. 429 or 5xx while the game is busy (nothing learned).
+    """
+    try:
+        response = (session or requests).get(config.WEBSERVER_URL, params={"Variable": variable_name},
+                                             timeout=config.CATALOG_PROBE_TIMEOUT_SECONDS)
+    except requests.exceptions.RequestException:
+        return None, None
+    if response.status_code == 404:
+        return MISSING, None
+    if response.status_code >= 400:
+        return None, None  # Transient; probe again later rather than hide a real variable
+    return EXISTS, infer_type(response.text)
+
+
+class VariableCatalog:
+    """Persistent map of variable name -> {"status", "type", "checked"}. Safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._missing = frozenset()
+        self._discovering = None
+        self._discovery_started = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Reads the catalog from disk (empty if there is none yet) and applies its types; returns self."""
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        with self._lock:
+            self._entries = entries
+            self._changed()
+        return self
+
+    def save(self):
+        with self._lock:
+            entries = dict(self._entries)
+        tmp = f"{self.path}.{os.getpid()}.tmp"  # The collector and dashboard may both save
+        with open(tmp, "w") as f:
+            json.dump(entries, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)  # Readers never see a half-written catalog
+
+    def _changed(self):
+        self._missing = frozenset(name for name, entry in self._entries.items() if entry["status"] == MISSING)
+        decoding.DISCOVERED_TYPES = {name: entry["type"] for name, entry in self._entries.items()
+                                     if entry["status"] == EXISTS and entry["type"] in ("float", "bool")}
+
+    def update(self, results, checked=None):
+        """Records {name: (status, type)} probe results; unreachable (None status) ones are ignored."""
+        checked = time.time() if checked is None else checked
+        with self._lock:
+            for name, (status, var_type) in results.items():
+                if status is not None:
+                    self._entries[name] = {"status": status, "type": var_type, "checked": checked}
+            self._changed()
+
+    def is_missing(self, variable_name):
+        return variable_name in self._missing
+
+    def filter(self, variable_names):
+        """`variable_names` without the ones known to be missing (order kept)."""
+        missing = self._missing
+        return [name for name in variable_names if name not in missing]
+
+    def existing(self):
+        """Names the server was found to serve."""
+        with self._lock:
+            return [name for name, entry in self._entries.items() if entry["status"] == EXISTS]
+
+    def entries(self):
+        with self._lock:
+            return dict(self._entries)
+
+    def unchecked(self, variable_names, max_age):
+        """Names never probed, or last probed more than `max_age` seconds ago."""
+        now = time.time()
+        with self._lock:
+            return [name for name in dict.fromkeys(variable_names)
+                    if name not in self._entries or now - self._entries[name]["checked"] > max_age]
+
+    def discover_in_background(self, variable_names, limiter=None, min_interval=60.0):
+        """
+        Starts discover() for `variable_names` on a daemon thread, unless one is running or started
+        less than `min_interval` seconds ago (names stay unchecked while the server is unreachable).
+        """
+        with self._lock:
+            if time.monotonic() - self._discovery_started < min_interval and self._discovery_started:
+                return False
+            if self._discovering is not None and self._discovering.is_alive():
+                return False
+            self._discovery_started = time.monotonic()
+            self._discovering = threading.Thread(target=discover, args=(self, variable_names, limiter),
+                                                 name="variable-discovery", daemon=True)
+            self._discovering.start()
+            return True
+
+
+def discover(catalog, variable_names, limiter=None, max_workers=None):
+    """
+    Probes `variable_names` concurrently (at most `max_workers` at a time, and only as fast as the
+    background share of `limiter` allows), records the results and saves the catalog.
+    Returns {name: (status, type)}.
+    """
+    variable_names = list(dict.fromkeys(variable_names))
+    max_workers = max_workers or config.CATALOG_PROBE_CONCURRENCY
+    local = threading.local()
+
+    def probe_one(name):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()  # One keep-alive connection per worker
+        return name, probe(name, local.session)
+
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="probe") as pool:
+        pending = variable_names
+        while pending:
+            granted = len(pending) if limiter is None else limiter.acquire(min(len(pending), max_workers),
+                                                                           background=True)
+            if not granted:
+                time.sleep(0.1)  # Budget exhausted; the dashboard and collector come first
+                continue
+            batch, pending = pending[:granted], pending[granted:]
+            results.update(pool.map(probe_one, batch))
+    catalog.update(results)
+    if any(status is not None for status, _ in results.values()):
+        try:
+            catalog.save()
+        except OSError:
+            pass  # Read-only directory: keep the catalog in memory for this process
+    return results
+
+
+_DEFAULT = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_catalog():
+    """The process-wide catalog at config.CATALOG_PATH, loaded on first use."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = VariableCatalog(config.CATALOG_PATH).load()
+        return _DEFAULT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe which variables the Nucleares webserver serves.")
+    parser.add_argument("--recheck", action="store_true", help="Probe every candidate, not just unchecked ones")
+    args = parser.parse_args()
+    catalog = default_catalog()
+    names = candidate_names()
+    if not args.recheck:
+        names = catalog.unchecked(names, config.CATALOG_RECHECK_SECONDS)
+    started = time.perf_counter()
+    results = discover(catalog, names)
+    unreachable = sum(status is None for status, _ in results.values())
+    print(f"Probed {len(results)} names in {time.perf_counter() - started:.1f}s"
+          + (f" ({unreachable} unreachable)" if unreachable else ""))
+    for name, entry in sorted(catalog.entries().items()):
+        print(f"  {name:<50} {entry['status']:<8} {entry['type'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# charts.py
+"""
+History charts drawn with WebGL (Plotly Scattergl), built straight from the history store's NumPy
+arrays: no per-rerun DataFrame, and the payload sent to the browser stays the same size however long
+the history gets. While the retained samples fit in `max_points` each series is drawn as recorded;
+beyond that the chart draws bucket means from HistoryStore.query, whose cached result is only
+extended by the new samples on each rerun instead of re-resampling the whole window.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from history import to_datetimes
+
+# Trend bucket sizes (seconds) a chart may use; a fixed ladder keeps the store's query cache warm
+BUCKET_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600)
+
+
+def trend_bucket(span_seconds, max_points):
+    """The smallest step in BUCKET_STEPS that covers `span_seconds` in at most `max_points` buckets."""
+    target = span_seconds / max_points
+    return next((step for step in BUCKET_STEPS if step >= target), BUCKET_STEPS[-1])
+
+
+def _trend_lines(store, channels, axis, bucket):
+    """(x, y) per channel from the store's cached bucket means; a bucket with no samples breaks the lines."""
+    result = store.query(channels, bucket=bucket, agg="mean", axis=axis)
+    x, values = result.times, result.values
+    breaks = np.flatnonzero(np.diff(x) > bucket * 1.5) + 1
+    if breaks.size:
+        x = np.insert(x, breaks, x[breaks - 1] + bucket)
+        values = np.insert(values, breaks, np.nan, axis=0)
+    return [(x, values[:, i]) for i in range(len(channels))]
+
+
+def history_figure(store, channels, labels=None, axis="wall", max_points=2000, height=300, secondary=(),
+                   bucket=None):
+    """
+    One Scattergl trace per channel on a shared time axis. Channels listed in `secondary` go on a
+    right-hand y axis (for series with different units). With `bucket` (seconds, see trend_bucket),
+    a history longer than `max_points` samples is drawn as bucket means; otherwise each series is
+    decimated to `max_points`. Returns None while there's nothing to plot.
+    """
+    labels = labels or channels
+    if bucket is not None and len(store) > max_points:
+        lines = _trend_lines(store, channels, axis, bucket)
+    else:
+        lines = [store.line(channel, axis=axis, max_points=max_points) for channel in channels]
+    fig = go.Figure()
+    plotted = False
+    for channel, label, (x, y) in zip(channels, labels, lines):
+        plotted = plotted or x.size > 0
+        fig.add_trace(go.Scattergl(
+            x=x if axis == "sim" else to_datetimes(x), y=y, name=label, mode="lines",
+            yaxis="y2" if channel in secondary else "y",
+            hovertemplate=f"{label}: %{{y:.2f}}<extra></extra>",
+        ))
+    if not plotted:
+        return None
+    layout = dict(
+        height=height, margin=dict(l=10, r=10, t=10, b=10), hovermode="x unified",
+        xaxis={"fixedrange": True, "title": "Sim Time (s)" if axis == "sim" else "Time"},
+        yaxis={"fixedrange": True},
+        showlegend=len(channels) > 1, legend=dict(orientation="h", y=1.02, yanchor="bottom"),
+        uirevision="history",  # Keep legend toggles when the figure is replaced on the next rerun
+    )
+    if secondary:
+        layout["yaxis2"] = {"fixedrange": True, "overlaying": "y", "side": "right", "showgrid": False}
+    if len(channels) == 1:
+        layout["yaxis"]["title"] = labels[0]
+    fig.update_layout(**layout)
+    return fig
+
+
+def overlay_figure(series, title, height=300):
+    """
+    Recorded runs overlaid on one sim-time axis: `series` is [(run label, x, y)], x in sim seconds
+    since each run's start. Returns None while there's nothing to plot.
+    """
+    fig = go.Figure()
+    for label, x, y in series:
+        fig.add_trace(go.Scattergl(x=x, y=y, name=label, mode="lines",
+                                   hovertemplate=f"{label}: %{{y:.2f}}<extra></extra>"))
+    if not any(x.size for _, x, _ in series):
+        return None
+    fig.update_layout(
+        height=height, margin=dict(l=10, r=10, t=30, b=10), hovermode="x unified",
+        title={"text": title, "font": {"size": 14}},
+        xaxis={"title": "Sim Time Since Run Start (s)"}, yaxis={"title": title},
+        legend=dict(orientation="h", y=1.02, yanchor="bottom", x=1, xanchor="right"),
+        uirevision="overlay",
+    )
+    return fig
@@ -0,0 +1,85 @@
+# client.py
+import threading
+import time
+
+import requests
+
+import catalog
+import config  # Import configuration
+import plant
+from decoding import ErrorKind, decode, error_reading
+
+# Which variables exist on the webserver, as last discovered (see catalog.py)
+CATALOG = catalog.default_catalog()
+# Everything the collector and batch fetches poll by default, minus names known not to exist
+POLLED_VARIABLES = CATALOG.filter(dict.fromkeys(config.VARIABLES + plant.GENERATOR_VARIABLES))
+
+
+def fetch_reading(variable_name, session=None):
+    """
+    Fetches a single variable from the webserver and decodes it into a typed Reading, stamped with
+    its fetch time and round trip. No caching and no Streamlit dependency, so the collector process
+    can use it too.
+    """
+    if not isinstance(variable_name, str):
+        return error_reading(ErrorKind.INVALID_NAME, f"Invalid variable name type ({type(variable_name)})")
+
+    params = {"Variable": variable_name}
+    started = time.perf_counter()
+    try:
+        response = (session or requests).get(config.WEBSERVER_URL, params=params, timeout=1)
+        response.raise_for_status()
+    except requests.exceptions.ConnectionError:
+        reading = error_reading(ErrorKind.CONNECTION)
+    except requests.exceptions.Timeout:
+        reading = error_reading(ErrorKind.TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        reading = error_reading(ErrorKind.HTTP, str(e))
+    else:
+        reading = decode(variable_name, response.text)
+    return reading.stamp(time.time(), time.perf_counter() - started)
+
+
+class ReadingCache:
+    """
+    Process-wide map of variable name -> (Reading, fetched_at), shared by every session.
+    Old entries are kept so a rate-limited fetch can fall back to the last known value.
+    Also remembers which variables were recently wanted on screen, to prioritise them.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._wanted = {}  # variable name -> last time a widget asked for it
+        self._lock = threading.Lock()
+
+    def put(self, variable_name, reading, fetched_at=None):
+        self.put_many({variable_name: reading}, fetched_at)
+
+    def put_many(self, readings, fetched_at=None):
+        now = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            for name, reading in readings.items():
+                # Age from when the value was actually fetched, if the Reading knows
+                stamp = reading.fetched_at if fetched_at is None and reading.fetched_at is not None else now
+                self._entries[name] = (reading, stamp)
+
+    def get(self, variable_name, max_age):
+        """The cached Reading if it is at most `max_age` seconds old, else None."""
+        entry = self.get_entry(variable_name)
+        if entry is None or time.time() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def get_entry(self, variable_name):
+        """The last known (Reading, fetched_at) regardless of age, or None."""
+        with self._lock:
+            return self._entries.get(variable_name)
+
+    def mark_wanted(self, variable_name):
+        with self._lock:
+            self._wanted[variable_name] = time.time()
+
+    def recently_wanted(self, variable_name, within):
+        with self._lock:
+            wanted_at = self._wanted.get(variable_name)
+        return wanted_at is not None and time.time() - wanted_at <= within
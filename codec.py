@@ -0,0 +1,416 @@
+# codec.py
+"""
+Compact on-disk format for recorded snapshots.
+
+A recording is a header, a stream of frames and a keyframe index:
+
+* Keyframes store every channel in full, every `keyframe_interval` ticks.
+* Delta frames store only what changed since the previous tick. Unchanged channels are
+  run-length encoded as skip/take runs, floats are XOR-ed against their previous bit pattern
+  (only the non-zero bytes are written), int codes are zigzag varint deltas and booleans a byte.
+* The index (keyframe offset, wall time, sim time) is written on close, so readers can jump
+  to any time and decode forward from the nearest keyframe. It ends with flags; bit 0 is set
+  when sim time never went backwards, the only case where sim-time queries can jump too.
+  Recordings that were never closed are still readable; the index is rebuilt by scanning.
+
+Readers memory-map the file, so a query for a few channels over a time window only pages in the
+frames from the nearest keyframe to the end of the window, and skips over the other channels'
+bytes without decoding them.
+"""
+import bisect
+import json
+import math
+import mmap
+import struct
+
+from decoding import VarType, variable_type
+
+MAGIC = b"NDR1"
+INDEX_MAGIC = b"NDRI"
+END_MAGIC = b"NDRE"
+KEYFRAME = b"K"
+DELTA = b"D"
+
+_FLOAT, _INT, _BOOL = 0, 1, 2
+_MISSING_BITS = 0x7FF8000000000000  # Canonical NaN: a missing float reading
+_XOR_ZERO = 0x80  # Float header byte meaning "bit pattern unchanged"
+_BOOL_MISSING = 2
+_SIM_SORTED = 1  # Index flag: sim time never decreased
+
+
+# --- Primitive Encoders ---
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value):
+    return (value << 1) if value >= 0 else ((-value << 1) - 1)
+
+
+def _unzigzag(value):
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+
+def _float_bits(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return _MISSING_BITS
+    return struct.unpack("<Q", struct.pack("<d", float(value)))[0]
+
+
+def _bits_float(bits):
+    return struct.unpack("<d", struct.pack("<Q", bits))[0]
+
+
+def _write_xor(out, xor):
+    """Writes a 64-bit XOR as a (leading<<4 | trailing) zero-byte header plus the middle bytes."""
+    if xor == 0:
+        out.append(_XOR_ZERO)
+        return
+    raw = xor.to_bytes(8, "big")
+    lead = len(raw) - len(raw.lstrip(b"\0"))
+    trail = len(raw) - len(raw.rstrip(b"\0"))
+    out.append((lead << 4) | trail)
+    out += raw[lead:8 - trail]
+
+
+def _read_xor(buf, pos):
+    header = buf[pos]
+    pos += 1
+    if header == _XOR_ZERO:
+        return 0, pos
+    lead, trail = header >> 4, header & 0x0F
+    size = 8 - lead - trail
+    middle = int.from_bytes(buf[pos:pos + size], "big")
+    return middle << (8 * trail), pos + size
+
+
+def _channel_kind(variable_name):
+    var_type = variable_type(variable_name)
+    if var_type is VarType.BOOL:
+        return _BOOL
+    if var_type is VarType.INT:
+        return _INT
+    return _FLOAT
+
+
+def _state(kind, value):
+    """
+    Normalises a value into the comparable state stored per channel. Values that don't fit the
+    channel's kind (e.g. free text the webserver sends for a float variable) are stored as missing.
+    """
+    if kind == _FLOAT:
+        return _float_bits(value) if isinstance(value, (int, float)) else _MISSING_BITS
+    if kind == _INT:
+        return None if not isinstance(value, (int, float)) or isinstance(value, bool) else int(value)
+    return value if isinstance(value, bool) else None
+
+
+def _value(kind, state):
+    if kind == _FLOAT:
+        return None if state == _MISSING_BITS else _bits_float(state)
+    return state
+
+
+# --- Writer ---
+
+class RecordingWriter:
+    """Appends snapshots (wall time, sim time, {variable: value}) to a recording file."""
+
+    def __init__(self, path, variables, keyframe_interval=60, meta=None):
+        self.variables = list(variables)
+        self.keyframe_interval = int(keyframe_interval)
+        self._kinds = [_channel_kind(name) for name in self.variables]
+        self._file = open(path, "wb")
+        header = json.dumps({
+            "variables": self.variables, "kinds": self._kinds,
+            "keyframe_interval": self.keyframe_interval, "meta": meta or {},
+        }).encode()
+        self._file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self.index = []  # (offset, wall_time, sim_time) per keyframe
+        self._states = None
+        self._wall_ms = 0  # Quantised wall time (ms) the reader will reconstruct
+        self._sim_bits = 0
+        self._last_sim = -math.inf  # Newest known sim time
+        self._sim_sorted = True
+        self._ticks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def bytes_written(self):
+        return self._file.tell()
+
+    def write(self, wall_time, sim_time, values):
+        """Writes one tick. Missing or errored variables can be omitted or passed as None."""
+        states = [_state(kind, values.get(name)) for name, kind in zip(self.variables, self._kinds)]
+        sim_bits = _float_bits(sim_time)
+        wall_ms = round(wall_time * 1000)
+        out = bytearray()
+        if self._states is None or self._ticks % self.keyframe_interval == 0:
+            self.index.append((self._file.tell(), wall_ms / 1000, _bits_float(sim_bits)))
+            out += KEYFRAME + struct.pack("<qQ", wall_ms, sim_bits)
+            for kind, state in zip(self._kinds, states):
+                self._write_full(out, kind, state)
+        else:
+            out += DELTA
+            _write_varint(out, _zigzag(wall_ms - self._wall_ms))
+            _write_xor(out, sim_bits ^ self._sim_bits)
+            changed = [i for i, state in enumerate(states) if state != self._states[i]]
+            self._write_runs(out, changed)
+            for i in changed:
+                self._write_change(out, self._kinds[i], self._states[i], states[i])
+        self._file.write(out)
+        self._states, self._wall_ms, self._sim_bits = states, wall_ms, sim_bits
+        if sim_time is not None and not math.isnan(sim_time):
+            self._sim_sorted = self._sim_sorted and sim_time >= self._last_sim  # False after a reload
+            self._last_sim = sim_time
+        self._ticks += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        out = bytearray(INDEX_MAGIC)
+        _write_varint(out, len(self.index))
+        for offset, wall, sim in self.index:
+            out += struct.pack("<Qdd", offset, wall, sim)
+        _write_varint(out, _SIM_SORTED if self._sim_sorted else 0)
+        out += struct.pack("<Q", index_offset) + END_MAGIC
+        self._file.write(out)
+        self._file.close()
+
+    @staticmethod
+    def _write_full(out, kind, state):
+        if kind == _FLOAT:
+            out += struct.pack("<Q", state)
+        elif kind == _INT:
+            _write_varint(out, 1 if state is None else _zigzag(state) << 1)
+        else:
+            out.append(_BOOL_MISSING if state is None else int(state))
+
+    @staticmethod
+    def _write_change(out, kind, old, new):
+        if kind == _FLOAT:
+            _write_xor(out, old ^ new)
+        elif kind == _INT:
+            if new is None:
+                _write_varint(out, 1)
+            else:
+                _write_varint(out, _zigzag(new - (old or 0)) << 1)
+        else:
+            out.append(_BOOL_MISSING if new is None else int(new))
+
+    @staticmethod
+    def _write_runs(out, changed):
+        """Encodes the sorted changed-channel indexes as (skip, take) run pairs."""
+        runs = []
+        position = 0
+        for i in changed:
+            if runs and i == position:
+                runs[-1][1] += 1
+            else:
+                runs.append([i - position, 1])
+            position = i + 1
+        _write_varint(out, len(runs))
+        for skip, take in runs:
+            _write_varint(out, skip)
+            _write_varint(out, take)
+
+
+# --- Reader ---
+
+class RecordingReader:
+    """Random-access reader for recordings written by RecordingWriter."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buf[:4] != MAGIC:
+            raise ValueError(f"{path} is not a dashboard recording")
+        header_len = struct.unpack_from("<I", self._buf, 4)[0]
+        header = json.loads(self._buf[8:8 + header_len])
+        self.variables = header["variables"]
+        self.keyframe_interval = header["keyframe_interval"]
+        self.meta = header.get("meta", {})
+        self._kinds = header["kinds"]
+        self._column = {name: i for i, name in enumerate(self.variables)}
+        self._frames_start = 8 + header_len
+        self._frames_end, self.index, sim_sorted = self._load_index()
+        self._index_wall = [wall for _, wall, _ in self.index]
+        # Binary search on sim time only works when it never went backwards (no reload); a keyframe
+        # with unknown sim time takes the next known one, which bounds every tick before it.
+        # Otherwise sim queries scan from the first keyframe.
+        self._index_sim = None
+        if sim_sorted:
+            self._index_sim, following = [], math.inf
+            for _, _, sim in reversed(self.index):
+                following = following if math.isnan(sim) else sim
+                self._index_sim.append(following)
+            self._index_sim.reverse()
+
+    def _load_index(self):
+        buf = self._buf
+        if buf[-4:] == END_MAGIC:
+            index_offset = struct.unpack_from("<Q", buf, len(buf) - 12)[0]
+            if buf[index_offset:index_offset + 4] == INDEX_MAGIC:
+                count, pos = _read_varint(buf, index_offset + 4)
+                entries = [struct.unpack_from("<Qdd", buf, pos + 24 * i) for i in range(count)]
+                pos += 24 * count
+                flags = _read_varint(buf, pos)[0] if pos < len(buf) - 12 else 0  # Older files have none
+                return index_offset, entries, bool(flags & _SIM_SORTED)
+        # Unclosed recording: rebuild the index by scanning every frame (no channel decoded)
+        entries, latest, sim_sorted = [], -math.inf, True
+        for offset, kind, wall, sim, _ in self._scan(self._frames_start, len(self._buf), wanted=set()):
+            if not math.isnan(sim):
+                sim_sorted, latest = sim_sorted and sim >= latest, sim
+            if kind == KEYFRAME:
+                entries.append((offset, wall, sim))
+        return len(self._buf), entries, sim_sorted
+
+    @property
+    def start_time(self):
+        return self._index_wall[0] if self.index else None
+
+    @property
+    def finished(self):
+        """Whether the recording was closed (index written), not cut off or still being written."""
+        return self._frames_end < len(self._buf)
+
+    def close(self):
+        self._buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _scan(self, pos, end, wanted=None):
+        """
+        Yields (offset, kind, wall_time, sim_time, states) for every frame from `pos`. With `wanted`
+        (a set of channel indexes) only those channels' states are kept up to date.
+        """
+        buf, kinds = self._buf, self._kinds
+        states = None
+        wall_ms = sim_bits = 0
+        while pos < end:
+            offset = pos
+            kind = buf[pos:pos + 1]
+            pos += 1
+            try:
+                if kind == KEYFRAME:
+                    wall_ms, sim_bits = struct.unpack_from("<qQ", buf, pos)
+                    pos += 16
+                    states = []
+                    for i, channel_kind in enumerate(kinds):
+                        if wanted is None or i in wanted:
+                            state, pos = self._read_full(buf, pos, channel_kind)
+                        else:
+                            state, pos = None, self._skip(buf, pos, channel_kind, full=True)
+                        states.append(state)
+                elif kind == DELTA and states is not None:
+                    delta, pos = _read_varint(buf, pos)
+                    wall_ms += _unzigzag(delta)
+                    xor, pos = _read_xor(buf, pos)
+                    sim_bits ^= xor
+                    states = list(states)
+                    run_count, pos = _read_varint(buf, pos)
+                    channel = 0
+                    changed = []
+                    for _ in range(run_count):
+                        skip, pos = _read_varint(buf, pos)
+                        take, pos = _read_varint(buf, pos)
+                        channel += skip
+                        changed.extend(range(channel, channel + take))
+                        channel += take
+                    for i in changed:
+                        if wanted is None or i in wanted:
+                            states[i], pos = self._read_change(buf, pos, kinds[i], states[i])
+                        else:
+                            pos = self._skip(buf, pos, kinds[i], full=False)
+                else:
+                    return  # Index block, or a truncated tail
+            except (IndexError, struct.error):
+                return  # Recording cut off mid-frame
+            yield offset, kind, wall_ms / 1000, _bits_float(sim_bits), states
+
+    @staticmethod
+    def _read_full(buf, pos, kind):
+        if kind == _FLOAT:
+            return struct.unpack_from("<Q", buf, pos)[0], pos + 8
+        if kind == _INT:
+            raw, pos = _read_varint(buf, pos)
+            return (None if raw & 1 else _unzigzag(raw >> 1)), pos
+        raw = buf[pos]
+        return (None if raw == _BOOL_MISSING else bool(raw)), pos + 1
+
+    @staticmethod
+    def _skip(buf, pos, kind, full):
+        """Position after one channel's value without decoding it (full = keyframe encoding)."""
+        if kind == _FLOAT:
+            if full:
+                return pos + 8
+            header = buf[pos]
+            return pos + 1 if header == _XOR_ZERO else pos + 1 + 8 - (header >> 4) - (header & 0x0F)
+        if kind == _INT:
+            while buf[pos] & 0x80:
+                pos += 1
+            return pos + 1
+        return pos + 1
+
+    @staticmethod
+    def _read_change(buf, pos, kind, old):
+        if kind == _FLOAT:
+            xor, pos = _read_xor(buf, pos)
+            return old ^ xor, pos
+        if kind == _INT:
+            raw, pos = _read_varint(buf, pos)
+            return (None if raw & 1 else (old or 0) + _unzigzag(raw >> 1)), pos
+        raw = buf[pos]
+        return (None if raw == _BOOL_MISSING else bool(raw)), pos + 1
+
+    def frames(self, start=None, end=None, channels=None, axis="wall"):
+        """
+        Yields (wall_time, sim_time, values) for ticks in [start, end] on the chosen time axis.
+        `values` maps each requested channel (all by default) to its value, None if missing. Ticks
+        with unknown sim time are only yielded on the sim axis when neither bound is given.
+        Decoding starts at the last keyframe before `start` (the first keyframe for sim time that
+        went backwards), and only the requested channels are decoded.
+        """
+        keys = self._index_sim if axis == "sim" else self._index_wall
+        first = max(bisect.bisect_left(keys, start) - 1, 0) if start is not None and keys else 0
+        if not self.index:
+            return
+        columns = [(name, self._column[name]) for name in (channels or self.variables)]
+        wanted = {i for _, i in columns} if channels else None
+        bounded = start is not None or end is not None
+        for _, _, wall, sim, states in self._scan(self.index[first][0], self._frames_end, wanted):
+            t = sim if axis == "sim" else wall
+            if bounded and math.isnan(t):
+                continue  # NaN compares False with both bounds; it isn't inside any window
+            if start is not None and t < start:
+                continue
+            if end is not None and t > end:
+                if keys is not None:
+                    return  # Sorted axis: nothing later is in range
+                continue  # Sim time jumped back on a reload; later ticks may be in range again
+            yield wall, sim, {name: _value(self._kinds[i], states[i]) for name, i in columns}
@@ -0,0 +1,139 @@
+# collector.py
+"""
+Standalone collector: polls the simulation on a steady cadence and publishes the latest snapshot
+plus ring-buffer history into shared memory for the dashboard to read.
+
+    python collector.py [--interval SECONDS] [--record [PATH]] [--label TEXT]
+
+`--record` alone (or with a directory) adds a timestamped recording to the library in
+config.RECORDINGS_DIR (or that directory), where the dashboard's "Recorded Runs" tab lists it.
+
+Run it next to `streamlit run main.py`; the dashboard attaches automatically and falls back to
+fetching on its own whenever the collector isn't running.
+"""
+import argparse
+import math
+import os
+import time
+
+import requests
+
+import catalog
+import client
+import config
+import plant
+from codec import RecordingWriter
+from decoding import ErrorKind, error_reading
+from rate_limit import TokenBucket
+from recordings import RECORDING_SUFFIX
+from shared_snapshot import SharedSnapshotWriter
+
+POLLED_VARIABLES = client.POLLED_VARIABLES
+
+
+def polled_variables(limiter):
+    """
+    POLLED_VARIABLES minus those that don't exist, after probing the names the catalog hasn't
+    checked recently (only the first start, or once a day, actually waits on probes).
+    """
+    unchecked = client.CATALOG.unchecked(catalog.candidate_names(), config.CATALOG_RECHECK_SECONDS)
+    if unchecked:
+        results = catalog.discover(client.CATALOG, unchecked, limiter)
+        missing = sum(status == catalog.MISSING for status, _ in results.values())
+        print(f"Probed {len(results)} variable names: {missing} not served by the simulation")
+    return client.CATALOG.filter(POLLED_VARIABLES)
+
+
+def collect_once(session, limiter, readings, fetched_at, variables=None):
+    """
+    Refreshes as many polled variables as the request budget allows, least recently fetched first;
+    the rest keep their previous Reading. Updates and returns `readings` ({variable_name: Reading}).
+    """
+    due = sorted(variables or POLLED_VARIABLES, key=lambda name: fetched_at.get(name, 0.0))
+    granted = limiter.acquire(len(due))
+    limiter.note_stale(len(due) - granted)
+    for name in due[:granted]:
+        readings[name] = client.fetch_reading(name, session=session)
+        fetched_at[name] = time.monotonic()
+    return readings
+
+
+def history_values(readings):
+    """Maps a snapshot onto the history channels (including derived ones)."""
+    total_kw, _ = plant.total_generator_output(
+        lambda name: readings.get(name) or error_reading(ErrorKind.RATE_LIMITED))
+    values = {"TOTAL_KW": total_kw}
+    for channel in config.HISTORY_CHANNELS:
+        reading = readings.get(channel)
+        if reading is not None and reading.is_numeric:
+            values[channel] = reading.value
+    return values
+
+
+def history_capacity(interval):
+    """Ring size that keeps HISTORY_RETENTION_SECONDS of samples taken every `interval` seconds."""
+    return max(math.ceil(config.HISTORY_RETENTION_SECONDS / interval), 2)
+
+
+def recording_path(path):
+    """`path` itself, or a new timestamped file in it when it is a directory (no file extension)."""
+    if os.path.isdir(path) or not os.path.splitext(path)[1]:
+        os.makedirs(path, exist_ok=True)
+        return os.path.join(path, time.strftime("%Y%m%d-%H%M%S") + RECORDING_SUFFIX)
+    return path
+
+
+def run(interval, record_path=None, label=""):
+    limiter = TokenBucket(config.RATE_LIMIT_REQUESTS_PER_SECOND, config.RATE_LIMIT_BURST)
+    variables = polled_variables(limiter)
+    writer = SharedSnapshotWriter(config.SHARED_MEMORY_NAME, variables, config.HISTORY_CHANNELS,
+                                  history_capacity(interval), gap_seconds=config.HISTORY_GAP_SECONDS)
+    recorder = None
+    if record_path:
+        record_path = recording_path(record_path)
+        recorder = RecordingWriter(record_path, variables, meta={"label": label})
+        print(f"Recording to {record_path}")
+    session = requests.Session()
+    readings, fetched_at = {}, {}
+    print(f"Collector publishing {len(variables)} variables to shared memory "
+          f"'{config.SHARED_MEMORY_NAME}' every {interval:.2f}s")
+    next_tick = time.monotonic()
+    try:
+        while True:
+            wall_time = time.time()
+            collect_once(session, limiter, readings, fetched_at, variables)
+            sim = readings.get(config.SIM_TIME_VARIABLE)
+            sim_time = sim.value if sim is not None and sim.is_numeric else None
+            writer.publish(readings, wall_time, sim_time)
+            stored = writer.history.append(wall_time, history_values(readings), sim_time=sim_time)
+            if recorder is not None and stored:
+                recorder.write(wall_time, sim_time, {name: r.value for name, r in readings.items() if r.ok})
+            # Schedule against the original cadence so slow polls don't accumulate drift
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # Overran; restart the cadence from now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if recorder is not None:
+            recorder.close()
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll the Nucleares webserver into shared memory.")
+    parser.add_argument("--interval", type=float, default=config.COLLECTOR_INTERVAL_SECONDS,
+                        help="Seconds between polls")
+    parser.add_argument("--record", metavar="PATH", nargs="?", const=config.RECORDINGS_DIR,
+                        help=f"Also write a compressed recording to PATH (a {RECORDING_SUFFIX} file, or a "
+                             f"directory to add a timestamped file to; default {config.RECORDINGS_DIR}/)")
+    parser.add_argument("--label", default="", help="Name stored with the recording, e.g. 'startup A'")
+    args = parser.parse_args()
+    run(args.interval, args.record, args.label)
+
+
+if __name__ == "__main__":
+    main()
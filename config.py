@@ -1,7 +1,79 @@
 # config.py
+import os
+
 WEBSERVER_URL = "http://localhost:8785/"
 DEFAULT_REFRESH_RATE_SECONDS = 2
 MAX_HISTORY_POINTS = 30
+# History is sampled once per interval for the whole process, however many browsers are connected
+HISTORY_SAMPLE_INTERVAL_SECONDS = DEFAULT_REFRESH_RATE_SECONDS * 0.9
+# Seconds of history kept; the collector samples more often, so its shared ring is sized from this
+HISTORY_RETENTION_SECONDS = MAX_HISTORY_POINTS * HISTORY_SAMPLE_INTERVAL_SECONDS
+# No stored sample for this long (while the sim wasn't paused) marks a gap in the history
+HISTORY_GAP_SECONDS = DEFAULT_REFRESH_RATE_SECONDS * 3
+# Simulation clock used to align history and detect pauses
+SIM_TIME_VARIABLE = "TIME_STAMP"
+# Channels kept in the shared history store ("TOTAL_KW" is derived from the generators)
+HISTORY_CHANNELS = ["CORE_TEMP", "CORE_PRESSURE", "TOTAL_KW"]
+# History charts are WebGL and drawn with at most this many points per series (longer histories as
+# cached trend buckets), so MAX_HISTORY_POINTS can be raised to tens of thousands (hours of history)
+# without slowing reruns
+CHART_MAX_POINTS = 2000
+
+# --- Limit Forecasts ---
+# Channel -> variable holding its limit. An online trend per channel (updated once per history
+# sample) estimates how long until the limit is reached at the current rate.
+FORECAST_LIMITS = {"CORE_TEMP": "CORE_TEMP_MAX", "CORE_PRESSURE": "CORE_PRESSURE_MAX"}
+FORECAST_LEVEL_TAU_SECONDS = 10  # Smoothing of the level: higher ignores more noise but lags more
+FORECAST_TREND_TAU_SECONDS = 60  # Smoothing of the rate of change
+FORECAST_ALARM_SECONDS = 300  # Time-to-limit below this is shown as a warning
+
+# --- Anomaly Detection ---
+# Every float variable the dashboard polls is scored each tick against its own exponentially
+# weighted baseline; the largest deviations feed the "Unusual Now" panel.
+ANOMALY_SAMPLE_INTERVAL_SECONDS = HISTORY_SAMPLE_INTERVAL_SECONDS
+ANOMALY_BASELINE_TAU_SECONDS = 300  # How far back "normal" reaches
+ANOMALY_NOISE_TAU_SECONDS = 10  # Short-term noise is measured around a mean this fast
+ANOMALY_WARMUP_SAMPLES = 20  # Samples before a variable can be flagged
+ANOMALY_Z_THRESHOLD = 4.0  # Standard deviations from baseline to count as unusual
+ANOMALY_MIN_STD = 1e-3  # Noise floors, so a variable that has been perfectly steady isn't flagged
+ANOMALY_MIN_RELATIVE_STD = 0.001  # for a tiny change (absolute, and as a fraction of its baseline)
+ANOMALY_PANEL_ROWS = 8
+
+# --- Event Log ---
+# Changes of every polled state code / flag, sampled once per interval for the whole process
+EVENT_SAMPLE_INTERVAL_SECONDS = HISTORY_SAMPLE_INTERVAL_SECONDS
+EVENT_LOG_CAPACITY = 1000  # Transitions kept per variable
+EVENT_LOG_ROWS = 200  # Shown in the timeline
+
+# --- Frame Scheduling ---
+# The auto-refresh interval is never shorter than the recent render time times this headroom, so
+# reruns don't supersede each other before they finish drawing.
+FRAME_OVERRUN_HEADROOM = 1.5
+# Adaptive refresh: render CPU for all sessions together, as a fraction of one core
+FRAME_CPU_TARGET = 0.5
+FRAME_MAX_INTERVAL_SECONDS = 30.0
+
+# --- Data Freshness ---
+# Displayed values fetched longer ago than this count as stale (and are shaded if enabled)
+STALE_AFTER_SECONDS = DEFAULT_REFRESH_RATE_SECONDS * 3
+STALE_SHADING_DEFAULT = True
+FRESHNESS_SAMPLES_PER_TAB = 5000  # Recent displayed values behind each tab's percentiles
+
+# --- Kiosk Mode (kiosk.py, or the dashboard with `?kiosk=1`) ---
+# Wall displays rerun only the tile grid, on this timer
+KIOSK_REFRESH_SECONDS = DEFAULT_REFRESH_RATE_SECONDS
+KIOSK_TITLE = "Reactor Kiosk"
+
+# --- Collector Process (collector.py) ---
+SHARED_MEMORY_NAME = "nucleares_dashboard"
+COLLECTOR_INTERVAL_SECONDS = 1.0
+# The dashboard stops trusting the shared snapshot (and fetches itself) once it is this old
+SHARED_SNAPSHOT_STALE_SECONDS = 5.0
+
+# --- Recorded Runs ---
+# Library of `collector.py --record` files, listed and compared in the "Recorded Runs" tab
+RECORDINGS_DIR = os.environ.get("DASHBOARD_RECORDINGS_DIR", "recordings")
+RECORDING_OVERLAY_MAX_POINTS = 2000  # Per run and channel in the comparison chart
 
 VARIABLES = [
     # Core
@@ -18,7 +90,80 @@ VARIABLES = [
     "COOLANT_CORE_QUANTITY_CIRCULATION_PUMPS_PRESENT", "COOLANT_CORE_QUANTITY_FREIGHT_PUMPS_PRESENT",
     # Coolant Core Pumps (0-2)
     "COOLANT_CORE_CIRCULATION_PUMP_0_STATUS", "COOLANT_CORE_CIRCULATION_PUMP_1_STATUS",
+    "COOLANT_CORE_CIRCULATION_PUMP_2_STATUS",
     # ... and so on for all variables
     # ... include the rest of the VARIABLES list ...
     "STEAM_TURBINE_0_PRESSURE", "STEAM_TURBINE_1_PRESSURE", "STEAM_TURBINE_2_PRESSURE",
 ]
+
+# --- Variable Catalog (catalog.py) ---
+# Which variables the webserver actually serves, probed concurrently and kept on disk. Names found
+# missing are never polled or fetched; each name is probed again after CATALOG_RECHECK_SECONDS.
+CATALOG_PATH = os.environ.get("DASHBOARD_CATALOG_PATH", "variable_catalog.json")
+CATALOG_RECHECK_SECONDS = 24 * 3600
+CATALOG_PROBE_CONCURRENCY = 16
+CATALOG_PROBE_TIMEOUT_SECONDS = 2.0
+# Probed besides VARIABLES and the equipment groups (the dashboard adds every tab's variables)
+CATALOG_EXTRA_CANDIDATES = [
+    "RODS_STATUS", "RODS_QUANTITY", "RODS_POS_ACTUAL", "RODS_POS_ORDERED", "RODS_MOVEMENT_SPEED",
+    "RODS_ALIGNED", "RODS_DEFORMED", "RODS_TEMPERATURE", "RODS_MAX_TEMPERATURE",
+    "FUEL_LEVEL_PERCENT",
+]
+
+# --- Fetch Engine ---
+# "sync": requests on a small thread pool (default). "async": httpx on an event loop (optional package).
+# Either way main.py fetches the open tab's variables in one concurrent batch up front.
+FETCH_ENGINE = "sync"
+SYNC_FETCH_CONCURRENCY = 8
+ASYNC_MAX_CONCURRENCY = 16
+ASYNC_REQUEST_TIMEOUT_SECONDS = 1.0
+ASYNC_SNAPSHOT_DEADLINE_SECONDS = 2.0
+# How often a waiting rerun checks whether it has been superseded (and its snapshot can be dropped)
+ASYNC_CANCEL_POLL_SECONDS = 0.05
+
+# --- Request Budget ---
+# The webserver runs inside the game, so requests cost frame rate. Budget shared by all sessions/tabs
+# (the collector enforces its own copy). Background work only uses the top half of the bucket.
+RATE_LIMIT_REQUESTS_PER_SECOND = 60
+RATE_LIMIT_BURST = 120
+RATE_LIMIT_BACKGROUND_RESERVE = 0.5
+
+# --- Background Prefetch ---
+# Keeps the non-visible tabs' variables warm so switching tabs renders from cache
+PREFETCH_ENABLED = True
+PREFETCH_INTERVAL_SECONDS = 1.0
+PREFETCH_IDLE_AFTER_SECONDS = 30  # Stop prefetching when no session has rerun for this long
+
+# --- Gauges ---
+# "plotly": interactive Plotly indicators. "svg": compact inline SVG with the same bands and
+# threshold, far lighter in the browser on gauge-heavy tabs (Steam & Power Gen has 18).
+GAUGE_BACKEND = os.environ.get("DASHBOARD_GAUGE_BACKEND", "plotly")
+
+# --- Session State ---
+# display_metric keeps each variable's previous value (for its delta) in an LRU capped at this size
+SESSION_PREVIOUS_VALUES_MAX = 256
+
+# --- Profiling ---
+# Sample the first N reruns of every session (0 = off); the sidebar can also start a capture.
+# Collapsed stacks and speedscope files land in PROFILE_OUTPUT_DIR.
+PROFILE_RERUNS = int(os.environ.get("DASHBOARD_PROFILE_RERUNS", "0"))
+PROFILE_OUTPUT_DIR = os.environ.get("DASHBOARD_PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.002
+
+# --- Variable Type Metadata (used by decoding.py) ---
+# Explicit types for variables whose name doesn't say what they hold.
+VARIABLE_TYPES = {
+    "CORE_STATE": "int", "CORE_STATE_CRITICALITY": "int", "COOLANT_CORE_STATE": "int",
+    "CORE_CRITICAL_MASS_REACHED_COUNTER": "int",
+    "COOLANT_CORE_QUANTITY_CIRCULATION_PUMPS_PRESENT": "int", "COOLANT_CORE_QUANTITY_FREIGHT_PUMPS_PRESENT": "int",
+    "RODS_QUANTITY": "int",
+    "CORE_CRITICAL_MASS_REACHED": "bool", "CORE_IMMINENT_FUSION": "bool", "CORE_READY_FOR_START": "bool",
+    "CORE_STEAM_PRESENT": "bool", "CORE_HIGH_STEAM_PRESENT": "bool",
+    "RODS_ALIGNED": "bool", "RODS_DEFORMED": "bool",
+    "TIME": "timestamp", "TIME_STAMP": "timestamp",
+}
+# Fallback rules, checked in order; anything unmatched is decoded as a float.
+VARIABLE_TYPE_SUFFIXES = [
+    ("_STATUS", "int"),  # Pump status / dry / overload codes
+    ("_BREAKER", "bool"),
+]
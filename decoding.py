@@ -0,0 +1,174 @@
+# decoding.py
+import datetime
+import enum
+import math
+import time
+
+import config  # Import configuration
+
+
+# --- Type Metadata ---
+
+class VarType(enum.Enum):
+    """How the raw webserver text for a variable should be decoded."""
+    FLOAT = "float"
+    INT = "int"  # Status / state codes
+    BOOL = "bool"
+    TIMESTAMP = "timestamp"
+
+
+class ErrorKind(enum.Enum):
+    """Why a variable could not be decoded into a usable value."""
+    INVALID_NAME = "Invalid variable name"
+    CONNECTION = "Connection refused."
+    TIMEOUT = "Timeout."
+    HTTP = "Request failed"
+    EMPTY = "Empty value received"
+    NAN = "Received NaN"
+    PARSE = "Could not parse value"
+    CANCELLED = "Request cancelled"
+    RATE_LIMITED = "Request budget exhausted"
+    MISSING = "Variable not served by the simulation"
+
+
+_BOOL_WORDS = {"TRUE": True, "FALSE": False}
+
+# Types inferred from the webserver's answers (set by catalog.py), for names no rule in config covers
+DISCOVERED_TYPES = {}
+
+
+def variable_type(variable_name):
+    """Looks up a variable's type, falling back to the suffix rules in config, then the discovered types."""
+    type_name = config.VARIABLE_TYPES.get(variable_name)
+    if type_name is None:
+        for suffix, suffix_type in config.VARIABLE_TYPE_SUFFIXES:
+            if variable_name.endswith(suffix):
+                type_name = suffix_type
+                break
+        else:
+            type_name = DISCOVERED_TYPES.get(variable_name, "float")
+    return VarType(type_name)
+
+
+# --- Value Record ---
+
+class Reading:
+    """
+    A decoded variable value. Exactly one of `value` / `error` is meaningful:
+    widgets check `ok` (or `error`) instead of scanning strings for "Error:".
+    `fetched_at` (epoch seconds) and `latency` (request round trip, seconds) say where the value
+    came from in time; None when unknown.
+    """
+    __slots__ = ("value", "error", "detail", "fetched_at", "latency")
+
+    def __init__(self, value=None, error=None, detail="", fetched_at=None, latency=None):
+        self.value = value
+        self.error = error
+        self.detail = detail
+        self.fetched_at = fetched_at
+        self.latency = latency
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def is_numeric(self):
+        # bool is an int subclass, but booleans never get a numeric delta/gauge
+        return self.error is None and isinstance(self.value, (int, float)) and not isinstance(self.value, bool)
+
+    @property
+    def is_bool(self):
+        return self.error is None and isinstance(self.value, bool)
+
+    @property
+    def message(self):
+        """Error text in the same form the dashboard has always shown."""
+        if self.error is None:
+            return ""
+        return f"Error: {self.detail or self.error.value}"
+
+    def age(self, now=None):
+        """Seconds since the value was fetched, or None if unknown."""
+        if self.fetched_at is None:
+            return None
+        return (time.time() if now is None else now) - self.fetched_at
+
+    def stamp(self, fetched_at, latency):
+        """Records when / how fast the value was fetched; returns the Reading for chaining."""
+        self.fetched_at, self.latency = fetched_at, latency
+        return self
+
+    def legacy(self):
+        """Returns the value in the old float / bool / "Error: ..." string form."""
+        return self.message if self.error is not None else self.value
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"Reading(error={self.error.name}, detail={self.detail!r})"
+        return f"Reading({self.value!r})"
+
+    def __str__(self):
+        return self.message if self.error is not None else str(self.value)
+
+
+def error_reading(kind, detail=""):
+    """Builds a Reading describing a failed fetch/decode."""
+    return Reading(error=kind, detail=detail)
+
+
+# --- Decoding ---
+
+def _parse_timestamp(text):
+    """Accepts numeric seconds, HH:MM[:SS] or ISO-8601 and returns seconds as a float."""
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = text.split(":")
+    if 2 <= len(parts) <= 3 and all(p.strip().isdigit() for p in parts):
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + int(part)
+        if len(parts) == 2:
+            seconds *= 60  # HH:MM
+        return seconds
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def decode(variable_name, text):
+    """Parses the raw webserver response text for a variable into a Reading."""
+    text = text.strip()
+    if not text:
+        return error_reading(ErrorKind.EMPTY)
+
+    var_type = variable_type(variable_name)
+    upper = text.upper()
+
+    if var_type is VarType.BOOL:
+        if upper in _BOOL_WORDS:
+            return Reading(_BOOL_WORDS[upper])
+        try:
+            return Reading(float(text) != 0)
+        except ValueError:
+            return error_reading(ErrorKind.PARSE, f"Expected boolean, got '{text}'")
+
+    if var_type is VarType.TIMESTAMP:
+        try:
+            return Reading(_parse_timestamp(text))
+        except ValueError:
+            return error_reading(ErrorKind.PARSE, f"Expected timestamp, got '{text}'")
+
+    try:
+        number = float(text)
+    except ValueError:
+        # Untyped variables may still come back as TRUE/FALSE or free text
+        if upper in _BOOL_WORDS:
+            return Reading(_BOOL_WORDS[upper])
+        return Reading(text)
+
+    if math.isnan(number):
+        return error_reading(ErrorKind.NAN)
+    if var_type is VarType.INT and number.is_integer():
+        return Reading(int(number))
+    return Reading(number)
@@ -0,0 +1,57 @@
+# equipment.py
+"""
+Struct-of-arrays model for groups of identical units (pumps, turbines, generators).
+
+A group reads every unit's fields once per snapshot into one NumPy array per field, so status
+classes and totals are computed for the whole group in a single vectorized pass (see plant.py)
+instead of fetching and classifying each unit separately.
+"""
+import numpy as np
+
+
+class EquipmentGroup:
+    """`count` identical units whose variables follow `pattern` (with `{i}` and `{field}`)."""
+
+    def __init__(self, label, pattern, count, fields):
+        self.label = label
+        self.pattern = pattern
+        self.count = count
+        self.fields = tuple(fields)
+
+    def variable(self, index, field):
+        return self.pattern.format(i=index, field=field)
+
+    def variables(self, fields=None):
+        """Every unit's variables for `fields` (default all), unit by unit."""
+        return [self.variable(i, field) for i in range(self.count) for field in fields or self.fields]
+
+    def read(self, fetch, fields=None):
+        """Reads the group into a GroupSnapshot. `fetch(variable_name)` must return a Reading."""
+        return GroupSnapshot(self, {field: [fetch(self.variable(i, field)) for i in range(self.count)]
+                                    for field in fields or self.fields})
+
+
+class GroupSnapshot:
+    """
+    One snapshot of a group as arrays: `values[field]` (float; bools as 0/1, NaN when unusable) and
+    `valid[field]` (whether that unit's reading decoded to a number / bool). `readings[field]`
+    keeps the Reading objects for error text.
+    """
+    __slots__ = ("group", "readings", "values", "valid")
+
+    def __init__(self, group, readings):
+        self.group = group
+        self.readings = readings
+        self.values, self.valid = {}, {}
+        for field, field_readings in readings.items():
+            valid = np.fromiter((r.is_numeric or r.is_bool for r in field_readings), dtype=bool,
+                                count=len(field_readings))
+            values = np.fromiter((float(r.value) if ok else np.nan for r, ok in zip(field_readings, valid)),
+                                 dtype=np.float64, count=len(field_readings))
+            self.values[field], self.valid[field] = values, valid
+
+    def __len__(self):
+        return self.group.count
+
+    def variable(self, index, field):
+        return self.group.variable(index, field)
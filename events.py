@@ -0,0 +1,126 @@
+# events.py
+"""
+State-transition event log for discrete variables (state codes, pump statuses, breakers, flags).
+
+Each tick is diffed against the previous values and only the changes are stored, indexed by
+variable and by (variable, state), both in time order for bisecting time ranges, so "when did X
+enter state Y" queries never scan the other transitions or raw history.
+"""
+import bisect
+import heapq
+import threading
+
+from decoding import VarType, variable_type
+
+
+def discrete_channels(variable_names):
+    """The state-like (int code / bool) variables among `variable_names`."""
+    return [name for name in dict.fromkeys(variable_names)
+            if variable_type(name) in (VarType.INT, VarType.BOOL)]
+
+
+class Event:
+    """One variable changing from `old` to `new` at `time` (wall clock) / `sim_time`."""
+    __slots__ = ("time", "sim_time", "variable", "old", "new")
+
+    def __init__(self, time, sim_time, variable, old, new):
+        self.time = time
+        self.sim_time = sim_time
+        self.variable = variable
+        self.old = old
+        self.new = new
+
+    def __lt__(self, other):
+        return self.time < other.time
+
+    def __repr__(self):
+        return f"Event({self.variable}: {self.old!r} -> {self.new!r} at {self.time:.1f})"
+
+
+class EventLog:
+    """
+    Transitions of a fixed set of variables, at most `capacity` kept per variable (and per
+    variable and state, so rarely entered states outlive the variable's other events). Thread-safe;
+    `observe()` takes at most one tick per `interval` however many callers race for it.
+    """
+
+    def __init__(self, variables, capacity):
+        self.variables = list(variables)
+        self.capacity = capacity
+        self.last_time = None
+        self._current = {}  # variable -> last seen value
+        self._events = {name: [] for name in self.variables}  # Time order
+        self._times = {name: [] for name in self.variables}  # Parallel to _events, for bisect
+        self._by_state = {}  # (variable, value) -> (events into that state, their times), time order
+        self._lock = threading.Lock()
+
+    def due(self, timestamp, interval=0.0):
+        """Whether a tick at `timestamp` would be taken (cheap check before gathering values)."""
+        return self.last_time is None or timestamp - self.last_time >= max(interval, 1e-9)
+
+    def observe(self, timestamp, values, sim_time=None, interval=0.0):
+        """
+        Diffs `values` ({variable: value}; None / missing = unknown this tick) against the last
+        known values and records the changes. The first value seen for a variable is its baseline,
+        not an event. Returns the new events, or None if another caller already took this tick.
+        """
+        with self._lock:
+            if not self.due(timestamp, interval):
+                return None
+            self.last_time = timestamp
+            new_events = []
+            for name in self.variables:
+                value = values.get(name)
+                if value is None:
+                    continue
+                old = self._current.get(name)
+                self._current[name] = value
+                if old is None or old == value:
+                    continue
+                event = Event(timestamp, sim_time, name, old, value)
+                self._append(self._events[name], self._times[name], event)
+                self._append(*self._by_state.setdefault((name, value), ([], [])), event)
+                new_events.append(event)
+            return new_events
+
+    def _append(self, events, times, event):
+        events.append(event)
+        times.append(event.time)
+        if len(events) > self.capacity * 1.5:  # Trim in batches, not per event
+            del events[:-self.capacity]
+            del times[:-self.capacity]
+
+    def current(self, variable):
+        """The last value seen for `variable`, or None."""
+        return self._current.get(variable)
+
+    def entered(self, variable, value):
+        """The latest event that put `variable` into `value`, or None if it hasn't been seen to."""
+        with self._lock:
+            entered = self._by_state.get((variable, value))
+            return entered[0][-1] if entered else None
+
+    def states(self, variable):
+        """Every value `variable` has been seen to change into."""
+        with self._lock:
+            return sorted({value for name, value in self._by_state if name == variable})
+
+    def events(self, variables=None, since=None, until=None, limit=None, state=None):
+        """
+        Events of `variables` (default all) with since <= time < until, newest first. With `state`,
+        only changes into that value (filtered before `limit`, so older matches aren't cut off).
+        """
+        with self._lock:
+            streams = []
+            for name in self.variables if variables is None else variables:
+                if state is None:
+                    events, times = self._events.get(name), self._times.get(name)
+                else:
+                    events, times = self._by_state.get((name, state), (None, None))
+                if not times:
+                    continue
+                lo = 0 if since is None else bisect.bisect_left(times, since)
+                hi = len(times) if until is None else bisect.bisect_left(times, until)
+                streams.append(reversed(events[lo:hi]))
+            merged = heapq.merge(*streams, reverse=True)
+            return list(merged if limit is None else (event for _, event in zip(range(limit), merged)))
@@ -0,0 +1,174 @@
+# fake_sim.py
+"""
+Stand-in for the game's webserver, for load tests and offline development.
+
+    python fake_sim.py [--port 8785] [--strict] [--replay RECORDING [--speed 60]]
+
+Answers `GET /?Variable=NAME` with plausible text for the variable's type (see decoding.variable_type):
+floats random-walk around a per-variable base, *_MAX / *_MIN limits stay fixed, booleans flip now and
+then and TIME_STAMP advances with the wall clock. With `strict`, names outside config.VARIABLES and
+the generator variables get a 404, like a typo against the real server. `GET /stats` returns the
+number of variable requests answered so far. With `--replay`, values come from a recording made by
+`collector.py --record` instead, played back at `--speed` x real time.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import config
+import plant
+from codec import RecordingReader
+from decoding import VarType, variable_type
+
+
+class FakeSimulation:
+    """Generates the value text for each variable; thread-safe."""
+
+    def __init__(self, seed=0):
+        self._random = random.Random(seed)
+        self._values = {}
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+    def value_text(self, variable_name):
+        var_type = variable_type(variable_name)
+        if var_type is VarType.TIMESTAMP:
+            return f"{time.time() - self._started:.0f}"
+        with self._lock:
+            if var_type is VarType.BOOL:
+                value = self._values.get(variable_name, self._random.random() < 0.5)
+                if self._random.random() < 0.02:
+                    value = not value
+                self._values[variable_name] = value
+                return "TRUE" if value else "FALSE"
+            if var_type is VarType.INT:
+                value = self._values.setdefault(variable_name, zlib.crc32(variable_name.encode()) % 4)
+                return str(value)
+            base = 1 + zlib.crc32(variable_name.encode()) % 500  # Stable per variable
+            if variable_name.endswith("_MAX"):
+                return f"{base * 2:.1f}"
+            if variable_name.endswith("_MIN"):
+                return "0"
+            value = self._values.get(variable_name, float(base))
+            value = max(0.0, value + self._random.gauss(0, base * 0.01))
+            self._values[variable_name] = value
+            return f"{value:.3f}"
+
+
+class ReplaySimulation:
+    """Plays back a recording (collector.py --record) at `speed` x real time, looping at the end."""
+
+    def __init__(self, path, speed=1.0):
+        self.reader = RecordingReader(path)
+        if not self.reader.index:
+            raise ValueError(f"{path} has no frames")
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._restart()
+
+    def _restart(self):
+        self._frames = self.reader.frames()
+        self._origin = self.reader.start_time
+        self._started = time.monotonic()
+        self._values = next(self._frames)[2]
+        self._next = next(self._frames, None)
+
+    def _advance(self):
+        target = self._origin + (time.monotonic() - self._started) * self.speed
+        while self._next is not None and self._next[0] <= target:
+            self._values = self._next[2]
+            self._next = next(self._frames, None)
+        if self._next is None:
+            self._restart()
+
+    def value_text(self, variable_name):
+        with self._lock:
+            self._advance()
+            value = self._values.get(variable_name)
+        if value is None:
+            return ""  # Not recorded / errored at that tick: the dashboard shows an empty-value error
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        return repr(value)
+
+
+class FakeSimServer(ThreadingHTTPServer):
+    """Threaded HTTP server around a FakeSimulation that counts the requests it answers."""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, strict=False, seed=0, simulation=None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.simulation = simulation or FakeSimulation(seed)
+        self.known = set(config.VARIABLES + plant.GENERATOR_VARIABLES) if strict else None
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def start(self):
+        """Serves from a daemon thread; returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count(self):
+        with self._count_lock:
+            self.requests += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlparse(self.path).path == "/stats":  # Used by loadtest.py to measure the request rate
+            self._reply(json.dumps({"requests": self.server.requests}).encode(), "application/json")
+            return
+        self.server.count()
+        variable_name = parse_qs(urlparse(self.path).query).get("Variable", [""])[0]
+        if not variable_name or (self.server.known is not None and variable_name not in self.server.known):
+            self.send_error(404, "Unknown variable")
+            return
+        self._reply(self.server.simulation.value_text(variable_name).encode(), "text/plain")
+
+    def _reply(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown everything else
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake Nucleares variables for offline testing.")
+    parser.add_argument("--port", type=int, default=8785)
+    parser.add_argument("--strict", action="store_true", help="404 for variables the dashboard doesn't know")
+    parser.add_argument("--replay", metavar="RECORDING", help="Serve a recording instead of random values")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (x real time)")
+    args = parser.parse_args()
+    simulation = ReplaySimulation(args.replay, args.speed) if args.replay else None
+    server = FakeSimServer(args.port, strict=args.strict, simulation=simulation)
+    print(f"Fake simulation webserver on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
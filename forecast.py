@@ -0,0 +1,96 @@
+# forecast.py
+"""
+Streaming limit forecasts: how long until a channel reaches its limit at the current rate.
+
+Each channel keeps a Holt (level + trend) estimate that is updated once per history sample in
+O(1), with smoothing factors derived from the time between samples so irregular sampling and
+pauses don't skew the rate. Nothing is refitted over the history window on a rerun.
+"""
+import math
+import threading
+
+MIN_SAMPLES = 3  # Samples before a trend is reported
+
+
+class Trend:
+    """Online Holt linear trend for one series with irregular timestamps."""
+    __slots__ = ("level", "rate", "last_time", "samples")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.level = None
+        self.rate = 0.0  # Units per second
+        self.last_time = None
+        self.samples = 0
+
+    def update(self, timestamp, value, level_tau, trend_tau):
+        if self.level is None:
+            self.level, self.last_time, self.samples = value, timestamp, 1
+            return
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return
+        alpha = 1 - math.exp(-dt / level_tau)
+        beta = 1 - math.exp(-dt / trend_tau)
+        predicted = self.level + self.rate * dt
+        level = alpha * value + (1 - alpha) * predicted
+        self.rate = beta * (level - self.level) / dt + (1 - beta) * self.rate
+        self.level, self.last_time = level, timestamp
+        self.samples += 1
+
+    def seconds_to(self, limit):
+        """Seconds until `limit` is reached at the current rate; inf if not heading there, None if unknown."""
+        if self.level is None or self.samples < MIN_SAMPLES or limit is None:
+            return None
+        remaining = limit - self.level
+        if remaining <= 0:
+            return 0.0
+        return remaining / self.rate if self.rate > 0 else math.inf
+
+
+class LimitForecaster:
+    """
+    Keeps a Trend per channel in sync with a HistoryStore. `consume()` processes only the samples
+    appended since the last call, so it's cheap to call every rerun from every session.
+    """
+
+    def __init__(self, channels, level_tau, trend_tau):
+        self.channels = list(channels)
+        self.level_tau = level_tau
+        self.trend_tau = trend_tau
+        self.trends = {channel: Trend() for channel in self.channels}
+        self._store = None
+        self._seen = 0
+        self._lock = threading.Lock()
+
+    def consume(self, store):
+        with self._lock:
+            if store is not self._store:  # Switched between the local and the collector's history
+                self._store, self._seen = store, 0
+                for trend in self.trends.values():
+                    trend.reset()
+            total, times, gaps, values = store.since(self._seen, self.channels)
+            if total < self._seen:  # Store was reset underneath us
+                self._seen = 0
+                for trend in self.trends.values():
+                    trend.reset()
+                total, times, gaps, values = store.since(0, self.channels)
+            self._seen = total
+            for i in range(times.size):
+                for column, channel in enumerate(self.channels):
+                    trend = self.trends[channel]
+                    value = values[i, column]
+                    if gaps[i]:
+                        trend.reset()  # Don't draw a trend across a gap
+                    if not math.isnan(value):
+                        trend.update(times[i], value, self.level_tau, self.trend_tau)
+
+    def forecast(self, channel, limit):
+        """(seconds to limit or inf / None, rate per second or None) for a channel."""
+        with self._lock:
+            trend = self.trends[channel]
+            if trend.samples < MIN_SAMPLES:
+                return None, None
+            return trend.seconds_to(limit), trend.rate
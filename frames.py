@@ -0,0 +1,137 @@
+# frames.py
+"""
+Render frame scheduling for the auto-refresh loop.
+
+Streamlit restarts a script when a new rerun request arrives mid-run, so a refresh interval shorter
+than the render time means frames are abandoned half-drawn and the UI falls behind. FrameScheduler
+times every rerun (wall and CPU), counts frames that were superseded or ticks that were coalesced,
+and picks the refresh interval actually handed to st_autorefresh: never shorter than the recent
+render time (plus headroom) and, when adaptive, long enough to keep this session's share of the
+render CPU budget (FrameBudget) under its target.
+"""
+import collections
+import threading
+import time
+
+
+class FrameScheduler:
+    """Per-session frame timing and refresh pacing. Call begin() at the top of a rerun and end() last."""
+
+    def __init__(self, smoothing=0.3, headroom=1.5, max_interval=30.0, window=10.0):
+        self.smoothing = smoothing  # EWMA weight of the newest frame
+        self.headroom = headroom  # Interval stays at least this many render times
+        self.max_interval = max_interval
+        self.window = window  # Seconds of completed frames behind the FPS figure
+        self.frames = 0
+        self.dropped = 0  # Reruns abandoned before they finished (superseded by a newer one)
+        self.coalesced = 0  # Refresh ticks that fired while a frame was still rendering
+        self.overruns = 0  # Completed frames that took longer than the interval
+        self.avg_seconds = None
+        self.avg_cpu_seconds = None
+        self.last_seconds = None
+        self.interval = None
+        self._started = None
+        self._cpu_started = None
+        self._last_tick = None
+        self._completed = collections.deque()
+
+    def begin(self):
+        if self._started is not None:
+            self.dropped += 1  # The previous rerun never reached end()
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()  # Each session's script runs on its own thread
+
+    def note_tick(self, tick):
+        """Records the auto-refresh counter; a jump of more than one means ticks were coalesced."""
+        if tick is None:
+            return
+        if self._last_tick is not None and tick > self._last_tick + 1:
+            self.coalesced += tick - self._last_tick - 1
+        self._last_tick = tick
+
+    def end(self):
+        """Closes the frame; returns its CPU seconds (0 if begin() wasn't called)."""
+        if self._started is None:
+            return 0.0
+        now = time.perf_counter()
+        seconds, cpu = now - self._started, time.thread_time() - self._cpu_started
+        self._started = None
+        self.frames += 1
+        self.last_seconds = seconds
+        if self.avg_seconds is None:
+            self.avg_seconds, self.avg_cpu_seconds = seconds, cpu
+        else:
+            self.avg_seconds += self.smoothing * (seconds - self.avg_seconds)
+            self.avg_cpu_seconds += self.smoothing * (cpu - self.avg_cpu_seconds)
+        if self.interval is not None and seconds > self.interval:
+            self.overruns += 1
+        self._completed.append(now)
+        while self._completed and now - self._completed[0] > self.window:
+            self._completed.popleft()
+        return cpu
+
+    def pace(self, requested, cpu_share=None):
+        """
+        The refresh interval (seconds) to use: `requested`, stretched to fit the recent render time
+        and, if `cpu_share` (fraction of a core) is given, this session's render CPU under it.
+        """
+        interval = requested
+        if self.avg_seconds is not None:
+            interval = max(interval, self.avg_seconds * self.headroom)
+            if cpu_share:
+                interval = max(interval, self.avg_cpu_seconds / cpu_share)
+        self.interval = min(interval, max(self.max_interval, requested))
+        return self.interval
+
+    def fps(self):
+        """Completed frames per second over the last `window` seconds."""
+        if len(self._completed) < 2:
+            return 0.0
+        span = max(time.perf_counter() - self._completed[0], self._completed[-1] - self._completed[0])
+        return (len(self._completed) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        return {
+            "fps": self.fps(), "target_fps": 1 / self.interval if self.interval else None,
+            "interval": self.interval, "avg_ms": None if self.avg_seconds is None else self.avg_seconds * 1000,
+            "frames": self.frames, "dropped": self.dropped, "coalesced": self.coalesced, "overruns": self.overruns,
+        }
+
+
+class FrameBudget:
+    """
+    Process-wide render CPU budget, split evenly between the sessions that rendered recently.
+    `target` is a fraction of one core (0.5 = half a core for all dashboard reruns together).
+    """
+
+    def __init__(self, target, window=30.0):
+        self.target = target
+        self.window = window
+        self._seen = {}  # session id -> last frame end
+        self._cpu = collections.deque()  # (time, cpu seconds) of recent frames, all sessions
+        self._lock = threading.Lock()
+
+    def note(self, session_id, cpu_seconds):
+        now = time.monotonic()
+        with self._lock:
+            self._seen[session_id] = now
+            self._cpu.append((now, cpu_seconds))
+            self._expire(now)
+
+    def _expire(self, now):
+        while self._cpu and now - self._cpu[0][0] > self.window:
+            self._cpu.popleft()
+        for session_id in [s for s, seen in self._seen.items() if now - seen > self.window]:
+            del self._seen[session_id]
+
+    def share(self):
+        """CPU fraction each active session may use."""
+        with self._lock:
+            return self.target / max(1, len(self._seen))
+
+    def usage(self):
+        """Render CPU used across all sessions over the window, as a fraction of one core."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            return sum(cpu for _, cpu in self._cpu) / self.window
@@ -0,0 +1,57 @@
+# freshness.py
+"""
+How old the values on screen are, per tab.
+
+Every rerun reports the age (now - fetch time) and request round trip of each value it displayed;
+FreshnessStats keeps a bounded window of those per tab and summarises them as percentiles, so
+polling and cache settings can be tuned against how fresh the data actually is when it is shown.
+"""
+import collections
+import threading
+
+import numpy as np
+
+
+class FreshnessStats:
+    """Process-wide per-tab samples of (age, latency) of displayed values; `max_samples` kept per tab."""
+
+    def __init__(self, max_samples, stale_after):
+        self.max_samples = max_samples
+        self.stale_after = stale_after
+        self._ages = {}
+        self._latencies = {}
+        self._reruns = collections.Counter()
+        self._values = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, tab, samples):
+        """Adds one rerun's displayed values: `samples` is a list of (age or None, latency or None)."""
+        with self._lock:
+            ages = self._ages.setdefault(tab, collections.deque(maxlen=self.max_samples))
+            latencies = self._latencies.setdefault(tab, collections.deque(maxlen=self.max_samples))
+            for age, latency in samples:
+                if age is not None:
+                    ages.append(age)
+                if latency is not None:
+                    latencies.append(latency)
+            self._reruns[tab] += 1
+            self._values[tab] += len(samples)
+
+    def summary(self):
+        """One row per tab: value age and round-trip percentiles, and the share of stale values."""
+        with self._lock:
+            tabs = [(tab, np.array(self._ages[tab]), np.array(self._latencies[tab]),
+                     self._values[tab] / self._reruns[tab]) for tab in self._ages]
+        rows = []
+        for tab, ages, latencies, per_rerun in tabs:
+            row = {"Tab": tab, "Values / Rerun": round(per_rerun, 1)}
+            if ages.size:
+                p50, p95 = np.percentile(ages, [50, 95])
+                row.update({"Age p50 (s)": round(float(p50), 2), "Age p95 (s)": round(float(p95), 2),
+                            "Age Max (s)": round(float(ages.max()), 2),
+                            "Stale %": round(100.0 * float(np.count_nonzero(ages > self.stale_after)) / ages.size, 1)})
+            if latencies.size:
+                p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+                row.update({"RTT p50 (ms)": round(float(p50), 1), "RTT p95 (ms)": round(float(p95), 1)})
+            rows.append(row)
+        return rows
@@ -0,0 +1,241 @@
+# gauges.py
+"""
+Gauge rendering for utils.display_gauge.
+
+`gauge_spec()` holds the colour-band / threshold rules; the result is drawn either as a Plotly
+Indicator ("plotly" backend) or as a small inline SVG ("svg" backend, config.GAUGE_BACKEND). The SVG
+is a few hundred bytes of markup with no Plotly instance in the browser, which matters on tabs
+with a dozen or more gauges.
+"""
+import html
+import math
+
+import plotly.graph_objects as go
+
+# Band colours
+COLOR_COLD = "cornflowerblue"
+COLOR_OPERATIVE = "mediumseagreen"
+COLOR_HOT = "indianred"
+COLOR_HIGH_PRESSURE = "indianred"
+COLOR_NORMAL_PRESSURE = "mediumseagreen"
+COLOR_GOOD = "mediumseagreen"
+COLOR_BAD = "indianred"
+COLOR_WARNING = "gold"
+COLOR_OFF = "lightsteelblue"
+COLOR_NEUTRAL = "lightgrey"
+
+
+class GaugeSpec:
+    """Everything needed to draw one gauge, independent of the backend."""
+    __slots__ = ("title", "value", "valid", "range", "steps", "threshold", "unit")
+
+    def __init__(self, title, value, valid, gauge_range, steps, threshold, unit):
+        self.title = title
+        self.value = value  # None when the data is invalid
+        self.valid = valid
+        self.range = gauge_range
+        self.steps = steps  # [{'range': [lo, hi], 'color': ...}, ...]
+        self.threshold = threshold
+        self.unit = unit
+
+
+def gauge_spec(title, value, range_min, range_max, op_min=None, op_max=None, unit=""):
+    """
+    Works out the gauge's bands and threshold line. Numbers are None when unavailable.
+    Shows a neutral state if essential data (value, min, max) is invalid/unavailable.
+    Band rules depend on the title: Frequency, Temperature, Pressure, or the default
+    (Integrity / Wear / Level style).
+    """
+    value_valid = value is not None
+    range_min_valid = range_min is not None
+    range_max_valid = range_max is not None
+    op_min_valid = op_min is not None
+    op_max_valid = op_max is not None
+
+    is_range_sensible = not (range_min_valid and range_max_valid) or (range_max > range_min)
+    is_data_valid = value_valid and range_min_valid and range_max_valid and is_range_sensible
+    gauge_range = [range_min, range_max] if is_data_valid else [0, 1]
+    gauge_title = f"{title} ({unit})" if unit and is_data_valid else title  # Add unit only if valid
+    steps = []
+    threshold_val = gauge_range[1]  # Default threshold
+
+    if is_data_valid:
+        # --- Determine Gauge Steps and Threshold based on Title/Data ---
+        op_range_valid = not (op_min_valid and op_max_valid) or (op_max > op_min)
+
+        if "Frequency" in title:
+            # Specific logic for Frequency gauge colors
+            freq_target_min = op_min if op_min_valid else 49.5
+            freq_target_max = op_max if op_max_valid else 50.5
+            freq_warn_low = freq_target_min - 1.5
+            freq_warn_high = freq_target_max + 1.5
+            freq_off_threshold = 0.5
+            threshold_val = freq_target_min  # Red line at start of good zone
+            if abs(value) < freq_off_threshold:
+                steps = [{'range': gauge_range, 'color': COLOR_OFF}]
+                gauge_title = f"{title} (Off)"
+            else:
+                steps = [
+                    {'range': [gauge_range[0], freq_warn_low], 'color': COLOR_BAD},
+                    {'range': [freq_warn_low, freq_target_min], 'color': COLOR_WARNING},
+                    {'range': [freq_target_min, freq_target_max], 'color': COLOR_GOOD},
+                    {'range': [freq_target_max, freq_warn_high], 'color': COLOR_WARNING},
+                    {'range': [freq_warn_high, gauge_range[1]], 'color': COLOR_BAD}]
+                # Filter out steps where start >= end (can happen with extreme ranges)
+                steps = [s for s in steps if s['range'][0] < s['range'][1]]
+
+        elif "Temperature" in title:
+            # Logic for Temperature (Cold/Operative/Hot)
+            if op_min_valid and op_max_valid and op_range_valid and op_max <= range_max and op_min >= range_min:
+                steps = [
+                    {'range': [range_min, op_min], 'color': COLOR_COLD},
+                    {'range': [op_min, op_max], 'color': COLOR_OPERATIVE},
+                    {'range': [op_max, range_max], 'color': COLOR_HOT}
+                ]
+                threshold_val = op_max  # Red line at start of hot zone
+            elif op_max_valid and op_max >= range_min and op_max <= range_max:  # Only upper threshold provided
+                steps = [
+                    {'range': [range_min, op_max], 'color': COLOR_OPERATIVE},  # Assume below op_max is operative
+                    {'range': [op_max, range_max], 'color': COLOR_HOT}
+                ]
+                threshold_val = op_max
+            else:  # No valid operative range defined
+                steps = [{'range': gauge_range, 'color': COLOR_NEUTRAL}]
+                threshold_val = range_max  # No meaningful threshold
+
+        elif "Pressure" in title:
+            # Logic for Pressure (Normal/High)
+            if op_max_valid and op_max >= range_min and op_max <= range_max:
+                steps = [
+                    {'range': [range_min, op_max], 'color': COLOR_NORMAL_PRESSURE},
+                    {'range': [op_max, range_max], 'color': COLOR_HIGH_PRESSURE}
+                ]
+                threshold_val = op_max  # Red line at start of high pressure
+            else:  # No valid operative range defined
+                steps = [{'range': gauge_range, 'color': COLOR_NEUTRAL}]
+                threshold_val = range_max
+
+        else:  # Default logic for other gauges (e.g., Integrity, Wear, Level)
+            if op_min_valid and op_max_valid and op_range_valid and op_max <= range_max and op_min >= range_min:
+                # Three zones defined (e.g., Bad/Good/Bad)
+                steps = [
+                    {'range': [range_min, op_min], 'color': COLOR_BAD},
+                    {'range': [op_min, op_max], 'color': COLOR_GOOD},
+                    {'range': [op_max, range_max], 'color': COLOR_BAD}
+                ]
+                threshold_val = op_min  # Red line typically at start of first 'bad' or end of 'good'
+            elif op_max_valid and op_max >= range_min and op_max <= range_max:
+                # Two zones defined by a single threshold (op_max)
+                threshold_val = op_max
+                # Determine if higher is better (Integrity) or worse (Wear, Level Low Fuel)
+                if "Integrity" in title:  # Higher is better
+                    steps = [
+                        {'range': [range_min, threshold_val], 'color': COLOR_BAD},
+                        {'range': [threshold_val, range_max], 'color': COLOR_GOOD}
+                    ]
+                else:  # Higher is worse (Wear) or below threshold is bad (Level)
+                    steps = [
+                        {'range': [range_min, threshold_val], 'color': COLOR_GOOD},
+                        {'range': [threshold_val, range_max], 'color': COLOR_BAD}
+                    ]
+            else:  # No valid operative range defined
+                steps = [{'range': gauge_range, 'color': COLOR_NEUTRAL}]
+                threshold_val = range_min + (range_max - range_min) / 2  # Default threshold halfway
+
+    else:  # Data is invalid
+        gauge_title = f"{title} (N/A)"
+        steps = [{'range': gauge_range, 'color': COLOR_NEUTRAL}]
+        threshold_val = gauge_range[1]  # Default threshold to max
+
+    return GaugeSpec(gauge_title, value if is_data_valid else None, is_data_valid, gauge_range, steps,
+                     threshold_val, unit)
+
+
+# --- Plotly Backend ---
+
+def plotly_figure(spec):
+    """The gauge as a Plotly Indicator figure."""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=spec.value,  # Will be None if data is invalid, hiding the needle
+        number={
+            'font': {'size': 28},
+            'valueformat': '.1f',  # Apply formatting, will be overridden by text below if N/A
+            'suffix': spec.unit if spec.valid and spec.unit else ""  # Show unit only if valid
+        },
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': spec.title, 'font': {'size': 16}},
+        gauge={
+            'axis': {'range': list(spec.range), 'tickwidth': 1, 'tickcolor': "darkblue"},
+            'bar': {'color': "rgba(0,0,0,0)"},  # Invisible bar to allow steps to show
+            'bgcolor': "white",
+            'borderwidth': 1,
+            'bordercolor': "gray",
+            'steps': spec.steps,
+            'threshold': {
+                'line': {'color': "red" if spec.valid else "grey", 'width': 3},
+                'thickness': 0.9,
+                'value': spec.threshold
+            }
+        }
+    ))
+
+    # If data is invalid, add "N/A" text annotation instead of trying to display a number
+    if not spec.valid:
+        fig.add_annotation(x=0.5, y=0.3, text="N/A", showarrow=False, font=dict(size=28, color="grey"),
+                           align="center")
+        fig.update_traces(number={'valueformat': ''})  # Clear format to hide automatic number
+
+    fig.update_layout(
+        height=190,  # Fixed height
+        margin=dict(l=20, r=20, t=50, b=10),
+        paper_bgcolor='rgba(0,0,0,0)',  # Transparent background
+        font={'color': "grey", 'family': "Arial"}
+    )
+    return fig
+
+
+# --- SVG Backend ---
+# Semicircular dial in a 200 x 125 box: centre (100, 105), band radius 80
+_CX, _CY, _R, _BAND = 100, 105, 80, 22
+
+
+def _point(fraction, radius):
+    angle = math.pi * (1 - min(max(fraction, 0.0), 1.0))  # 0 -> left end, 1 -> right end
+    return _CX + radius * math.cos(angle), _CY - radius * math.sin(angle)
+
+
+def _format_tick(value):
+    return f"{value:.0f}" if abs(value) >= 10 or float(value).is_integer() else f"{value:.1f}"
+
+
+def svg(spec):
+    """The gauge as a compact inline SVG string with the same bands, threshold line and value."""
+    lo, hi = spec.range
+    span = (hi - lo) or 1
+
+    def fraction(v):
+        return (v - lo) / span
+
+    parts = []
+    for step in spec.steps:
+        (x1, y1), (x2, y2) = _point(fraction(step['range'][0]), _R), _point(fraction(step['range'][1]), _R)
+        parts.append(f'<path d="M{x1:.1f},{y1:.1f} A{_R},{_R} 0 0 1 {x2:.1f},{y2:.1f}" fill="none" '
+                     f'stroke="{step["color"]}" stroke-width="{_BAND}"/>')
+    (x1, y1), (x2, y2) = _point(0, _R), _point(1, _R)
+    parts.append(f'<path d="M{x1 - _BAND / 2:.1f},{y1:.1f} A{_R + _BAND / 2},{_R + _BAND / 2} 0 0 1 '
+                 f'{x2 + _BAND / 2:.1f},{y2:.1f}" fill="none" stroke="gray" stroke-width="1"/>')
+    (tx1, ty1), (tx2, ty2) = _point(fraction(spec.threshold), _R - _BAND * 0.45), \
+        _point(fraction(spec.threshold), _R + _BAND * 0.45)
+    parts.append(f'<line x1="{tx1:.1f}" y1="{ty1:.1f}" x2="{tx2:.1f}" y2="{ty2:.1f}" '
+                 f'stroke="{"red" if spec.valid else "grey"}" stroke-width="3"/>')
+    parts.append(f'<text x="{_CX - _R}" y="{_CY + 14}" text-anchor="middle" font-size="10">{_format_tick(lo)}</text>')
+    parts.append(f'<text x="{_CX + _R}" y="{_CY + 14}" text-anchor="middle" font-size="10">{_format_tick(hi)}</text>')
+    number = f"{spec.value:.1f}{html.escape(spec.unit)}" if spec.valid else "N/A"
+    parts.append(f'<text x="{_CX}" y="{_CY - 4}" text-anchor="middle" font-size="26">{number}</text>')
+    return (
+        '<div style="text-align:center;height:190px;font-family:Arial;color:grey">'
+        f'<div style="font-size:16px;margin-top:8px">{html.escape(spec.title)}</div>'
+        '<svg viewBox="0 0 200 125" style="width:100%;max-width:320px;height:150px" fill="grey" '
+        f'xmlns="http://www.w3.org/2000/svg">{"".join(parts)}</svg></div>'
+    )
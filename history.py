@@ -0,0 +1,440 @@
+# history.py
+import collections
+import datetime
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def to_datetimes(epoch_seconds):
+    """Converts an array of epoch seconds into naive local-time timestamps for chart axes."""
+    local_tz = datetime.datetime.now().astimezone().tzinfo
+    return pd.to_datetime(epoch_seconds, unit="s", utc=True).tz_convert(local_tz).tz_localize(None)
+
+
+AGGREGATES = ("mean", "min", "max", "sum", "count", "first", "last")
+
+
+class QueryResult:
+    """Result of `HistoryStore.query`: bucket (or sample) times and one value column per channel."""
+    __slots__ = ("channels", "times", "values", "axis")
+
+    def __init__(self, channels, times, values, axis):
+        self.channels = channels
+        self.times = times
+        self.values = values
+        self.axis = axis
+
+    def __len__(self):
+        return len(self.times)
+
+
+def _aggregate(x, values, bucket, agg):
+    """
+    Groups samples into fixed `bucket`-wide bins aligned to multiples of `bucket` and reduces each
+    bin with `agg`. Returns (bucket_ids, results); empty bins are omitted.
+    """
+    if x.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, values.shape[1]))
+    ids = np.floor(x / bucket).astype(np.int64)
+    if ids.size > 1 and np.any(ids[1:] < ids[:-1]):
+        order = np.argsort(ids, kind="stable")  # Sim time can jump back after a reload
+        ids, values = ids[order], values[order]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+    ends = np.append(starts[1:], ids.size) - 1
+    present = ~np.isnan(values)
+    if agg in ("mean", "sum", "count"):
+        counts = np.add.reduceat(present, starts, axis=0)
+        if agg == "count":
+            return ids[starts], counts.astype(float)
+        sums = np.add.reduceat(np.where(present, values, 0.0), starts, axis=0)
+        if agg == "sum":
+            return ids[starts], np.where(counts > 0, sums, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return ids[starts], sums / counts
+    if agg == "min":
+        return ids[starts], np.fmin.reduceat(values, starts, axis=0)
+    if agg == "max":
+        return ids[starts], np.fmax.reduceat(values, starts, axis=0)
+    if agg in ("first", "last"):
+        return ids[starts], values[starts if agg == "first" else ends]
+    raise ValueError(f"Unknown aggregate '{agg}', expected one of {AGGREGATES}")
+
+
+def storage_layout(n_channels, capacity):
+    """(name, dtype, shape) of every array backing a HistoryStore, in buffer order."""
+    return [
+        ("count", np.uint64, (1,)),
+        ("times", np.float64, (2 * capacity,)),
+        ("sim_times", np.float64, (2 * capacity,)),
+        ("values", np.float64, (2 * capacity, n_channels)),
+        ("gaps", np.bool_, (2 * capacity,)),
+    ]
+
+
+def allocate_storage(n_channels, capacity, buffer=None, offset=0):
+    """
+    Creates the arrays backing a HistoryStore, either fresh or laid out over `buffer`
+    (e.g. a shared memory block) starting at `offset`. Returns (arrays, end_offset).
+    Arrays laid over an existing buffer are not initialised; call `reset_storage` when creating it.
+    """
+    arrays = {}
+    for name, dtype, shape in storage_layout(n_channels, capacity):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if buffer is None:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        offset += size
+    if buffer is None:
+        reset_storage(arrays)
+    return arrays, offset
+
+
+def reset_storage(arrays):
+    arrays["count"][0] = 0
+    for name in ("times", "sim_times", "values"):
+        arrays[name].fill(np.nan)
+    arrays["gaps"].fill(False)
+
+
+def _with_breaks(x, y, breaks):
+    """Inserts a NaN point before every flagged sample so line charts don't join across gaps."""
+    positions = np.nonzero(breaks)[0]
+    if positions.size == 0:
+        return x, y
+    return np.insert(x, positions, x[positions]), np.insert(y, positions, np.nan)
+
+
+def decimate(x, y, max_points):
+    """
+    Min/max decimation for line charts: splits the series into equal index buckets and keeps each
+    bucket's lowest and highest point (in time order), so spikes survive at any zoom level.
+    The first NaN in a bucket is kept too, so gaps still break the line. Returns (x, y).
+    """
+    n = y.size
+    if max_points is None or n <= max_points:
+        return x, y
+    n_buckets = max(max_points // 3, 1)  # Up to three points per bucket: min, max and a break
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    pad = n_buckets * size - n
+    missing = np.concatenate([np.isnan(y), np.zeros(pad, dtype=bool)]).reshape(n_buckets, size)
+    padded = np.concatenate([y, np.full(pad, np.nan)]).reshape(n_buckets, size)
+    present = ~np.isnan(padded)
+    base = np.arange(n_buckets) * size
+    lows = base + np.argmin(np.where(present, padded, np.inf), axis=1)
+    highs = base + np.argmax(np.where(present, padded, -np.inf), axis=1)
+    breaks = base + np.argmax(missing, axis=1)
+    has_value, has_break = present.any(axis=1), missing.any(axis=1)
+    keep = np.unique(np.concatenate([lows[has_value], highs[has_value], breaks[has_break]]))
+    return x[keep], y[keep]
+
+
+class HistoryStore:
+    """
+    Fixed-size ring buffer of sampled channels, shared by every browser session in the process.
+
+    Each sample carries both wall time and simulation time. A sample whose simulation time equals
+    the previous one (the game is paused) is not stored, and a sample that follows missing data is
+    flagged as a gap so charts break the line instead of interpolating across it.
+
+    Each sample is written twice (at `pos` and `pos + capacity`) so the retained window is always
+    one contiguous slice; `window()` can then hand out read-only NumPy views without copying.
+    Views are only guaranteed stable until the next append, so hold them for a single rerun.
+
+    `storage` (see `allocate_storage`) lets the buffers live in shared memory, so a collector
+    process can append while the dashboard reads. The sample count is published last, after
+    the sample's data, so a reader never sees a half-written newest sample. A reader of a store
+    some other process appends to (`external_writer=True`) gets copies instead of views: it
+    leaves out the oldest slot, which the writer's next sample overwrites, and copies again if
+    the count moved while it was copying.
+    """
+
+    def __init__(self, channels, capacity, gap_seconds=None, query_cache_size=32, storage=None,
+                 external_writer=False):
+        self.channels = list(channels)
+        self.capacity = int(capacity)
+        self.external_writer = external_writer
+        self.gap_seconds = gap_seconds  # Wall-time silence after which the next sample starts a new segment
+        self._column = {name: i for i, name in enumerate(self.channels)}
+        if storage is None:
+            storage, _ = allocate_storage(len(self.channels), self.capacity)
+        self._counter = storage["count"]  # Total samples ever appended
+        self._times = storage["times"]
+        self._sim_times = storage["sim_times"]
+        self._gaps = storage["gaps"]
+        self._values = storage["values"]
+        self._last_seen = None  # Wall time the sim was last confirmed alive (stored or paused sample)
+        self.duplicates_skipped = 0
+        self._query_cache = collections.OrderedDict()  # (channels, bucket, agg, axis) -> (count, ids, results)
+        self._query_cache_size = query_cache_size
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+
+    @property
+    def _count(self):
+        return int(self._counter[0])
+
+    @_count.setter
+    def _count(self, value):
+        self._counter[0] = value
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def last_time(self):
+        """Wall time of the newest sample, or None when empty."""
+        with self._lock:
+            count = self._count
+            if count == 0:
+                return None
+            return float(self._times[(count - 1) % self.capacity])
+
+    @property
+    def last_sim_time(self):
+        """Simulation time of the newest sample, or None when empty / unknown."""
+        with self._lock:
+            count = self._count
+            if count == 0:
+                return None
+            sim_time = self._sim_times[(count - 1) % self.capacity]
+        return None if np.isnan(sim_time) else float(sim_time)
+
+    # --- Writing ---
+
+    def append(self, timestamp, values, sim_time=None):
+        """
+        Appends one sample. `values` maps channel name -> number; missing channels are stored as NaN.
+        Returns False (storing nothing) when `sim_time` shows the simulation hasn't advanced.
+        """
+        row = np.full(len(self.channels), np.nan)
+        for name, value in values.items():
+            column = self._column.get(name)
+            if column is not None and value is not None:
+                row[column] = value
+        sim_time = np.nan if sim_time is None else float(sim_time)
+        with self._lock:
+            count = self._count
+            last = (count - 1) % self.capacity
+            has_last = count > 0
+            if has_last and sim_time == self._sim_times[last]:
+                # Paused: nothing new to store, but the sim is still alive so no gap either
+                self._last_seen = timestamp
+                self.duplicates_skipped += 1
+                return False
+            gap = False
+            if has_last:
+                silent_for = timestamp - max(self._times[last], self._last_seen or 0.0)
+                gap = self.gap_seconds is not None and silent_for > self.gap_seconds
+                gap = gap or sim_time < self._sim_times[last]  # Sim restarted / save reloaded
+            pos = count % self.capacity
+            self._times[pos] = self._times[pos + self.capacity] = timestamp
+            self._sim_times[pos] = self._sim_times[pos + self.capacity] = sim_time
+            self._gaps[pos] = self._gaps[pos + self.capacity] = gap
+            self._values[pos] = self._values[pos + self.capacity] = row
+            self._count = count + 1  # Publish only once the sample is fully written
+            self._last_seen = timestamp
+        return True
+
+    def append_if_due(self, sample_fn, min_interval, timestamp=None):
+        """
+        Appends a sample only if the newest one is at least `min_interval` seconds old.
+        Every session calls this each rerun; only the first one per interval pays for `sample_fn()`,
+        which returns `(sim_time, values)`. Returns True if a sample was stored.
+        """
+        if not self._sample_lock.acquire(blocking=False):
+            return False  # Another session is already taking this sample
+        try:
+            timestamp = time.time() if timestamp is None else timestamp
+            with self._lock:
+                last_poll = self._last_seen
+            if last_poll is not None and timestamp - last_poll < min_interval:
+                return False
+            sim_time, values = sample_fn()
+            return self.append(timestamp, values, sim_time=sim_time)
+        finally:
+            self._sample_lock.release()
+
+    # --- Reading ---
+
+    def window(self, channels=None):
+        """
+        Returns read-only views `(times, values)` over the retained history, oldest first.
+        `values` has one column per requested channel (all channels by default).
+        """
+        times, _, _, values = self.window_full(channels)
+        return times, values
+
+    def window_full(self, channels=None):
+        """Like `window()`, but returns `(times, sim_times, gaps, values)`."""
+        return self._window(channels)[1:]
+
+    def _retained(self, count, wanted):
+        """(start, n) of the newest `wanted` samples still safe to read when `count` have been appended."""
+        n = min(wanted, self.capacity)
+        if self.external_writer and n == self.capacity:
+            n -= 1  # The oldest slot is where the other process's next sample is being written
+        return (count - n) % self.capacity, n
+
+    def _window(self, channels=None):
+        """`(count, times, sim_times, gaps, values)`: the retained window as of sample `count`."""
+        while True:
+            with self._lock:
+                count = self._count
+                start, n = self._retained(count, count)
+                times = self._times[start:start + n]
+                sim_times = self._sim_times[start:start + n]
+                gaps = self._gaps[start:start + n]
+                if channels is None:
+                    values = self._values[start:start + n]
+                else:
+                    columns = [self._column[name] for name in channels]
+                    # A single column is still a view; several columns need fancy indexing (a copy)
+                    if len(columns) == 1:
+                        values = self._values[start:start + n, columns[0]:columns[0] + 1]
+                    else:
+                        values = self._values[start:start + n][:, columns]
+                if self.external_writer:
+                    arrays = tuple(np.array(array) for array in (times, sim_times, gaps, values))
+                else:
+                    arrays = tuple(array.view() for array in (times, sim_times, gaps, values))
+            if not self.external_writer or self._count == count:
+                break  # Otherwise a sample landed while copying and may have overwritten the oldest rows
+        for array in arrays:
+            array.flags.writeable = False
+        return (count, *arrays)
+
+    def since(self, count, channels=None):
+        """
+        Copies of the samples appended after the first `count` (as many as are still retained), for
+        consumers that process each sample once. Returns `(total, times, gaps, values)`; pass `total`
+        as `count` next time. A `total` below `count` means the store was reset.
+        """
+        columns = slice(None) if channels is None else [self._column[name] for name in channels]
+        while True:
+            with self._lock:
+                total = self._count
+                start, n = self._retained(total, total - count) if total > count else (0, 0)
+                result = (total, self._times[start:start + n].copy(), self._gaps[start:start + n].copy(),
+                          self._values[start:start + n][:, columns].copy())
+            if not self.external_writer or self._count == total:
+                return result
+
+    def line(self, channel, axis="wall", max_points=None):
+        """
+        Plot-ready arrays (x, y) for one channel: x is epoch seconds (axis="wall") or sim seconds,
+        gaps are NaN points so lines break there, and `max_points` caps the size (see `decimate`).
+        """
+        times, sim_times, gaps, values = self.window_full([channel])
+        column = values[:, 0]
+        if axis == "sim":
+            x = sim_times
+            breaks = gaps  # Pauses are continuous in sim time; only real gaps break the line
+        else:
+            x = times
+            # On the wall clock a pause is also a stretch with no samples
+            breaks = gaps.copy()
+            if self.gap_seconds is not None and times.size > 1:
+                breaks[1:] |= np.diff(times) > self.gap_seconds
+        # Missing readings also split the line; carry every break onto the next kept sample
+        segment = np.cumsum(breaks | np.isnan(column))
+        valid = ~np.isnan(column) & ~np.isnan(x)
+        kept_segment = segment[valid]
+        kept_breaks = np.zeros(kept_segment.size, dtype=bool)
+        kept_breaks[1:] = np.diff(kept_segment) > 0
+        x, y = _with_breaks(x[valid], column[valid], kept_breaks)
+        return decimate(x, y, max_points)
+
+    # --- Queries ---
+
+    def query(self, channels, start=None, end=None, bucket=None, agg="mean", axis="wall"):
+        """
+        Returns a QueryResult for `channels` between `start` and `end` (inclusive, on the chosen
+        time axis; None means open-ended). With `bucket` (seconds) the samples are aggregated into
+        aligned bins using `agg` (one of AGGREGATES; NaNs are skipped except by "first"/"last").
+        Bucket times are the bin start.
+
+        Bucketed results over the whole retained window are cached per (channels, bucket, agg, axis).
+        When new samples arrive only the bins they touch (plus the oldest bin, if samples were
+        evicted) are recomputed; the range is then sliced out with a binary search.
+        """
+        channels = tuple(channels)
+        count, times, sim_times, _, values = self._window(channels)  # Cache key matches the data read
+        x = sim_times if axis == "sim" else times
+
+        if bucket is None:
+            if axis == "sim":
+                mask = self._sim_mask(x, start, end)
+                return QueryResult(channels, x[mask], values[mask], axis)
+            lo, hi = self._range(x, start, end)
+            return QueryResult(channels, x[lo:hi], values[lo:hi], axis)
+
+        ids, results = self._bucketed(channels, x, values, count, bucket, agg, axis)
+        bucket_times = ids * float(bucket)
+        if axis == "sim":
+            # A bin overlaps the range if it ends after `start` and begins before `end`
+            mask = np.ones(ids.size, dtype=bool)
+            if start is not None:
+                mask &= bucket_times + bucket > start
+            if end is not None:
+                mask &= bucket_times <= end
+            return QueryResult(channels, bucket_times[mask], results[mask], axis)
+        lo = 0 if start is None else np.searchsorted(bucket_times + bucket, start, side="right")
+        hi = ids.size if end is None else np.searchsorted(bucket_times, end, side="right")
+        return QueryResult(channels, bucket_times[lo:hi], results[lo:hi], axis)
+
+    @staticmethod
+    def _range(x, start, end):
+        """Binary-searches the sorted wall-time index for [start, end]."""
+        lo = 0 if start is None else np.searchsorted(x, start, side="left")
+        hi = x.size if end is None else np.searchsorted(x, end, side="right")
+        return lo, hi
+
+    @staticmethod
+    def _sim_mask(x, start, end):
+        mask = ~np.isnan(x)
+        if start is not None:
+            mask &= x >= start
+        if end is not None:
+            mask &= x <= end
+        return mask
+
+    def _bucketed(self, channels, x, values, count, bucket, agg, axis):
+        """Whole-window bucket aggregation, reusing and incrementally extending the cached result."""
+        valid = ~np.isnan(x)
+        key = (channels, bucket, agg, axis)
+        with self._lock:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+        if cached is not None and cached[0] == count:
+            return cached[1], cached[2]
+
+        new_samples = count - cached[0] if cached is not None else None
+        if axis == "wall" and cached is not None and 0 < new_samples < x.size and valid.all():
+            # Wall time is monotonic: only the oldest bin (may have lost samples to eviction)
+            # and the bins touched by new samples need recomputing.
+            cached_ids, cached_results = cached[1], cached[2]
+            ids_all = np.floor(x / bucket).astype(np.int64)
+            head_id, first_new_id = ids_all[0], ids_all[-new_samples]
+            keep = (cached_ids > head_id) & (cached_ids < first_new_id)
+            tail_from = np.searchsorted(ids_all, first_new_id, side="left")
+            head_ids, head_results = _aggregate(x[ids_all == head_id], values[ids_all == head_id], bucket, agg)
+            if head_id >= first_new_id:
+                head_ids, head_results = head_ids[:0], head_results[:0]
+            tail_ids, tail_results = _aggregate(x[tail_from:], values[tail_from:], bucket, agg)
+            ids = np.concatenate((head_ids, cached_ids[keep], tail_ids))
+            results = np.concatenate((head_results, cached_results[keep], tail_results))
+        else:
+            ids, results = _aggregate(x[valid], values[valid], bucket, agg)
+
+        with self._lock:
+            self._query_cache[key] = (count, ids, results)
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self._query_cache_size:
+                self._query_cache.popitem(last=False)
+        return ids, results
@@ -0,0 +1,118 @@
+# kiosk.py
+"""
+Compact wall-display view: `streamlit run kiosk.py`, or the dashboard URL with `?kiosk=1`.
+
+Control-room screens only need the Overview headline numbers. The kiosk has no sidebar, menu or
+tab modules: a fixed grid of tiles is drawn as one HTML element inside a fragment that reruns on its
+own timer, so a refresh re-executes this file's few lines and sends one small element instead of
+rerunning and re-sending the whole app. Values come from the collector's shared snapshot when it is
+running (fetched within the request budget otherwise), and the tile markup is only rebuilt when a
+displayed value changes.
+"""
+import html
+
+import streamlit as st
+
+import config  # Import configuration
+import plant
+import utils  # Import helpers from utils.py
+
+# (label, variable, unit, decimals, variable whose value the reading must stay below)
+TILES = [
+    ("Core Temp", "CORE_TEMP", "°C", 1, "CORE_TEMP_MAX"),
+    ("Core Pressure", "CORE_PRESSURE", "bar", 2, "CORE_PRESSURE_MAX"),
+    ("Core State", "CORE_STATE", "", 0, None),
+    ("Criticality", "CORE_STATE_CRITICALITY", "", 2, None),
+    ("Coolant Flow", "COOLANT_CORE_FLOW_SPEED", "", 1, None),
+    ("Loop Level", "COOLANT_CORE_PRIMARY_LOOP_LEVEL", "", 1, None),
+    ("Core Integrity", "CORE_INTEGRITY", "%", 1, None),
+    ("Core Wear", "CORE_WEAR", "%", 1, None),
+]
+
+# Variables the kiosk displays (fetched in one batch when there is no collector)
+VARIABLES = list(dict.fromkeys(
+    [variable for _, variable, _, _, _ in TILES] + [limit for *_, limit in TILES if limit]
+    + plant.GENERATOR_VARIABLES
+))
+
+_STYLE = """
+    <style>
+        header[data-testid="stHeader"], section[data-testid="stSidebar"],
+        div[data-testid="stSidebarCollapsedControl"] { display: none; }
+        .block-container { padding: 1rem 2rem; }
+        .kiosk-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(16rem, 1fr)); gap: 1rem; }
+        .kiosk-tile { border: 1px solid #CCCCCC; border-radius: 0.75rem; padding: 0.75rem 1rem; }
+        .kiosk-label { font-size: 1.2rem; color: #55596A; }
+        .kiosk-value { font-size: 3rem; font-weight: bold; line-height: 1.2; }
+        .kiosk-unit { font-size: 1.5rem; font-weight: normal; margin-left: 0.3rem; }
+        .kiosk-alarm { border-color: #FF4B4B; background-color: rgba(255, 75, 75, 0.15); }
+        .kiosk-stale { opacity: 0.45; }
+    </style>
+"""
+
+
+# --- Tile Values ---
+
+def _value_text(reading, decimals):
+    if not reading.ok:
+        return "N/A"
+    if reading.is_bool:
+        return "TRUE" if reading.value else "FALSE"
+    if isinstance(reading.value, float):
+        return f"{reading.value:.{decimals}f}"
+    return str(reading.value)
+
+
+def _state(readings, *variables):
+    """The tile state from its inputs: "stale" if any is older than STALE_AFTER_SECONDS or failed."""
+    for variable in variables:
+        age = readings[variable].age()
+        if not readings[variable].ok or (age is not None and age > config.STALE_AFTER_SECONDS):
+            return "stale"
+    return ""
+
+
+def tile_values(readings):
+    """[(label, text, unit, state)] for the tiles; state is "", "alarm" or "stale"."""
+    total_kw, active_generators = plant.total_generator_output(readings.__getitem__)
+    tiles = [("Total Output", f"{total_kw:.0f}", f"kW · {active_generators} gen",
+              _state(readings, *plant.GENERATOR_VARIABLES))]
+    for label, variable, unit, decimals, limit in TILES:
+        reading, state = readings[variable], _state(readings, variable)
+        if limit and reading.is_numeric and readings[limit].is_numeric and reading.value >= readings[limit].value:
+            state = "alarm"
+        tiles.append((label, _value_text(reading, decimals), unit, state))
+    return tiles
+
+
+def tiles_html(tiles):
+    cells = "".join(
+        f'<div class="kiosk-tile kiosk-{state}"><div class="kiosk-label">{html.escape(label)}</div>'
+        f'<div class="kiosk-value">{html.escape(text)}<span class="kiosk-unit">{html.escape(unit)}</span></div></div>'
+        for label, text, unit, state in tiles
+    )
+    return f'<div class="kiosk-grid">{cells}</div>'
+
+
+# --- Rendering ---
+
+@st.fragment(run_every=config.KIOSK_REFRESH_SECONDS)
+def _tiles():
+    """Only this reruns on the timer; the markup is reused while no displayed value has changed."""
+    utils.fetch_snapshot(VARIABLES)
+    tiles = tile_values(utils.read_snapshot(VARIABLES))
+    if st.session_state.get("_kiosk_tiles") != tiles:
+        st.session_state["_kiosk_tiles"] = tiles
+        st.session_state["_kiosk_html"] = tiles_html(tiles)
+    st.markdown(st.session_state["_kiosk_html"], unsafe_allow_html=True)
+
+
+def render():
+    """Draws the kiosk page: one style block and the tile fragment."""
+    st.set_page_config(page_title=config.KIOSK_TITLE, layout="wide", initial_sidebar_state="collapsed")
+    st.markdown(_STYLE, unsafe_allow_html=True)
+    _tiles()
+
+
+if __name__ == "__main__":
+    render()
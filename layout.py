@@ -0,0 +1,320 @@
+# layout.py
+"""
+Declarative tab layouts.
+
+A tab describes what it shows as a tree of dataclasses (Panel, Columns, Gauge, Metric, ...).
+compile_layout() walks that tree once, at import time, and returns a RenderPlan that knows the
+exact set of variables the tab reads. main.py fetches that set in one batch, and the plan then
+renders from a read-only snapshot: nothing inside the render pass fetches.
+"""
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+import config  # Import configuration
+import utils  # Import helpers from utils.py
+
+
+# --- Value Sources ---
+
+@dataclass
+class Scaled:
+    """A variable times a constant, e.g. a red zone starting at 80% of a max temperature."""
+    variable: str
+    factor: float
+    positive_only: bool = False  # Treat a zero / negative base as "no threshold"
+
+    def resolve(self, readings):
+        reading = readings[self.variable]
+        if not reading.is_numeric or (self.positive_only and reading.value <= 0):
+            return None
+        return self.factor * reading.value
+
+
+def _source_variables(source):
+    """Variables a gauge input (variable name, Scaled, number or None) depends on."""
+    if isinstance(source, str):
+        return [source]
+    if isinstance(source, Scaled):
+        return [source.variable]
+    return []
+
+
+def _resolve(source, readings):
+    return source.resolve(readings) if isinstance(source, Scaled) else source
+
+
+# --- Widgets ---
+
+@dataclass
+class Gauge:
+    title: str
+    variable: str
+    range_min: object
+    range_max: object
+    op_min: object = None
+    op_max: object = None
+    unit: str = ""
+
+    def variables(self):
+        yield self.variable
+        for source in (self.range_min, self.range_max, self.op_min, self.op_max):
+            yield from _source_variables(source)
+
+    def render(self, readings):
+        utils.display_gauge(
+            self.title, self.variable,
+            _resolve(self.range_min, readings), _resolve(self.range_max, readings),
+            op_min_input=_resolve(self.op_min, readings), op_max_input=_resolve(self.op_max, readings),
+            unit=self.unit, readings=readings,
+        )
+
+
+@dataclass
+class Metric:
+    label: str
+    variable: str
+    help: str = None
+    delta_color: str = "normal"
+
+    def variables(self):
+        yield self.variable
+
+    def render(self, readings):
+        utils.display_metric(self.label, self.variable, help_text=self.help, delta_color=self.delta_color,
+                             readings=readings)
+
+
+@dataclass
+class Progress:
+    label: str
+    variable: str
+    max_value: float = 100
+    help: str = None
+
+    def variables(self):
+        yield self.variable
+
+    def render(self, readings):
+        utils.display_progress(self.label, self.variable, max_value=self.max_value, help_text=self.help,
+                               readings=readings)
+
+
+@dataclass
+class BooleanStatus:
+    label: str
+    variable: str
+
+    def variables(self):
+        yield self.variable
+
+    def render(self, readings):
+        utils.display_boolean_status(self.label, self.variable, readings=readings)
+
+
+@dataclass
+class ComponentHealth:
+    label: str
+    wear_variable: str
+    integrity_variable: str = None
+
+    def variables(self):
+        yield self.wear_variable
+        if self.integrity_variable:
+            yield self.integrity_variable
+
+    def render(self, readings):
+        utils.display_component_health_indicator(self.label, self.wear_variable, self.integrity_variable,
+                                                 readings=readings)
+
+
+@dataclass
+class LimitForecast:
+    """Time until a history channel reaches its limit (config.FORECAST_LIMITS) at the current trend."""
+    label: str
+    channel: str
+    unit: str = ""
+
+    def variables(self):
+        yield config.FORECAST_LIMITS[self.channel]
+
+    def render(self, readings):
+        utils.display_limit_forecast(self.label, self.channel, unit=self.unit, readings=readings)
+
+
+@dataclass
+class HistoryChart:
+    """WebGL line chart of shared-history channels (reads the history store, not variables)."""
+    channels: list
+    labels: list = None
+    empty_text: str = "Collecting data for chart..."
+    height: int = 300
+    secondary: list = field(default_factory=list)  # Channels plotted against a right-hand axis
+
+    def variables(self):
+        return []
+
+    def render(self, readings):
+        utils.display_history_chart(self.channels, self.labels, height=self.height, empty_text=self.empty_text,
+                                    secondary=self.secondary)
+
+
+@dataclass
+class Text:
+    """Static text: `style` is one of markdown, caption or info."""
+    body: str
+    style: str = "markdown"
+
+    def variables(self):
+        return []
+
+    def render(self, readings):
+        {"markdown": st.markdown, "caption": st.caption, "info": st.info}[self.style](self.body)
+
+
+@dataclass
+class ValueText:
+    """Text showing one variable's value, e.g. ValueText("Ordered: {}", "COOLANT_CORE_FLOW_ORDERED_SPEED")."""
+    template: str
+    variable: str
+    style: str = "caption"
+
+    def variables(self):
+        yield self.variable
+
+    def render(self, readings):
+        body = self.template.format(readings[self.variable].legacy())
+        {"markdown": st.markdown, "caption": st.caption, "info": st.info}[self.style](body)
+
+
+@dataclass
+class Placeholder:
+    """A metric the webserver has no variable for yet: shows N/A, with `note` saying what's missing."""
+    label: str
+    note: str = None
+
+    def variables(self):
+        return []
+
+    def render(self, readings):
+        st.metric(label=self.label, value="N/A")
+        if self.note:
+            st.caption(self.note)
+
+
+@dataclass
+class Divider:
+    def variables(self):
+        return []
+
+    def render(self, readings):
+        st.divider()
+
+
+# --- Containers ---
+
+@dataclass
+class Panel:
+    """A titled group of widgets, bordered by default."""
+    title: str
+    children: list = field(default_factory=list)
+    border: bool = True
+
+    def variables(self):
+        for child in self.children:
+            yield from child.variables()
+
+    def render(self, readings):
+        with st.container(border=self.border):
+            if self.title:
+                st.subheader(self.title)
+            for child in self.children:
+                child.render(readings)
+
+
+@dataclass
+class Expander:
+    title: str
+    children: list = field(default_factory=list)
+    expanded: bool = True
+
+    def variables(self):
+        for child in self.children:
+            yield from child.variables()
+
+    def render(self, readings):
+        with st.expander(self.title, expanded=self.expanded):
+            for child in self.children:
+                child.render(readings)
+
+
+@dataclass
+class Columns:
+    """Side-by-side columns; each entry of `columns` is the list of widgets in that column."""
+    columns: list
+
+    def variables(self):
+        for column in self.columns:
+            for child in column:
+                yield from child.variables()
+
+    def render(self, readings):
+        for st_column, column in zip(st.columns(len(self.columns)), self.columns):
+            with st_column:
+                for child in column:
+                    child.render(readings)
+
+
+@dataclass
+class Page:
+    """The root of a tab's layout."""
+    title: str
+    children: list = field(default_factory=list)
+
+    def variables(self):
+        for child in self.children:
+            yield from child.variables()
+
+    def render(self, readings):
+        st.header(self.title)
+        for child in self.children:
+            child.render(readings)
+
+
+# --- Compilation ---
+
+def _walk(node):
+    yield node
+    if isinstance(node, Columns):
+        for column in node.columns:
+            for child in column:
+                yield from _walk(child)
+    for child in getattr(node, "children", []):
+        yield from _walk(child)
+
+
+class RenderPlan:
+    """A compiled layout: its variable set (in first-use order) and a fetch-free render pass."""
+
+    def __init__(self, root, variables):
+        self.root = root
+        self.variables = variables
+
+    def render(self, readings):
+        """Draws the layout from `readings` ({name: Reading}); must cover self.variables."""
+        missing = [name for name in self.variables if name not in readings]
+        if missing:
+            raise KeyError(f"Snapshot is missing layout variables: {', '.join(missing)}")
+        self.root.render(readings)
+
+
+def compile_layout(root):
+    """Validates a layout tree and precomputes the variables it needs."""
+    gauge_keys = set()
+    for node in _walk(root):
+        if isinstance(node, Gauge):
+            # display_gauge keys its chart by variable, so two gauges on one variable would collide
+            if node.variable in gauge_keys:
+                raise ValueError(f"Layout '{root.title}' has two gauges for {node.variable}")
+            gauge_keys.add(node.variable)
+    return RenderPlan(root, list(dict.fromkeys(root.variables())))
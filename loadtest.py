@@ -0,0 +1,180 @@
+# loadtest.py
+"""
+Load test: N headless dashboard sessions against a local fake simulation webserver.
+
+    python loadtest.py [--sessions 1,2,4,8] [--duration 30] [--refresh 2] [--tab-every 5]
+
+Each session is a Streamlit AppTest of main.py driven from its own thread: it reruns every
+`--refresh` seconds (like st_autorefresh would) and moves to the next tab every `--tab-every`
+reruns via the `?tab=` URL parameter. Sessions share this process's st.cache_resource objects, as
+browser sessions share one `streamlit run` server. fake_sim.py runs in a subprocess so its CPU
+isn't counted.
+
+For each session count it prints dashboard CPU (% of one core, this process), resident memory and
+its growth per session, the rerun latency distribution and the request rate the simulation saw.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+import config
+from tabs import TABS
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(ROOT, "main.py")
+# Tab titles in menu order (the order sessions cycle through)
+TAB_TITLES = list(TABS)
+
+
+# --- Fake Simulation ---
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_sim(*extra_args):
+    """Starts fake_sim.py (with any extra command-line args) in a subprocess; returns (process, base url)."""
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "fake_sim.py"), "--port", str(port), *extra_args],
+                               stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}/"
+    for _ in range(100):
+        try:
+            sim_requests(url)
+            return process, url
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("fake_sim.py did not start")
+
+
+def sim_requests(url):
+    """Variable requests the fake simulation has answered so far."""
+    with urllib.request.urlopen(url + "stats", timeout=1) as response:
+        return json.load(response)["requests"]
+
+
+# --- Measurements ---
+
+def rss_bytes():
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource  # Peak rather than current RSS, but close enough off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _session(index, refresh, tab_every, stop, ready, latencies, failures):
+    """One headless browser session: rerun on a fixed cadence, cycling through the tabs."""
+    app = AppTest.from_file(MAIN_SCRIPT, default_timeout=60)
+    app.query_params["tab"] = TAB_TITLES[index % len(TAB_TITLES)]
+    app.run()  # Cold start (imports, cache_resource setup) isn't part of the latency figures
+    ready.release()
+    reruns = 0
+    next_run = time.monotonic() + refresh * (index % 10) / 10  # Don't let every session rerun in lockstep
+    while not stop.wait(max(0.0, next_run - time.monotonic())):
+        next_run += refresh
+        app.query_params["tab"] = TAB_TITLES[(index + reruns // tab_every) % len(TAB_TITLES)]
+        started = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - started)
+        if app.exception:
+            failures.append(app.exception[0].message)
+        reruns += 1
+
+
+def run_stage(sessions, duration, refresh, tab_every, sim_url):
+    """Runs `sessions` concurrent sessions for `duration` seconds; returns one report row."""
+    rss_before = rss_bytes()
+    stop, ready = threading.Event(), threading.Semaphore(0)
+    latencies, failures = [], []
+    threads = [threading.Thread(target=_session, args=(i, refresh, tab_every, stop, ready, latencies, failures),
+                                daemon=True) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for _ in threads:
+        ready.acquire()
+
+    requests_before, cpu_before, wall_before = sim_requests(sim_url), time.process_time(), time.monotonic()
+    time.sleep(duration)
+    stop.set()
+    elapsed = time.monotonic() - wall_before
+    cpu = time.process_time() - cpu_before
+    requests = sim_requests(sim_url) - requests_before
+    rss_after = rss_bytes()
+    for thread in threads:
+        thread.join()
+
+    latency_ms = np.array(latencies) * 1000 if latencies else np.array([np.nan])
+    return {
+        "sessions": sessions,
+        "cpu_percent": 100 * cpu / elapsed,
+        "rss_mb": rss_after / 2**20,
+        "mb_per_session": (rss_after - rss_before) / 2**20 / sessions,
+        "reruns": len(latencies),
+        "p50_ms": float(np.percentile(latency_ms, 50)),
+        "p95_ms": float(np.percentile(latency_ms, 95)),
+        "max_ms": float(latency_ms.max()),
+        "sim_requests_per_second": requests / elapsed,
+        "failures": len(failures),
+        "first_failure": failures[0] if failures else "",
+    }
+
+
+def print_report(rows):
+    header = f"{'sessions':>8} {'cpu %':>7} {'rss MB':>8} {'MB/sess':>8} {'reruns':>7} " \
+             f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'sim req/s':>10} {'fail':>5}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['sessions']:>8} {row['cpu_percent']:>7.1f} {row['rss_mb']:>8.1f} {row['mb_per_session']:>8.2f} "
+              f"{row['reruns']:>7} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['max_ms']:>8.1f} "
+              f"{row['sim_requests_per_second']:>10.1f} {row['failures']:>5}")
+    for row in rows:
+        if row["first_failure"]:
+            print(f"\n{row['sessions']} sessions, first failure: {row['first_failure']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with headless sessions.")
+    parser.add_argument("--sessions", default="1,2,4,8", help="Comma-separated session counts to step through")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to measure at each session count")
+    parser.add_argument("--refresh", type=float, default=config.DEFAULT_REFRESH_RATE_SECONDS,
+                        help="Seconds between reruns of each session")
+    parser.add_argument("--tab-every", type=int, default=5, help="Reruns before a session moves to the next tab")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report rows as JSON")
+    args = parser.parse_args()
+
+    process, sim_url = start_fake_sim()
+    config.WEBSERVER_URL = sim_url  # main.py's modules are imported into this process by AppTest
+    try:
+        # Import everything once up front so the first stage's memory figure is per-session only
+        AppTest.from_file(MAIN_SCRIPT, default_timeout=60).run()
+        rows = []
+        for sessions in (int(n) for n in args.sessions.split(",")):
+            print(f"Running {sessions} session(s) for {args.duration:.0f}s...", file=sys.stderr)
+            rows.append(run_stage(sessions, args.duration, args.refresh, args.tab_every, sim_url))
+    finally:
+        process.terminate()
+        process.wait()
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
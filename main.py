@@ -1,23 +1,31 @@
 # main.py
-import datetime
+import importlib
 
-import pandas as pd
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 from streamlit_option_menu import option_menu
 
 # Import configuration and utility functions
+import async_client
 import config
+import kiosk
+import plant
 import utils
 # Import tab display functions
-from tabs import overview, core_status, primary_coolant, power_gen, health, raw_data
+import tabs
+from tabs import overview, core_status, primary_coolant, power_gen, health, raw_data, runs
+
+# --- Kiosk Mode (`?kiosk=1`): wall displays get the compact view and nothing else ---
+if st.query_params.get("kiosk") == "1":
+    kiosk.render()
+    st.stop()
+
+# --- Profiling (sidebar button or DASHBOARD_PROFILE_RERUNS) ---
+rerun_profiler = utils.start_rerun_profile(__file__)
+frame = utils.begin_frame()
 
 # --- Initialize Session State ---
-# Initialize History DataFrames
-if 'core_temp_history' not in st.session_state:
-    st.session_state.core_temp_history = pd.DataFrame(columns=['Timestamp', 'Core Temp (°C)'])
-if 'total_kw_history' not in st.session_state:
-    st.session_state.total_kw_history = pd.DataFrame(columns=['Timestamp', 'Total Output (kW)'])
+# History lives in the shared store (utils.get_history), not per session.
 # Initialize Previous Values for Delta Calculations (add others as needed)
 if 'previous_total_kw' not in st.session_state:
     st.session_state.previous_total_kw = None  # Initialize as None
@@ -33,26 +41,47 @@ refresh_interval = st.sidebar.slider(
     "Refresh Rate (seconds)", 1, 10, config.DEFAULT_REFRESH_RATE_SECONDS,
     disabled=not auto_refresh_on
 )
+adaptive_refresh = st.sidebar.checkbox(
+    "Adaptive Refresh", value=True, disabled=not auto_refresh_on,
+    help=f"Slow the refresh down when the dashboard's rendering would use more than "
+         f"{config.FRAME_CPU_TARGET:.0%} of a CPU core"
+)
+st.sidebar.radio(
+    "Chart Time Axis", ["wall", "sim"], key="chart_time_axis", horizontal=True,
+    format_func=lambda axis: "Wall Clock" if axis == "wall" else "Simulation Time"
+)
+if config.FETCH_ENGINE == "async" and not async_client.AVAILABLE:
+    st.sidebar.warning("Async fetch engine needs `httpx`; using the synchronous client.")
+# Live request budget usage (shared by every session in this process)
+budget = utils.get_rate_limiter().stats()
+st.sidebar.progress(min(budget["used_fraction"], 1.0),
+                    text=f"Requests: {budget['requests_per_second']:.1f} / {budget['budget_per_second']:.0f} per s")
+if budget["stale_served"]:
+    st.sidebar.caption(f"Over budget: {budget['stale_served']} cached value(s) served instead of fetched")
+st.sidebar.checkbox("Shade Stale Values", value=config.STALE_SHADING_DEFAULT, key="shade_stale",
+                    help=f"Grey out values fetched more than {config.STALE_AFTER_SECONDS:g}s ago")
+profile_reruns = st.sidebar.number_input("Reruns to profile", 1, 50, 5)
+st.sidebar.button("Profile Reruns", on_click=utils.request_profile, args=(profile_reruns,),
+                  disabled=rerun_profiler is not None,
+                  help=f"Samples the next reruns and writes flamegraph files to `{config.PROFILE_OUTPUT_DIR}/`")
 st.sidebar.markdown("---")
 st.sidebar.caption("Ensure the simulation's webserver is active.")
 
 # --- Autorefresh Control ---
+# Never faster than frames can be drawn; ticks that fire mid-render are coalesced into the next frame
 if auto_refresh_on:
-    st_autorefresh(interval=refresh_interval * 1000, key="data_refresher")
+    effective_interval = utils.pace_refresh(frame, refresh_interval, adaptive_refresh)
+    frame.note_tick(st_autorefresh(interval=int(effective_interval * 1000), key="data_refresher"))
+    utils.display_frame_stats(frame, refresh_interval)
+utils.display_freshness_summary()
 
 # --- Data Update Logic for History & Calculations ---
-current_time = datetime.datetime.now()
+# Fetch what this script needs in one concurrent batch before rendering
+history_variables = [channel for channel in config.HISTORY_CHANNELS if channel != "TOTAL_KW"]  # TOTAL_KW is derived
+utils.fetch_snapshot(plant.GENERATOR_VARIABLES + history_variables + [config.SIM_TIME_VARIABLE])
 
 # Calculate Total Power
-total_kw = 0.0
-active_generators = 0
-for i in range(3):
-    kw_value = utils.fetch_variable_value(f"GENERATOR_{i}_KW")
-    if isinstance(kw_value, float):
-        breaker_val = utils.fetch_variable_value(f"GENERATOR_{i}_BREAKER")
-        if isinstance(breaker_val, bool) and not breaker_val:
-            total_kw += kw_value
-            if kw_value > 0: active_generators += 1
+total_kw, active_generators = plant.total_generator_output(utils.fetch_reading)
 
 # --- Calculate Delta for Total KW ---
 total_kw_delta = None
@@ -66,30 +95,36 @@ if previous_total_kw is not None and isinstance(total_kw, (int, float)):
 st.session_state['previous_total_kw'] = total_kw
 # --- End Delta Calculation ---
 
-# Update Total KW History
-new_kw_data = pd.DataFrame({'Timestamp': [current_time], 'Total Output (kW)': [total_kw]})
-st.session_state.total_kw_history = pd.concat([st.session_state.total_kw_history, new_kw_data], ignore_index=True)
-if len(st.session_state.total_kw_history) > config.MAX_HISTORY_POINTS:
-    st.session_state.total_kw_history = st.session_state.total_kw_history.tail(config.MAX_HISTORY_POINTS)
+# Update Shared History (only the first session to rerun in each interval actually samples;
+# samples are skipped while the simulation clock is paused). When collector.py is running it
+# samples on its own cadence and the dashboard only reads.
+def _history_sample():
+    sim_time = utils.fetch_reading(config.SIM_TIME_VARIABLE)
+    values = {"TOTAL_KW": total_kw}
+    for channel in history_variables:
+        reading = utils.fetch_reading(channel)
+        values[channel] = reading.value if reading.is_numeric else None
+    return (sim_time.value if sim_time.is_numeric else None), values
 
-# Update Core Temp History (will get delta automatically via utils.display_metric if displayed)
-current_core_temp = utils.fetch_variable_value("CORE_TEMP")
-if isinstance(current_core_temp, (int, float)):
-    new_temp_data = pd.DataFrame({'Timestamp': [current_time], 'Core Temp (°C)': [current_core_temp]})
-    st.session_state.core_temp_history = pd.concat([st.session_state.core_temp_history, new_temp_data],
-                                                   ignore_index=True)
-    if len(st.session_state.core_temp_history) > config.MAX_HISTORY_POINTS:
-        st.session_state.core_temp_history = st.session_state.core_temp_history.tail(config.MAX_HISTORY_POINTS)
 
+if utils.get_shared_snapshot() is None:
+    utils.get_history().append_if_due(_history_sample, config.HISTORY_SAMPLE_INTERVAL_SECONDS)
+utils.update_anomalies()
+utils.update_events()
 
-# --- Main Display Area using streamlit-option-menu ---
-tab_titles = ["Overview", "Core Status", "Primary Coolant", "Steam & Power Gen", "Plant Health & Resources",
-              "Raw Data Viewer"]
-tab_icons = ['house', 'activity', 'droplet-half', 'lightning-charge', 'heart-pulse', 'list-task']
 
+# --- Main Display Area using streamlit-option-menu ---
+tab_modules = {title: importlib.import_module(f"tabs.{name}") for title, name in tabs.TABS.items()}
+tab_titles = list(tab_modules)
+# Learn which of the tabs' variables exist, so missing ones stop costing a request every refresh
+utils.discover_variables(name for module in tab_modules.values() for name in module.VARIABLES)
+tab_icons = ['house', 'activity', 'droplet-half', 'lightning-charge', 'heart-pulse', 'list-task', 'collection-play']
+
+# A `?tab=Core Status` URL parameter picks the initial tab (wall screens, load tests)
+requested_tab = st.query_params.get("tab")
 selected_tab_title = option_menu(
     menu_title=None, options=tab_titles, icons=tab_icons, menu_icon="cast",
-    default_index=0, orientation="horizontal",
+    default_index=tab_titles.index(requested_tab) if requested_tab in tab_titles else 0, orientation="horizontal",
     styles={  # Styles remain the same...
         "container": {"padding": "5px 0px", "background-color": "transparent", "border-bottom": "1px solid #CCCCCC",
                       "margin-bottom": "15px"},
@@ -102,6 +137,13 @@ selected_tab_title = option_menu(
     }
 )
 
+# Batch-fetch the selected tab's variables; keep every other tab warm in the background
+selected_variables = (raw_data.selected_variables() if selected_tab_title == "Raw Data Viewer"
+                      else tab_modules[selected_tab_title].VARIABLES)
+utils.fetch_snapshot(selected_variables)
+utils.keep_warm(name for title, module in tab_modules.items() if title != selected_tab_title
+                for name in module.VARIABLES)
+
 # Conditionally display content based on the selected option_menu item
 if selected_tab_title == "Overview":
     # Pass total_kw AND its calculated delta to the overview tab
@@ -119,4 +161,9 @@ elif selected_tab_title == "Plant Health & Resources":
     health.display_tab()
 elif selected_tab_title == "Raw Data Viewer":
     raw_data.display_tab()
+elif selected_tab_title == "Recorded Runs":
+    runs.display_tab()
 
+utils.display_profile_summary()
+utils.finish_rerun_profile(rerun_profiler, selected_tab_title)
+utils.end_frame(frame, selected_tab_title)
@@ -0,0 +1,104 @@
+# plant.py
+"""Values derived from several variables, shared by the dashboard and the collector."""
+import re
+
+import numpy as np
+
+from equipment import EquipmentGroup
+
+# --- Equipment Groups ---
+# Add units here (e.g. plants with more pumps); the tabs lay themselves out from the counts.
+TURBINES = EquipmentGroup("Turbine", "STEAM_TURBINE_{i}_{field}", 3, ("RPM", "TEMPERATURE", "PRESSURE"))
+GENERATORS = EquipmentGroup("Generator", "GENERATOR_{i}_{field}", 3, ("KW", "BREAKER", "V", "HERTZ", "A"))
+CIRCULATION_PUMPS = EquipmentGroup("Pump", "COOLANT_CORE_CIRCULATION_PUMP_{i}_{field}", 3,
+                                   ("STATUS", "DRY_STATUS", "OVERLOAD_STATUS", "SPEED", "ORDERED_SPEED"))
+
+GENERATOR_COUNT = GENERATORS.count
+GENERATOR_VARIABLES = GENERATORS.variables(("KW", "BREAKER"))
+
+# --- Status Classes ---
+STATUS_ACTIVE, STATUS_IDLE, STATUS_OFF, STATUS_ERROR = range(4)
+STATUS_ICONS = np.array(["🟢", "🟡", "⚪", "🔴"])
+STATUS_KEY = "🟢 Active | 🟡 Idle/Inactive (Connected) | ⚪ Off / Breaker Open | 🔴 Error/Unknown"
+
+
+def generator_totals(generators):
+    """(total kW over closed breakers, generators producing on a closed breaker) for a GENERATORS snapshot."""
+    kw = generators.values["KW"]
+    online = generators.valid["KW"] & generators.valid["BREAKER"] & (generators.values["BREAKER"] == 0)
+    return float(kw[online].sum()), int(np.count_nonzero(online & (kw > 0)))
+
+
+def total_generator_output(fetch):
+    """
+    Sums generator output over closed breakers. `fetch(variable_name)` must return a Reading.
+    Returns (total_kw, active_generators).
+    """
+    return generator_totals(GENERATORS.read(fetch, ("KW", "BREAKER")))
+
+
+def generator_status(generators):
+    """Status class per generator (STATUS_*) and a tooltip for each, for a GENERATORS snapshot."""
+    kw, breaker_open = generators.values["KW"], generators.values["BREAKER"] == 1
+    readable = generators.valid["KW"] & generators.valid["BREAKER"]
+    classes = np.select([~readable, breaker_open, kw > 0], [STATUS_ERROR, STATUS_OFF, STATUS_ACTIVE], STATUS_IDLE)
+    tooltips = []
+    for i, status in enumerate(classes):
+        if status == STATUS_ERROR:
+            tooltips.append(f"Error fetching status (KW: {generators.readings['KW'][i]}, "
+                            f"Breaker: {generators.readings['BREAKER'][i]})")
+        elif status == STATUS_OFF:
+            tooltips.append(f"Breaker Open ({kw[i]:.1f} kW)")
+        else:
+            tooltips.append(f"{'Active' if status == STATUS_ACTIVE else 'Inactive'} ({kw[i]:.1f} kW, Breaker Closed)")
+    return classes, tooltips
+
+
+def turbine_status(turbines):
+    """Status class per turbine (STATUS_*) and a tooltip for each, for a TURBINES snapshot."""
+    rpm = turbines.values["RPM"]
+    classes = np.select([~turbines.valid["RPM"], rpm > 10], [STATUS_ERROR, STATUS_ACTIVE], STATUS_IDLE)
+    tooltips = [f"Error fetching RPM: {turbines.readings['RPM'][i].message or turbines.readings['RPM'][i]}"
+                if status == STATUS_ERROR else
+                f"{'Active' if status == STATUS_ACTIVE else 'Inactive'} ({rpm[i]:.0f} RPM)"
+                for i, status in enumerate(classes)]
+    return classes, tooltips
+
+
+# --- Circulation Pumps ---
+# Circulation pump status code -> (description, st.status state)
+PUMP_STATUSES = {
+    0: ("Inactive", "complete"),
+    1: ("Active (No Speed)", "running"),
+    2: ("Active (Speed Reached)", "running"),
+    3: ("Maintenance Required", "error"),
+    4: ("Not Installed", "error"),
+    5: ("Insufficient Energy", "error"),
+}
+_PUMP_STATUS_VARIABLE = re.compile(r"COOLANT_CORE_CIRCULATION_PUMP_\d+_STATUS")
+
+
+def pump_status(pumps):
+    """(description, st.status state) per pump for a CIRCULATION_PUMPS snapshot."""
+    codes = np.where(pumps.valid["STATUS"], pumps.values["STATUS"], -1).astype(np.int64)
+    statuses = []
+    for i, code in enumerate(codes):
+        reading = pumps.readings["STATUS"][i]
+        if code >= 0:
+            statuses.append(PUMP_STATUSES.get(int(code), (f"Unknown Code ({code})", "error")))
+        elif not reading.ok:
+            statuses.append(("Error Fetching Status", "error"))
+        else:
+            statuses.append((f"Invalid Status ({reading})", "error"))
+    return statuses
+
+
+def state_label(variable_name, value):
+    """Readable text for a discrete state value (pump status codes, breakers, flags)."""
+    if _PUMP_STATUS_VARIABLE.fullmatch(variable_name):
+        return PUMP_STATUSES.get(value, (f"Unknown Code ({value})",))[0]
+    if variable_name.endswith("_BREAKER"):
+        return "Open" if value else "Closed"  # Breaker TRUE means open (no output)
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    return str(value)
@@ -0,0 +1,69 @@
+# prefetch.py
+import threading
+import time
+
+
+class Prefetcher(threading.Thread):
+    """
+    Low-priority daemon thread that keeps the variables of tabs nobody is looking at warm in the
+    shared ReadingCache, so switching tabs renders from cache instead of waiting on the network.
+
+    It only spends the background share of the request budget, refreshes the least recently
+    fetched variables first, and goes idle when no session has rerun for `idle_after` seconds.
+    """
+
+    def __init__(self, fetch_batch, cache, limiter, fresh_seconds, interval, idle_after, skip=None):
+        super().__init__(name="tab-prefetch", daemon=True)
+        self.fetch_batch = fetch_batch  # list of names -> {name: Reading}
+        self.cache = cache
+        self.limiter = limiter
+        self.fresh_seconds = fresh_seconds
+        self.interval = interval
+        self.idle_after = idle_after
+        self.skip = skip or (lambda variable_name: False)  # e.g. served by the collector instead
+        self.prefetched = 0
+        self._variables = []
+        self._last_touch = 0.0
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def set_variables(self, variable_names):
+        """Replaces the set of variables to keep warm."""
+        variable_names = list(dict.fromkeys(variable_names))
+        with self._lock:
+            self._variables = variable_names
+
+    def touch(self):
+        """Called on every rerun; the prefetcher only works while someone is watching."""
+        self._last_touch = time.monotonic()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _due(self):
+        with self._lock:
+            variable_names = list(self._variables)
+        due = []
+        for name in variable_names:
+            entry = self.cache.get_entry(name)
+            if entry is not None and time.time() - entry[1] <= self.fresh_seconds:
+                continue
+            if self.skip(name):
+                continue
+            due.append((entry[1] if entry is not None else 0.0, name))
+        return [name for _, name in sorted(due)]
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            if time.monotonic() - self._last_touch > self.idle_after:
+                continue
+            due = self._due()
+            granted = self.limiter.acquire(len(due), background=True)
+            if not granted:
+                continue
+            try:
+                readings = self.fetch_batch(due[:granted])
+            except Exception:  # Never let a bad fetch kill the thread; try again next interval
+                continue
+            self.cache.put_many(readings)
+            self.prefetched += len(readings)
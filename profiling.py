@@ -0,0 +1,189 @@
+# profiling.py
+"""
+Sampling profiler for dashboard reruns.
+
+A background thread snapshots the script thread's stack every few milliseconds while a rerun
+executes (sys._current_frames, so no tracing overhead inside the widgets). Samples are tagged with
+the tab that rerun displayed and, when the capture ends, written as Brendan Gregg collapsed stacks
+(for flamegraph.pl / inferno) and as a speedscope JSON file, one profile per tab.
+"""
+import collections
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+# Helpers whose inclusive time is broken out in the summary (matched by name in utils.py)
+HELPERS = ("display_gauge", "display_metric", "fetch_variable_value", "fetch_reading")
+PLOTLY = "Plotly (build + serialise)"
+
+
+def _frame_key(code):
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+def _frame_label(key):
+    name, filename, _ = key
+    return f"{os.path.basename(filename)}:{name}"
+
+
+def _helper(key):
+    """Which summary bucket a frame belongs to, if any."""
+    name, filename, _ = key
+    if name in HELPERS and os.path.basename(filename) == "utils.py":
+        return name
+    if f"{os.sep}plotly{os.sep}" in filename:
+        return PLOTLY
+    return None
+
+
+class RerunProfiler:
+    """
+    Samples the next `reruns` completed reruns of one session. main.py calls start_rerun() at the
+    top of the script and finish_rerun() at the bottom; a rerun interrupted in between (e.g. by a
+    newer rerun) is discarded. Once all reruns are captured, finish_rerun() writes the output files
+    and returns the summary.
+    """
+
+    def __init__(self, reruns, output_dir, interval=0.002):
+        self.reruns = reruns
+        self.output_dir = output_dir
+        self.interval = interval
+        self.runs = []  # (tab, duration seconds, [(stack root->leaf, weight seconds)])
+        self._stop = None
+        self._samples = None
+        self._thread = None
+        self._started = None
+
+    @property
+    def done(self):
+        return len(self.runs) >= self.reruns
+
+    def start_rerun(self, root_file):
+        """Starts sampling the calling thread; stacks are trimmed to frames below `root_file`."""
+        self._halt()  # A previous rerun that never finished
+        self._stop = threading.Event()
+        self._samples = []
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), root_file, self._stop, self._samples),
+            name="rerun-profiler", daemon=True,
+        )
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def finish_rerun(self, tab):
+        """Stops sampling and files the rerun under `tab`; returns the summary once done, else None."""
+        if self._thread is None:
+            return None
+        duration = time.perf_counter() - self._started
+        samples = self._halt()
+        self.runs.append((tab, duration, samples))
+        if not self.done:
+            return None
+        summary = self.summary()
+        summary["files"] = self.write()
+        return summary
+
+    def _halt(self):
+        if self._thread is None:
+            return []
+        self._stop.set()
+        self._thread.join()
+        samples = self._samples
+        self._thread = self._stop = self._samples = None
+        return samples
+
+    def _sample(self, thread_id, root_file, stop, samples):
+        last = time.perf_counter()
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame.f_code))
+                if frame.f_code.co_filename == root_file:
+                    break  # Drop Streamlit's script-runner frames below main.py
+                frame = frame.f_back
+            stack.reverse()
+            samples.append((tuple(stack), now - last))
+            last = now
+
+    # --- Reporting ---
+
+    def summary(self, top=15):
+        """Rerun timings per tab, hottest functions (self / total) and per-helper time per tab."""
+        total = sum(weight for _, _, samples in self.runs for _, weight in samples) or 1.0
+        self_time = collections.Counter()
+        total_time = collections.Counter()
+        helper_time = collections.defaultdict(collections.Counter)
+        rerun_times = collections.defaultdict(list)
+        for tab, duration, samples in self.runs:
+            rerun_times[tab].append(duration)
+            for stack, weight in samples:
+                if not stack:
+                    continue
+                self_time[stack[-1]] += weight
+                for key in set(stack):
+                    total_time[key] += weight
+                for helper in {_helper(key) for key in stack} - {None}:
+                    helper_time[tab][helper] += weight
+
+        hot = [
+            {"Function": _frame_label(key), "Self (ms)": 1000 * self_time[key],
+             "Total (ms)": 1000 * total_time[key], "Total %": 100 * total_time[key] / total}
+            for key in total_time
+        ]
+        hot.sort(key=lambda row: row["Self (ms)"], reverse=True)
+        tabs = [
+            {"Tab": tab, "Reruns": len(durations), "Mean rerun (ms)": 1000 * sum(durations) / len(durations),
+             "Max rerun (ms)": 1000 * max(durations),
+             **{f"{helper} (ms)": 1000 * helper_time[tab][helper] / len(durations)
+                for helper in (*HELPERS, PLOTLY)}}
+            for tab, durations in rerun_times.items()
+        ]
+        return {"hot_functions": hot[:top], "tabs": tabs}
+
+    def write(self):
+        """Writes <output_dir>/rerun-<time>.collapsed and .speedscope.json; returns their paths."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(self.output_dir, "rerun-" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+
+        collapsed = collections.Counter()
+        for tab, _, samples in self.runs:
+            for stack, _ in samples:
+                collapsed[";".join([f"tab:{tab}", *map(_frame_label, stack)])] += 1
+        with open(stem + ".collapsed", "w") as f:
+            for line, count in collapsed.items():
+                f.write(f"{line} {count}\n")
+
+        frames, frame_index = [], {}
+        profiles = collections.OrderedDict()
+        for tab, _, samples in self.runs:
+            profile = profiles.setdefault(tab, {"samples": [], "weights": []})
+            for stack, weight in samples:
+                indices = []
+                for key in stack:
+                    if key not in frame_index:
+                        frame_index[key] = len(frames)
+                        frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                    indices.append(frame_index[key])
+                profile["samples"].append(indices)
+                profile["weights"].append(weight)
+        speedscope = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "nucleares-dashboard profiling.py",
+            "name": os.path.basename(stem),
+            "shared": {"frames": frames},
+            "profiles": [
+                {"type": "sampled", "name": tab, "unit": "seconds", "startValue": 0,
+                 "endValue": sum(profile["weights"]), **profile}
+                for tab, profile in profiles.items()
+            ],
+        }
+        with open(stem + ".speedscope.json", "w") as f:
+            json.dump(speedscope, f)
+        return [stem + ".collapsed", stem + ".speedscope.json"]
@@ -0,0 +1,71 @@
+# rate_limit.py
+import collections
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Process-wide request budget for the simulation webserver (it runs inside the game, so every
+    request costs frame rate). Refills at `rate` tokens/second up to `burst`.
+
+    Background work (prefetching, catalog probes) may only spend tokens above the
+    `background_reserve` fraction of the bucket, so on-screen fetches always get served first.
+    """
+
+    STATS_WINDOW_SECONDS = 10.0
+
+    def __init__(self, rate, burst, background_reserve=0.5):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.background_reserve = background_reserve
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._granted = collections.deque()  # (monotonic time, count) of recent grants
+        self.denied = 0
+        self.stale_served = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Grants older than the stats window are never needed again; drop them here so the log
+        # stays bounded in processes that never ask for stats (the collector, a kiosk)
+        while self._granted and now - self._granted[0][0] > self.STATS_WINDOW_SECONDS:
+            self._granted.popleft()
+
+    def acquire(self, count=1, background=False):
+        """Takes up to `count` tokens without blocking; returns how many were granted."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            floor = self.burst * self.background_reserve if background else 0.0
+            granted = max(0, min(count, int(self._tokens - floor)))
+            self._tokens -= granted
+            if granted:
+                self._granted.append((now, granted))
+            self.denied += count - granted
+            return granted
+
+    def try_acquire(self, background=False):
+        return self.acquire(1, background=background) == 1
+
+    def note_stale(self, count=1):
+        """Records that `count` values were served from stale cache instead of fetched."""
+        with self._lock:
+            self.stale_served += count
+
+    def stats(self):
+        """Live budget usage: achieved requests/s over the last few seconds vs the configured rate."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            requests_per_second = sum(count for _, count in self._granted) / self.STATS_WINDOW_SECONDS
+            return {
+                "requests_per_second": requests_per_second,
+                "budget_per_second": self.rate,
+                "used_fraction": requests_per_second / self.rate if self.rate else 0.0,
+                "tokens": self._tokens,
+                "denied": self.denied,
+                "stale_served": self.stale_served,
+            }
@@ -0,0 +1,161 @@
+# recordings.py
+"""
+A local library of recorded runs (collector.py --record) with a metadata index.
+
+Each recording is summarised once (start time, duration, sim time span, peak core temperature,
+max total output, variables present) into an index.json next to the files, so listing and
+filtering runs never opens them; a file is only re-read when its size or modification time
+changes. Comparisons stream just the requested channels and sim-time window from each file
+(see RecordingReader.frames) and align the runs on sim time since their start.
+"""
+import functools
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+import plant
+from codec import RecordingReader
+from decoding import Reading
+from history import decimate
+
+RECORDING_SUFFIX = ".ndr"
+INDEX_NAME = "index.json"
+_PEAK_CHANNEL = "CORE_TEMP"
+
+
+def summarize(path):
+    """Metadata for one recording, read by streaming only the channels the summary needs."""
+    with RecordingReader(path) as reader:
+        generators = [name for name in plant.GENERATOR_VARIABLES if name in reader.variables]
+        channels = ([_PEAK_CHANNEL] if _PEAK_CHANNEL in reader.variables else []) + generators
+        first_wall = last_wall = first_sim = last_sim = peak_temp = max_kw = None
+        frames = 0
+        for wall, sim, values in reader.frames(channels=channels or reader.variables[:1]):
+            frames += 1
+            first_wall = wall if first_wall is None else first_wall
+            last_wall = wall
+            if not math.isnan(sim):
+                first_sim = sim if first_sim is None else first_sim
+                last_sim = sim
+            temp = values.get(_PEAK_CHANNEL)
+            if isinstance(temp, float) and not math.isnan(temp):
+                peak_temp = temp if peak_temp is None else max(peak_temp, temp)
+            if generators:
+                total_kw, _ = plant.total_generator_output(lambda name: Reading(values.get(name)))
+                max_kw = total_kw if max_kw is None else max(max_kw, total_kw)
+        return {
+            "label": reader.meta.get("label", ""), "start_time": first_wall,
+            "duration": None if first_wall is None else last_wall - first_wall,
+            "sim_start": first_sim, "sim_end": last_sim, "frames": frames,
+            "peak_core_temp": peak_temp, "max_kw": max_kw, "variables": reader.variables,
+            "finished": reader.finished,
+        }
+
+
+class RecordingLibrary:
+    """The recordings in `directory` and their metadata index. Safe to share between sessions."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._entries = None  # file name -> summary (plus the size / mtime it was made from)
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, INDEX_NAME)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.index_path)  # Readers never see a half-written index
+
+    def refresh(self):
+        """
+        Brings the index up to date with the directory: new and changed files are summarised,
+        deleted ones dropped. Unreadable files are skipped. Returns the number of files re-read.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            try:
+                names = sorted(name for name in os.listdir(self.directory) if name.endswith(RECORDING_SUFFIX))
+            except FileNotFoundError:
+                names = []
+            changed = 0
+            for name in names:
+                stat = os.stat(self.path(name))
+                entry = self._entries.get(name)
+                if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                    continue
+                try:
+                    summary = summarize(self.path(name))
+                except (OSError, ValueError):
+                    continue
+                self._entries[name] = dict(summary, size=stat.st_size, mtime=stat.st_mtime)
+                changed += 1
+            removed = set(self._entries) - set(names)
+            for name in removed:
+                del self._entries[name]
+            if (changed or removed) and os.path.isdir(self.directory):
+                self._save()
+            return changed
+
+    def runs(self, variables=(), label=None, started_after=None, started_before=None, min_duration=None):
+        """Index entries (newest first, each with its "name") matching every given filter."""
+        with self._lock:
+            entries = [dict(entry, name=name) for name, entry in (self._entries or {}).items()]
+        variables = set(variables)
+
+        def matches(entry):
+            start = entry["start_time"]
+            return (variables <= set(entry["variables"])
+                    and (not label or label.lower() in (entry["label"] + " " + entry["name"]).lower())
+                    and (started_after is None or (start is not None and start >= started_after))
+                    and (started_before is None or (start is not None and start <= started_before))
+                    and (min_duration is None or (entry["duration"] or 0) >= min_duration))
+
+        return sorted(filter(matches, entries), key=lambda entry: entry["start_time"] or 0, reverse=True)
+
+
+def overlay(path, channels, window=None, max_points=None):
+    """
+    {channel: (x, y)} for one run, x being sim seconds since the run's first sim time. `window`
+    is an optional (start, end) in those seconds; only that span of the requested channels is read.
+    """
+    stat = os.stat(path)
+    return _overlay(path, stat.st_size, stat.st_mtime, tuple(channels), window and tuple(window), max_points)
+
+
+@functools.lru_cache(maxsize=32)
+def _overlay(path, size, mtime, channels, window, max_points):
+    """Cached per file version, so reruns that redraw the same comparison don't re-read the disk."""
+    with RecordingReader(path) as reader:
+        channels = [channel for channel in channels if channel in reader.variables]
+        origin = next((sim for _, _, sim in reader.index if not math.isnan(sim)), None)
+        if origin is None or not channels:
+            return {}
+        start, end = (None, None) if window is None else (origin + window[0], origin + window[1])
+        x, columns = [], {channel: [] for channel in channels}
+        for _, sim, values in reader.frames(start=start, end=end, channels=channels, axis="sim"):
+            if math.isnan(sim):
+                continue
+            x.append(sim - origin)
+            for channel in channels:
+                value = values[channel]
+                columns[channel].append(np.nan if value is None else float(value))
+    x = np.array(x, dtype=np.float64)
+    return {channel: decimate(x, np.array(y, dtype=np.float64), max_points) for channel, y in columns.items()}
@@ -0,0 +1,290 @@
+# shared_snapshot.py
+"""
+Shared memory block written by collector.py and read by the dashboard.
+
+Layout (all offsets 8-byte aligned):
+    header   uint64[8]   version, seq (seqlock), n_vars, capacity, n_channels, names_len, writer pid, -
+    clock    float64[2]  wall time and sim time of the latest snapshot
+    names    bytes       JSON: variable names, history channels, gap_seconds
+    values   float64[n_vars]   latest value per variable (bools as 0/1, NaN when errored)
+    fetched  float64[n_vars]   when each value was fetched (epoch seconds, NaN if unknown)
+    latency  float64[n_vars]   request round trip of each value (seconds, NaN if unknown)
+    errors   int8[n_vars]      0 = ok, otherwise 1 + index into ErrorKind
+    history  HistoryStore arrays (see history.storage_layout)
+
+The latest snapshot is guarded by a sequence lock: the writer makes `seq` odd while writing and
+even when done, and readers retry a copy whose `seq` changed underneath them. History samples are
+published by bumping the store's sample count after the data is written.
+"""
+import json
+import os
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from decoding import ErrorKind, Reading, VarType, error_reading, variable_type
+from history import HistoryStore, allocate_storage, reset_storage
+
+LAYOUT_VERSION = 2
+_HEADER_SLOTS = 8
+_SEQ, _N_VARS, _CAPACITY, _N_CHANNELS, _NAMES_LEN, _PID = 1, 2, 3, 4, 5, 6
+_ERROR_KINDS = list(ErrorKind)
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(n_vars, names_len, offset=0):
+    """Returns the offsets of the fixed-size parts and where the history arrays start."""
+    header = offset
+    clock = header + _HEADER_SLOTS * 8
+    names = clock + 2 * 8
+    values = _align(names + names_len)
+    fetched = values + n_vars * 8
+    latency = fetched + n_vars * 8
+    errors = latency + n_vars * 8
+    history = _align(errors + n_vars)
+    return header, clock, names, values, fetched, latency, errors, history
+
+
+def _encode(reading):
+    """Maps a Reading onto (float value, error code) for the shared block."""
+    if not reading.ok:
+        return np.nan, 1 + _ERROR_KINDS.index(reading.error)
+    if reading.is_bool:
+        return float(reading.value), 0
+    if reading.is_numeric:
+        return float(reading.value), 0
+    return np.nan, 1 + _ERROR_KINDS.index(ErrorKind.PARSE)  # Free text doesn't fit a float slot
+
+
+def _decode(variable_name, value, error_code):
+    if error_code:
+        return error_reading(_ERROR_KINDS[error_code - 1])
+    var_type = variable_type(variable_name)
+    if var_type is VarType.BOOL:
+        return Reading(bool(value))
+    if var_type is VarType.INT and float(value).is_integer():
+        return Reading(int(value))
+    return Reading(float(value))
+
+
+def _stamp_value(stamp):
+    return np.nan if stamp is None else stamp
+
+
+def _stamp_field(value):
+    return None if np.isnan(value) else float(value)
+
+
+class SharedSnapshotWriter:
+    """Creates the shared block and publishes snapshots / history samples into it (collector side)."""
+
+    def __init__(self, name, variables, channels, capacity, gap_seconds=None):
+        self.variables = list(variables)
+        self._index = {var: i for i, var in enumerate(self.variables)}
+        names = json.dumps({"variables": self.variables, "channels": list(channels),
+                            "gap_seconds": gap_seconds}).encode()
+        n_vars = len(self.variables)
+        header, clock, names_at, values, fetched, latency, errors, history = _layout(n_vars, len(names))
+        _, end = allocate_storage(len(channels), capacity, offset=history)
+
+        try:  # A previous collector that crashed may have left its block behind
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=end)
+        buf = self._shm.buf
+
+        self._header = np.ndarray(_HEADER_SLOTS, dtype=np.uint64, buffer=buf, offset=header)
+        self._clock = np.ndarray(2, dtype=np.float64, buffer=buf, offset=clock)
+        self._values = np.ndarray(n_vars, dtype=np.float64, buffer=buf, offset=values)
+        self._fetched = np.ndarray(n_vars, dtype=np.float64, buffer=buf, offset=fetched)
+        self._latency = np.ndarray(n_vars, dtype=np.float64, buffer=buf, offset=latency)
+        self._errors = np.ndarray(n_vars, dtype=np.int8, buffer=buf, offset=errors)
+        buf[names_at:names_at + len(names)] = names
+        storage, _ = allocate_storage(len(channels), capacity, buffer=buf, offset=history)
+        reset_storage(storage)
+        self._values.fill(np.nan)
+        self._fetched.fill(np.nan)
+        self._latency.fill(np.nan)
+        self._errors.fill(1 + _ERROR_KINDS.index(ErrorKind.EMPTY))
+        self._clock.fill(np.nan)
+        self._header[:] = [LAYOUT_VERSION, 0, n_vars, capacity, len(channels), len(names), os.getpid(), 0]
+        self.history = HistoryStore(channels, capacity, gap_seconds=gap_seconds, storage=storage)
+
+    def publish(self, readings, wall_time, sim_time=None):
+        """Writes the latest snapshot (`readings` maps variable name -> Reading) under the seqlock."""
+        values, fetched, latency = self._values.copy(), self._fetched.copy(), self._latency.copy()
+        errors = self._errors.copy()
+        for variable_name, reading in readings.items():
+            i = self._index.get(variable_name)
+            if i is not None:
+                values[i], errors[i] = _encode(reading)
+                fetched[i], latency[i] = _stamp_value(reading.fetched_at), _stamp_value(reading.latency)
+        self._header[_SEQ] += 1  # Odd: write in progress
+        self._values[:] = values
+        self._fetched[:] = fetched
+        self._latency[:] = latency
+        self._errors[:] = errors
+        self._clock[:] = [wall_time, np.nan if sim_time is None else sim_time]
+        self._header[_SEQ] += 1  # Even: consistent again
+
+    def close(self):
+        self._header = self._clock = self._values = self._fetched = self._latency = self._errors = None
+        self.history = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # Views still alive in this process; unlinking below is what matters
+        self._shm.unlink()
+
+
+class SharedSnapshotReader:
+    """Attaches to an existing block read-only and exposes zero-copy views over it (dashboard side)."""
+
+    def __init__(self, name, retry_seconds=0.05):
+        self.retry_seconds = retry_seconds  # How long a read waits out a write before giving up
+        self._shm = _attach_untracked(name)
+        buf = self._shm.buf
+        header = np.ndarray(_HEADER_SLOTS, dtype=np.uint64, buffer=buf)
+        if int(header[0]) != LAYOUT_VERSION:
+            self._shm.close()
+            raise ValueError(f"Shared block '{name}' has layout version {int(header[0])}, expected {LAYOUT_VERSION}")
+        n_vars, names_len = int(header[_N_VARS]), int(header[_NAMES_LEN])
+        header_at, clock, names_at, values, fetched, latency, errors, history = _layout(n_vars, names_len)
+        names = json.loads(bytes(buf[names_at:names_at + names_len]))
+        self.variables = names["variables"]
+        self._index = {var: i for i, var in enumerate(self.variables)}
+
+        self._header = header
+        self._clock = np.ndarray(2, dtype=np.float64, buffer=buf, offset=clock)
+        self._values = np.ndarray(n_vars, dtype=np.float64, buffer=buf, offset=values)
+        self._fetched = np.ndarray(n_vars, dtype=np.float64, buffer=buf, offset=fetched)
+        self._latency = np.ndarray(n_vars, dtype=np.float64, buffer=buf, offset=latency)
+        self._errors = np.ndarray(n_vars, dtype=np.int8, buffer=buf, offset=errors)
+        storage, _ = allocate_storage(len(names["channels"]), int(header[_CAPACITY]), buffer=buf, offset=history)
+        for array in [self._header, self._clock, self._values, self._fetched, self._latency, self._errors,
+                      *storage.values()]:
+            array.flags.writeable = False
+        self.history = HistoryStore(names["channels"], int(header[_CAPACITY]),
+                                    gap_seconds=names["gap_seconds"], storage=storage, external_writer=True)
+        self._latest_seq = None
+        self._latest = None
+        self._lock = threading.Lock()
+
+    @property
+    def writer_pid(self):
+        return int(self._header[_PID])
+
+    def age(self):
+        """Seconds since the collector last published a snapshot (inf before the first one)."""
+        wall_time = self._clock[0]
+        return float("inf") if np.isnan(wall_time) else time.time() - float(wall_time)
+
+    def _snapshot(self):
+        """
+        Consistent copy (values, errors, wall_time, sim_time, fetched, latency), re-copied only when
+        seq changes. If no consistent copy can be taken within `retry_seconds` (e.g. the collector
+        died mid-write, leaving seq odd), returns the last one taken, or None if there is none.
+        """
+        with self._lock:
+            give_up = time.monotonic() + self.retry_seconds
+            while True:
+                seq = int(self._header[_SEQ])
+                if seq & 1:
+                    if time.monotonic() > give_up:
+                        return self._latest
+                    time.sleep(0)  # Writer mid-update; yield and retry
+                    continue
+                if seq == self._latest_seq:
+                    return self._latest
+                values, errors, clock = self._values.copy(), self._errors.copy(), self._clock.copy()
+                fetched, latency = self._fetched.copy(), self._latency.copy()
+                if int(self._header[_SEQ]) == seq:
+                    self._latest_seq = seq
+                    self._latest = (values, errors, float(clock[0]), float(clock[1]), fetched, latency)
+                    return self._latest
+                if time.monotonic() > give_up:
+                    return self._latest
+
+    def latest(self):
+        """
+        Returns a consistent copy (values, errors, wall_time, sim_time) of the latest snapshot, or
+        None if none could be read (the caller should fetch for itself).
+        """
+        snapshot = self._snapshot()
+        return None if snapshot is None else snapshot[:4]
+
+    def reading(self, variable_name):
+        """
+        The latest Reading for a variable (with its fetch stamps), or None if the collector doesn't
+        poll it or no consistent snapshot could be read.
+        """
+        i = self._index.get(variable_name)
+        snapshot = None if i is None else self._snapshot()
+        if snapshot is None:
+            return None
+        values, errors, _, _, fetched, latency = snapshot
+        return _decode(variable_name, values[i], int(errors[i])).stamp(_stamp_field(fetched[i]),
+                                                                       _stamp_field(latency[i]))
+
+    def close(self):
+        self.history = None
+        self._header = self._clock = self._values = self._fetched = self._latency = self._errors = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # A session still holds a view; the mapping is released when that goes away
+
+
+def _attach_untracked(name):
+    """
+    Attaches without registering the block with this process's resource tracker, which would
+    otherwise unlink the collector's block when the dashboard exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedSnapshotLink:
+    """
+    Lazily attaches to the collector's block, retrying periodically, and reports it unavailable
+    while its data is stale (collector stopped). Safe to share between sessions.
+    """
+
+    def __init__(self, name, stale_after, retry_interval=5.0):
+        self.name = name
+        self.stale_after = stale_after
+        self.retry_interval = retry_interval
+        self._reader = None
+        self._last_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def reader(self):
+        """The attached reader if the collector is alive and publishing, else None."""
+        with self._lock:
+            if self._reader is not None and self._reader.age() <= self.stale_after:
+                return self._reader
+            now = time.monotonic()
+            if now - self._last_attempt < self.retry_interval:
+                return None
+            self._last_attempt = now
+            if self._reader is not None:
+                # Stale: the collector may have restarted with a new block under the same name
+                self._reader.close()
+                self._reader = None
+            try:
+                self._reader = SharedSnapshotReader(self.name)
+            except (FileNotFoundError, ValueError):
+                return None
+            return self._reader if self._reader.age() <= self.stale_after else None
@@ -0,0 +1,142 @@
+# soak.py
+"""
+Soak test: replays a recorded feed through the dashboard at accelerated speed and watches memory.
+
+    python soak.py [--recording PATH] [--hours 4] [--speed 60] [--sessions 1] [--samples 40]
+
+fake_sim.py replays the recording (collector.py --record) at --speed x real time, or serves random
+values without one. Each headless session (Streamlit AppTest) reruns main.py once per refresh
+interval of simulated time, moving to the next tab every few reruns. At --samples evenly spaced
+points the run records traced Python memory (tracemalloc), RSS, and the key count and size of
+every session's session_state. A series that keeps climbing after the warm-up is flagged, and the
+allocation sites that grew most are listed. The exit status is 1 when anything is flagged.
+
+Reruns go back to back when they can't keep up (tracemalloc slows them), so --speed is an upper
+bound; the report states the speed actually reached.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+import config
+from loadtest import MAIN_SCRIPT, TAB_TITLES, rss_bytes, start_fake_sim
+
+WARMUP_FRACTION = 0.25  # Caches and history buffers legitimately fill up at first
+RERUNS_PER_TAB = 5
+
+
+def deep_size(obj, seen=None):
+    """Approximate bytes held by `obj` and the containers inside it."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def is_growing(series, min_growth=0.01):
+    """True if, after the warm-up, the series almost never drops and ends clearly above where it started."""
+    series = np.asarray(series[int(len(series) * WARMUP_FRACTION):], dtype=float)
+    if len(series) < 4:
+        return False
+    rising = np.mean(np.diff(series) >= 0) >= 0.9
+    return bool(rising and series[-1] > series[0] * (1 + min_growth))
+
+
+def run(hours, speed, n_sessions, n_samples, refresh):
+    ticks = max(int(hours * 3600 / refresh), n_samples)
+    sample_every = max(ticks // n_samples, 1)
+    interval = refresh / speed  # Real seconds between reruns of each session
+
+    sessions = []
+    for i in range(n_sessions):
+        app = AppTest.from_file(MAIN_SCRIPT, default_timeout=60)
+        app.query_params["tab"] = TAB_TITLES[i % len(TAB_TITLES)]
+        app.run()
+        sessions.append(app)
+
+    tracemalloc.start()  # One frame per trace: enough for per-line growth, and cheap
+    series = {"traced_mb": [], "rss_mb": [], "session_keys": [], "session_kb": []}
+    sim_hours, baseline, failures = [], None, 0
+    started = time.monotonic()
+    for tick in range(ticks):
+        for i, app in enumerate(sessions):
+            app.query_params["tab"] = TAB_TITLES[(i + tick // RERUNS_PER_TAB) % len(TAB_TITLES)]
+            app.run()
+            failures += bool(app.exception)
+        if tick % sample_every == 0 or tick == ticks - 1:
+            states = [app.session_state.to_dict() for app in sessions]
+            sim_hours.append(tick * refresh / 3600)
+            series["traced_mb"].append(tracemalloc.get_traced_memory()[0] / 2**20)
+            series["rss_mb"].append(rss_bytes() / 2**20)
+            series["session_keys"].append(sum(len(state) for state in states) / n_sessions)
+            series["session_kb"].append(sum(deep_size(state) for state in states) / n_sessions / 1024)
+            if baseline is None and len(sim_hours) > n_samples * WARMUP_FRACTION:
+                baseline = tracemalloc.take_snapshot()
+            print(f"  {sim_hours[-1]:6.2f} sim h  traced {series['traced_mb'][-1]:7.1f} MB  "
+                  f"rss {series['rss_mb'][-1]:7.1f} MB  session {series['session_keys'][-1]:5.0f} keys "
+                  f"{series['session_kb'][-1]:8.1f} KB", file=sys.stderr)
+        time.sleep(max(0.0, started + (tick + 1) * interval - time.monotonic()))
+    final = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sim_hours, series, baseline, final, failures, time.monotonic() - started
+
+
+def report(sim_hours, series, baseline, final, failures, elapsed):
+    effective = sim_hours[-1] * 3600 / elapsed if elapsed else 0.0
+    print(f"Simulated {sim_hours[-1]:.2f} h in {elapsed / 60:.1f} min ({effective:.0f}x real time); "
+          f"{failures} rerun(s) raised")
+    print(f"{'metric':<14} {'start':>10} {'end':>10} {'per sim h':>10}  growth")
+    flagged = []
+    for name, values in series.items():
+        slope = np.polyfit(sim_hours, values, 1)[0] if len(values) > 1 and sim_hours[-1] > 0 else 0.0
+        growing = is_growing(values)
+        if growing:
+            flagged.append(name)
+        print(f"{name:<14} {values[0]:>10.1f} {values[-1]:>10.1f} {slope:>10.2f}  {'GROWING' if growing else 'ok'}")
+    if baseline is not None:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib*")]
+        top = [stat for stat in final.filter_traces(ignore).compare_to(baseline.filter_traces(ignore), "lineno")
+               if stat.size_diff > 0][:10]
+        print("\nLargest allocation growth since the warm-up:")
+        for stat in top:
+            print(f"  {stat.size_diff / 1024:+9.1f} KB  {stat.traceback[0]}")
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test the dashboard against a replayed feed.")
+    parser.add_argument("--recording", help="Recording to replay (collector.py --record); random values if omitted")
+    parser.add_argument("--hours", type=float, default=4, help="Simulated hours to run for")
+    parser.add_argument("--speed", type=float, default=60, help="Replay speed (x real time)")
+    parser.add_argument("--sessions", type=int, default=1, help="Concurrent headless sessions")
+    parser.add_argument("--samples", type=int, default=40, help="Memory samples over the run")
+    parser.add_argument("--refresh", type=float, default=config.DEFAULT_REFRESH_RATE_SECONDS,
+                        help="Simulated seconds between reruns of each session")
+    args = parser.parse_args()
+
+    replay_args = ["--replay", args.recording, "--speed", str(args.speed)] if args.recording else []
+    process, sim_url = start_fake_sim(*replay_args)
+    config.WEBSERVER_URL = sim_url  # main.py's modules are imported into this process by AppTest
+    try:
+        results = run(args.hours, args.speed, args.sessions, args.samples, args.refresh)
+    finally:
+        process.terminate()
+        process.wait()
+    flagged = report(*results)
+    if flagged:
+        print(f"\nMonotonic growth: {', '.join(flagged)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
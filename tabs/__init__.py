@@ -0,0 +1,12 @@
+# tabs/__init__.py
+# Menu title -> module in this package that draws the tab, in menu order. main.py builds its menu
+# from this, and the load / soak tests cycle through the same titles.
+TABS = {
+    "Overview": "overview",
+    "Core Status": "core_status",
+    "Primary Coolant": "primary_coolant",
+    "Steam & Power Gen": "power_gen",
+    "Plant Health & Resources": "health",
+    "Raw Data Viewer": "raw_data",
+    "Recorded Runs": "runs",
+}
@@ -1,11 +1,48 @@
 # tabs/overview.py
-import pandas as pd
-import plotly.express as px
 import streamlit as st
 
+import layout
+from layout import BooleanStatus, Columns, Gauge, LimitForecast, Metric, Panel, Placeholder, Scaled, Text
 import utils  # Import helpers from utils.py
 
 
+# --- Layout ---
+# The panels that read variables; Performance and Unusual Now draw from main.py's totals and the
+# anomaly detector instead
+
+CORE_AND_COOLANT = layout.compile_layout(Panel("Core & Coolant", [
+    Columns([  # Keep 4 columns for overall layout balance
+        [Gauge("Core Temp", "CORE_TEMP", range_min="CORE_TEMP_MIN", range_max="CORE_TEMP_MAX",
+               op_min="CORE_TEMP_OPERATIVE", op_max=Scaled("CORE_TEMP_MAX", 0.9), unit="°C")],
+        # Core Pressure Gauge - Placed next to Core Temp gauge
+        [Gauge("Core Pressure", "CORE_PRESSURE", range_min=0, range_max="CORE_PRESSURE_MAX",
+               op_max="CORE_PRESSURE_OPERATIVE", unit="bar")],
+        [Metric("Core State", "CORE_STATE"), Metric("Criticality", "CORE_STATE_CRITICALITY")],
+        [Metric("Coolant Flow", "COOLANT_CORE_FLOW_SPEED"), Metric("Loop Level", "COOLANT_CORE_PRIMARY_LOOP_LEVEL")],
+    ]),
+    # Where temperature and pressure are heading, not just where they are
+    Columns([
+        [LimitForecast("Time to Max Temp", "CORE_TEMP", unit="°C")],
+        [LimitForecast("Time to Max Pressure", "CORE_PRESSURE", unit="bar")],
+        [], [],
+    ]),
+]))
+
+HEALTH_AND_SAFETY = layout.compile_layout(Panel("Health & Safety", [
+    Columns([
+        # Core Integrity and Wear together
+        [Metric("Core Integrity (%)", "CORE_INTEGRITY"), Metric("Core Wear (%)", "CORE_WEAR")],
+        # Rod Status and Alarms together
+        [BooleanStatus("Rods Deformed?", "RODS_DEFORMED"),
+         Text("**Alarms:** N/A"), Text("(Requires Alarm variables)", style="caption")],
+        [Placeholder("Fuel Level (%)", "(Requires Fuel variable)")],
+    ]),
+]))
+
+# Variables this tab displays (used to batch-fetch it and keep it warm while other tabs are open)
+VARIABLES = list(dict.fromkeys(CORE_AND_COOLANT.variables + HEALTH_AND_SAFETY.variables))
+
+
 # --- UPDATED function signature to accept total_kw_delta ---
 def display_tab(total_kw, total_kw_delta):
     """Displays the content for the Overview tab."""
@@ -49,70 +86,19 @@ def display_tab(total_kw, total_kw_delta):
 
         # --- Total KW History Chart ---
         st.markdown("---")
-        st.markdown("**Total Output History**")
-        if ('total_kw_history' in st.session_state and
-                isinstance(st.session_state.total_kw_history, pd.DataFrame) and
-                not st.session_state.total_kw_history.empty):
-            if 'Timestamp' in st.session_state.total_kw_history.columns:
-                chart_df = st.session_state.total_kw_history.set_index('Timestamp')
-                if 'Total Output (kW)' in chart_df.columns:
-                    fig = px.line(chart_df, y='Total Output (kW)', labels={'Timestamp': 'Time'})
-                    fig.update_layout(xaxis={"fixedrange": True}, yaxis={"fixedrange": True}, height=250)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.caption("Total KW data column not found.")
-            else:
-                st.caption("Timestamp data column not found.")
-        else:
-            st.caption("Collecting Total KW data for chart...")
+        st.markdown("**Output & Core Temperature History**")
+        utils.display_history_chart(["TOTAL_KW", "CORE_TEMP"], ["Total Output (kW)", "Core Temp (°C)"],
+                                    height=250, empty_text="Collecting Total KW data for chart...",
+                                    secondary=["CORE_TEMP"])
 
     # --- Core & Coolant Status ---
+    readings = utils.read_snapshot(VARIABLES)  # Read once; the panels below draw without fetching
+    CORE_AND_COOLANT.render(readings)
+
+    # --- Drifts and outliers across every numeric variable, not just the ones shown here ---
     with st.container(border=True):
-        st.subheader("Core & Coolant")
-        # Use columns to place Core Temp and Pressure gauges side-by-side
-        cols_core = st.columns(4)  # Keep 4 columns for overall layout balance
-        with cols_core[0]:
-            # Core Temp Gauge
-            core_max_temp_value = utils.fetch_variable_value("CORE_TEMP_MAX")
-            op_max_temp_for_gauge = None
-            if isinstance(core_max_temp_value, (int, float)): op_max_temp_for_gauge = 0.9 * core_max_temp_value
-            utils.display_gauge(
-                title="Core Temp", value_var="CORE_TEMP", range_min_input="CORE_TEMP_MIN",
-                range_max_input="CORE_TEMP_MAX", op_min_input="CORE_TEMP_OPERATIVE",
-                op_max_input=op_max_temp_for_gauge, unit="°C"
-            )
-        with cols_core[1]:
-            # Core Pressure Gauge - Placed next to Core Temp gauge
-            utils.display_gauge(
-                title="Core Pressure", value_var="CORE_PRESSURE", range_min_input=0,
-                range_max_input="CORE_PRESSURE_MAX", op_max_input="CORE_PRESSURE_OPERATIVE", unit="bar"
-            )
-        with cols_core[2]:
-            # These use utils.display_metric and will now show delta automatically
-            utils.display_metric("Core State", "CORE_STATE")
-            utils.display_metric("Criticality", "CORE_STATE_CRITICALITY")
-        with cols_core[3]:
-            # These use utils.display_metric and will now show delta automatically
-            utils.display_metric("Coolant Flow", "COOLANT_CORE_FLOW_SPEED")
-            utils.display_metric("Loop Level", "COOLANT_CORE_PRIMARY_LOOP_LEVEL")
+        st.subheader("Unusual Now")
+        utils.display_anomalies()
 
     # --- Health & Safety Status ---
-    with st.container(border=True):
-        st.subheader("Health & Safety")
-        # Use columns to pair related health metrics
-        cols_health = st.columns(3)
-        with cols_health[0]:
-            # Core Integrity and Wear together
-            utils.display_metric("Core Integrity (%)", "CORE_INTEGRITY")
-            utils.display_metric("Core Wear (%)", "CORE_WEAR")
-        with cols_health[1]:
-            # Rod Status and Alarms together
-            utils.display_boolean_status("Rods Deformed?", "RODS_DEFORMED")
-            st.markdown("**Alarms:** N/A")  # Placeholder for alarm summary/indicator
-            st.caption("(Requires Alarm variables)")
-        with cols_health[2]:
-            # Fuel Status
-            # Example using display_metric if a numeric fuel variable exists
-            # utils.display_metric("Fuel Level (%)", "FUEL_LEVEL_PERCENT_PLACEHOLDER") # Placeholder variable
-            st.metric(label="Fuel Level (%)", value="N/A")  # Current placeholder
-            st.caption("(Requires Fuel variable)")
+    HEALTH_AND_SAFETY.render(readings)
@@ -1,13 +1,21 @@
 # tabs/power_gen.py
+import numpy as np
 import streamlit as st
 
+import plant
 import utils  # Import helpers from utils.py
 
 
+# Variables this tab displays (used to batch-fetch it and keep it warm while other tabs are open)
+VARIABLES = [
+    "CORE_STEAM_PRESENT", "CORE_HIGH_STEAM_PRESENT",
+] + plant.TURBINES.variables() + plant.GENERATORS.variables()
+
+
 # --- Specific Helper Function(s) for this Tab ---
 
-def display_turbine_status(turbine_index):
-    """Displays status metrics for a single steam turbine using gauges."""
+def display_turbine_status(turbines, turbine_index, readings):
+    """Displays status metrics for a single steam turbine (from a TURBINES snapshot) using gauges."""
     with st.container(border=True):
         st.markdown(f"**Steam Turbine {turbine_index}**")
         cols = st.columns(3)
@@ -15,33 +23,33 @@ def display_turbine_status(turbine_index):
             # --- RPM Gauge ---
             utils.display_gauge(
                 title="RPM",
-                value_var=f"STEAM_TURBINE_{turbine_index}_RPM",
+                value_var=turbines.variable(turbine_index, "RPM"),
                 range_min_input=0, range_max_input=4000,  # Assumed Max RPM
                 op_min_input=1500, op_max_input=3800,  # Assumed operative range
-                unit=""
+                unit="", readings=readings
             )
         with cols[1]:
             # --- Temperature Gauge ---
             utils.display_gauge(
                 title="Temperature",
-                value_var=f"STEAM_TURBINE_{turbine_index}_TEMPERATURE",
+                value_var=turbines.variable(turbine_index, "TEMPERATURE"),
                 range_min_input=0, range_max_input=600,  # Assumed Max Temp C
                 op_min_input=100, op_max_input=550,  # Assumed operative range
-                unit="°C"
+                unit="°C", readings=readings
             )
         with cols[2]:
             # --- Pressure Gauge ---
             utils.display_gauge(
                 title="Pressure",
-                value_var=f"STEAM_TURBINE_{turbine_index}_PRESSURE",
+                value_var=turbines.variable(turbine_index, "PRESSURE"),
                 range_min_input=0, range_max_input=100,  # Assumed Max Pressure (bar)
                 op_max_input=80,  # Assumed start of 'high pressure' zone
-                unit="bar"
+                unit="bar", readings=readings
             )
 
-def display_generator_status(gen_index):
+def display_generator_status(generators, gen_index, readings):
     """
-    Displays status metrics for a single generator using gauges and icons.
+    Displays status metrics for a single generator (from a GENERATORS snapshot) using gauges and icons.
     Uses a 2x2 grid layout for better visual balance.
     """
     with st.container(border=True):
@@ -54,11 +62,10 @@ def display_generator_status(gen_index):
         # --- Row 1 ---
         with row1_col1:
             # Output Metric
-            utils.display_metric(f"Output (kW)", f"GENERATOR_{gen_index}_KW")
+            utils.display_metric(f"Output (kW)", generators.variable(gen_index, "KW"), readings=readings)
             # Breaker Status
-            breaker_val = utils.fetch_variable_value(f"GENERATOR_{gen_index}_BREAKER")
-            if isinstance(breaker_val, bool):
-                if breaker_val:  # True = Open
+            if generators.valid["BREAKER"][gen_index]:
+                if generators.values["BREAKER"][gen_index]:  # True = Open
                     status_icon = "⚪"
                     status_text = "Open"
                     status_color = "grey"
@@ -79,93 +86,52 @@ def display_generator_status(gen_index):
                 st.markdown(f"""
                  <div style="display: flex; align-items: center; margin-top: 15px;">
                      <span style="font-weight: bold; margin-right: 8px;">Breaker:</span>
-                     <small>N/A ({utils.fetch_variable_value(f"GENERATOR_{gen_index}_BREAKER")})</small>
+                     <small>N/A ({generators.readings["BREAKER"][gen_index]})</small>
                  </div>
                  """, unsafe_allow_html=True)
 
         with row1_col2:
             # Voltage Gauge
             utils.display_gauge(
-                title="Voltage", value_var=f"GENERATOR_{gen_index}_V",
+                title="Voltage", value_var=generators.variable(gen_index, "V"),
                 range_min_input=20000, range_max_input=30000,  # Assumed 20kV-30kV range
                 op_min_input=24500, op_max_input=25500,  # Assumed +/- 2% of 25kV
-                unit="V"
+                unit="V", readings=readings
             )
 
         # --- Row 2 ---
         with row2_col1:
             # Frequency Gauge
             utils.display_gauge(
-                title="Frequency", value_var=f"GENERATOR_{gen_index}_HERTZ",
+                title="Frequency", value_var=generators.variable(gen_index, "HERTZ"),
                 range_min_input=45, range_max_input=65,  # Assumed range around 50/60 Hz
                 op_min_input=49.5, op_max_input=50.5,  # Assumed tight operative range
-                unit="Hz"
+                unit="Hz", readings=readings
             )
 
         with row2_col2:
             # Current Gauge
             utils.display_gauge(
-                title="Current", value_var=f"GENERATOR_{gen_index}_A",
+                title="Current", value_var=generators.variable(gen_index, "A"),
                 range_min_input=0, range_max_input=1000,  # Assumed Max Amps
                 op_max_input=900,  # Assumed start of high current zone
-                unit="A"
+                unit="A", readings=readings
             )
 
 
-# --- Helper for Status Icons ---
-def get_device_status_indicator(device_type, index):
-    """ Determines a status icon based on fetched values. """
-    icon = "⚪"  # Default: Unknown / Off / Open Breaker
-    tooltip = "Status Unknown or Off"
-
-    try:
-        if device_type == "Turbine":
-            rpm_val = utils.fetch_variable_value(f"STEAM_TURBINE_{index}_RPM")
-            if isinstance(rpm_val, (int, float)):
-                if rpm_val > 10:
-                    icon, tooltip = "🟢", f"Active ({rpm_val:.0f} RPM)"
-                else:
-                    icon, tooltip = "🟡", f"Inactive ({rpm_val:.0f} RPM)"
-            elif "Error:" in str(rpm_val):
-                icon, tooltip = "🔴", f"Error fetching RPM: {rpm_val}"
-
-        elif device_type == "Generator":
-            kw_val = utils.fetch_variable_value(f"GENERATOR_{index}_KW")
-            breaker_val = utils.fetch_variable_value(f"GENERATOR_{index}_BREAKER")
-
-            if isinstance(kw_val, (int, float)) and isinstance(breaker_val, bool):
-                if kw_val > 0 and not breaker_val:
-                    icon, tooltip = "🟢", f"Active ({kw_val:.1f} kW, Breaker Closed)"
-                elif kw_val <= 0 and not breaker_val:
-                    icon, tooltip = "🟡", f"Inactive ({kw_val:.1f} kW, Breaker Closed)"
-                elif breaker_val:
-                    icon, tooltip = "⚪", f"Breaker Open ({kw_val:.1f} kW)"
-            elif "Error:" in str(kw_val) or "Error:" in str(breaker_val):
-                icon, tooltip = "🔴", f"Error fetching status (KW: {kw_val}, Breaker: {breaker_val})"
-            elif kw_val == 0 and breaker_val:
-                icon, tooltip = "⚪", "Off (Breaker Open)"
-
-    except Exception as e:
-        icon, tooltip = "🔴", f"Error checking status: {e}"
-
-    return icon, tooltip
-
 # --- Main Display Function for the Tab ---
 
 def display_tab():
     """Displays the content for the Steam & Power Generation tab using expanders."""
     st.header("Steam & Power Generation")
 
+    # --- Read the tab once; status classes and totals for each whole group in one pass ---
+    readings = utils.read_snapshot(VARIABLES)
+    turbines = plant.TURBINES.read(readings.__getitem__)
+    generators = plant.GENERATORS.read(readings.__getitem__)
+
     # --- Calculate and Display Total Power First ---
-    total_kw = 0.0
-    active_generators = 0
-    for i in range(3):
-        kw_value = utils.fetch_variable_value(f"GENERATOR_{i}_KW")
-        if isinstance(kw_value, float):
-            breaker_val = utils.fetch_variable_value(f"GENERATOR_{i}_BREAKER")
-            if isinstance(breaker_val, bool) and not breaker_val:  # Count power only if breaker is closed
-                total_kw += kw_value
-                if kw_value > 0: active_generators += 1
+    total_kw, active_generators = plant.generator_totals(generators)
 
     st.metric(label="Total Generator Output", value=f"{total_kw:.2f} kW",
               delta=f"{active_generators} Active Generator(s)")
@@ -175,22 +141,24 @@ def display_tab():
     # --- Device Status Overview Section ---
     with st.container(border=True):
         st.subheader("Device Status Overview")
-        cols = st.columns(6)  # 3 turbines + 3 generators
-        device_pairs = [("Turbine", 0), ("Generator", 0),
-                        ("Turbine", 1), ("Generator", 1),
-                        ("Turbine", 2), ("Generator", 2)]
-        for idx, (dev_type, dev_index) in enumerate(device_pairs):
-            with cols[idx]:
-                icon, tooltip = get_device_status_indicator(dev_type, dev_index)
+        turbine_classes, turbine_tooltips = plant.turbine_status(turbines)
+        generator_classes, generator_tooltips = plant.generator_status(generators)
+        # Turbine 0, Generator 0, Turbine 1, Generator 1, ...
+        devices = [(snapshot.group.label, i, plant.STATUS_ICONS[classes[i]], tooltips[i])
+                   for i in range(max(len(turbines), len(generators)))
+                   for snapshot, classes, tooltips in ((turbines, turbine_classes, turbine_tooltips),
+                                                       (generators, generator_classes, generator_tooltips))
+                   if i < len(snapshot)]
+        cols = st.columns(len(devices))
+        for col, (dev_type, dev_index, icon, tooltip) in zip(cols, devices):
+            with col:
                 st.markdown(f"""
                 <div style="text-align: center;" title="{tooltip}">
                     <span style="font-size: 1.8em;">{icon}</span><br>
                     <span style="font-size: 0.9em;">{dev_type} {dev_index}</span>
                 </div>
                 """, unsafe_allow_html=True)
-        st.caption("""
-            **Status Key:** 🟢 Active | 🟡 Idle/Inactive (Connected) | ⚪ Off / Breaker Open | 🔴 Error/Unknown
-        """)
+        st.caption(f"**Status Key:** {plant.STATUS_KEY}")
     # --- End of Device Status Overview ---
 
     st.divider()
@@ -201,23 +169,19 @@ def display_tab():
         with st.container(border=True):  # Keep border for this section
             cols_steam = st.columns(2)
             with cols_steam[0]:
-                utils.display_metric("Steam Present?", "CORE_STEAM_PRESENT")
+                utils.display_metric("Steam Present?", "CORE_STEAM_PRESENT", readings=readings)
             with cols_steam[1]:
-                utils.display_metric("High Steam Present?", "CORE_HIGH_STEAM_PRESENT")
+                utils.display_metric("High Steam Present?", "CORE_HIGH_STEAM_PRESENT", readings=readings)
 
         st.divider()  # Divider within the expander
 
         st.subheader("Turbine Details")
-        turbine_active_count = 0
-        for i in range(3):
-            rpm_value = utils.fetch_variable_value(f"STEAM_TURBINE_{i}_RPM")
-            # Check if data is valid before displaying
-            if not (isinstance(rpm_value, str) and "Error:" in rpm_value):
-                display_turbine_status(i)
-                turbine_active_count += 1
-                st.markdown("<br>", unsafe_allow_html=True)  # Add space
-
-        if turbine_active_count == 0:
+        # Only turbines with valid data
+        for i in np.flatnonzero(turbines.valid["RPM"]).tolist():
+            display_turbine_status(turbines, i, readings)
+            st.markdown("<br>", unsafe_allow_html=True)  # Add space
+
+        if not turbines.valid["RPM"].any():
             st.caption("No active turbines detected or data unavailable.")
 
     st.divider()  # Divider between expanders
@@ -225,15 +189,10 @@ def display_tab():
     # --- Generators Expander ---
     with st.expander("**Generators**", expanded=True):
         st.subheader("Generator Details")
-        generator_active_count = 0
-        for i in range(3):
-            kw_value = utils.fetch_variable_value(f"GENERATOR_{i}_KW")
-            # Check if data is valid before displaying
-            if not (isinstance(kw_value, str) and "Error:" in kw_value):
-                # Call the updated display function with the 2x2 grid
-                display_generator_status(i)
-                generator_active_count += 1
-                st.markdown("<br>", unsafe_allow_html=True)  # Add space
-
-        if generator_active_count == 0:
+        # Only generators with valid data
+        for i in np.flatnonzero(generators.valid["KW"]).tolist():
+            display_generator_status(generators, i, readings)
+            st.markdown("<br>", unsafe_allow_html=True)  # Add space
+
+        if not generators.valid["KW"].any():
             st.caption("No active generators detected or data unavailable.")
@@ -1,10 +1,20 @@
 # tabs/raw_data.py
 import streamlit as st
 
-import config  # Import config to get the VARIABLES list
 import utils  # Import helpers from utils.py
 
 
+DEFAULT_SELECTION = ["CORE_TEMP", "CORE_PRESSURE", "TIME_STAMP"]
+
+# Variables this tab displays by default; the actual selection is per session (see selected_variables)
+VARIABLES = DEFAULT_SELECTION
+
+
+def selected_variables():
+    """This session's current selection (the defaults until the multiselect has been used)."""
+    return st.session_state.get("raw_data_multiselect", DEFAULT_SELECTION)
+
+
 # --- Main Display Function for the Tab ---
 
 def display_tab():
@@ -15,8 +25,8 @@ def display_tab():
     # Variable Selection using multiselect
     selected_variables_raw = st.multiselect(
         "Select variables to view:",
-        options=config.VARIABLES,  # Use variables list from config
-        default=["CORE_TEMP", "CORE_PRESSURE", "TIME_STAMP"],  # Sensible defaults
+        options=utils.known_variables(),  # Configured variables plus any others discovered on the server
+        default=DEFAULT_SELECTION,  # Sensible defaults
         key="raw_data_multiselect"  # Keep the unique key
     )
 
@@ -26,8 +36,15 @@ def display_tab():
     else:
         num_columns_raw = 3
         cols_raw = st.columns(num_columns_raw)
+        readings = utils.read_snapshot(selected_variables_raw)  # main.py batch-fetched the selection
         # Display selected raw variables using the generic metric display
         for i, variable in enumerate(selected_variables_raw):
             col_index = i % num_columns_raw
             with cols_raw[col_index]:
-                utils.display_metric(variable, variable)  # Label is same as variable name
+                utils.display_metric(variable, variable, readings=readings)  # Label is same as variable name
+
+    # --- State Change Log ---
+    st.divider()
+    st.subheader("State Change Log")
+    st.caption("Every change of a state code, breaker or flag since the dashboard started.")
+    utils.display_event_log()
@@ -0,0 +1,25 @@
+# tabs/runs.py
+import streamlit as st
+
+import utils  # Import helpers from utils.py
+
+
+# Reads recordings from disk, not the live simulation
+VARIABLES = []
+
+
+# --- Main Display Function for the Tab ---
+
+def display_tab():
+    """Displays the recording library and the multi-run comparison."""
+    st.header("Recorded Runs")
+    st.info("Runs recorded with `collector.py --record`. Compare procedures by overlaying runs on sim time.")
+
+    with st.container(border=True):
+        st.subheader("Library")
+        runs = utils.display_recorded_runs()
+
+    if runs:
+        with st.container(border=True):
+            st.subheader("Compare Runs")
+            utils.display_run_comparison(runs)
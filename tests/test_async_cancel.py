@@ -0,0 +1,77 @@
+"""Superseded async snapshot fetches are dropped, not waited out."""
+import asyncio
+import http.server
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+
+import async_client
+import config
+from decoding import ErrorKind
+
+NAMES = [f"VAR_{i}" for i in range(8)]
+
+
+class _SlowHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(3.0)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"1.0")
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The engine hung up on a cancelled request
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(config, "WEBSERVER_URL", f"http://127.0.0.1:{server.server_address[1]}/")
+    engine = async_client.AsyncFetchEngine(request_timeout=10.0, snapshot_deadline=10.0)
+    yield engine
+    engine.close()
+    server.shutdown()
+
+
+def _outstanding_requests(engine):
+    async def count():
+        return len(asyncio.all_tasks()) - 1  # Not counting this one
+    return asyncio.run_coroutine_threadsafe(count(), engine._loop).result()
+
+
+def _assert_cancelled(engine, readings, started):
+    assert time.monotonic() - started < 1.5  # Well before the server would have answered
+    assert {name: reading.error for name, reading in readings.items()} == dict.fromkeys(NAMES, ErrorKind.CANCELLED)
+    time.sleep(0.1)
+    assert _outstanding_requests(engine) == 0
+
+
+def test_rerun_request_cancels_the_waiting_fetch(engine):
+    started = time.monotonic()
+    readings = engine.fetch_snapshot(NAMES, owner="session", cancelled=lambda: time.monotonic() - started > 0.3)
+    _assert_cancelled(engine, readings, started)
+
+
+def test_newer_fetch_for_the_same_owner_supersedes(engine):
+    started = time.monotonic()
+    threading.Timer(0.3, engine.fetch_snapshot, args=(["OTHER"],), kwargs={"owner": "session", "deadline": 0.1}).start()
+    readings = engine.fetch_snapshot(NAMES, owner="session")
+    _assert_cancelled(engine, readings, started)
+
+
+def test_cancel_from_another_thread(engine):
+    started = time.monotonic()
+    threading.Timer(0.3, engine.cancel, args=("session",)).start()
+    readings = engine.fetch_snapshot(NAMES, owner="session")
+    _assert_cancelled(engine, readings, started)
@@ -0,0 +1,26 @@
+"""Recording values the webserver sends as free text."""
+from codec import RecordingReader, RecordingWriter
+
+
+def test_text_value_is_recorded_as_missing(tmp_path):
+    path = tmp_path / "run.ndr"
+    with RecordingWriter(path, ["CORE_TEMP", "CORE_STATE"]) as writer:
+        writer.write(1000.0, 1.0, {"CORE_TEMP": 312.5, "CORE_STATE": 3})
+        writer.write(1001.0, 2.0, {"CORE_TEMP": "OVERHEAT", "CORE_STATE": "STARTING"})
+        writer.write(1002.0, 3.0, {"CORE_TEMP": 313.0, "CORE_STATE": 4})
+    with RecordingReader(path) as reader:
+        values = [values for _, _, values in reader.frames()]
+    assert values == [{"CORE_TEMP": 312.5, "CORE_STATE": 3}, {"CORE_TEMP": None, "CORE_STATE": None},
+                      {"CORE_TEMP": 313.0, "CORE_STATE": 4}]
+
+
+def test_unknown_sim_time_is_outside_every_sim_window(tmp_path):
+    path = tmp_path / "run.ndr"
+    with RecordingWriter(path, ["CORE_TEMP"], keyframe_interval=4) as writer:
+        for i, sim in enumerate([None, 1.0, 2.0, None, 3.0, 4.0, None, 5.0]):
+            writer.write(1000.0 + i, sim, {"CORE_TEMP": float(i)})
+    with RecordingReader(path) as reader:
+        window = [values["CORE_TEMP"] for _, _, values in reader.frames(2.0, 4.0, axis="sim")]
+        everything = list(reader.frames(axis="sim"))
+    assert window == [2.0, 4.0, 5.0]
+    assert len(everything) == 8
@@ -0,0 +1,79 @@
+"""The dashboard reading the collector's shared snapshot and history while it writes them."""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from decoding import Reading
+from shared_snapshot import _SEQ, SharedSnapshotReader, SharedSnapshotWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHANNELS = [f"CH_{i}" for i in range(64)]
+CAPACITY = 16
+
+# Appends sample i (every channel = i, sim time = i) as fast as it can until stdin closes
+WRITER = f"""
+import sys, threading
+from shared_snapshot import SharedSnapshotWriter
+writer = SharedSnapshotWriter(sys.argv[1], [], {CHANNELS!r}, {CAPACITY})
+stop = threading.Event()
+threading.Thread(target=lambda: (sys.stdin.read(), stop.set()), daemon=True).start()
+print("ready", flush=True)
+i = 0
+while not stop.is_set():
+    i += 1
+    writer.history.append(float(i), dict.fromkeys({CHANNELS!r}, float(i)), sim_time=float(i))
+writer._shm.unlink()
+"""
+
+
+def test_window_is_consistent_while_collector_appends():
+    name = f"nuc_test_{os.getpid()}"
+    writer = subprocess.Popen([sys.executable, "-c", WRITER, name], cwd=ROOT,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert writer.stdout.readline().strip() == "ready"
+        reader = SharedSnapshotReader(name)
+        reads, deadline = 0, time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            times, sim_times, _, values = reader.history.window_full()
+            if times.size:
+                reads += 1
+                # Consecutive samples, each row written whole
+                np.testing.assert_array_equal(np.diff(times), 1.0)
+                np.testing.assert_array_equal(sim_times, times)
+                np.testing.assert_array_equal(values, np.repeat(times[:, None], len(CHANNELS), axis=1))
+            total, times, _, values = reader.history.since(0)
+            np.testing.assert_array_equal(np.diff(times), 1.0)
+            np.testing.assert_array_equal(values, np.repeat(times[:, None], len(CHANNELS), axis=1))
+            # Incrementally updated buckets: each bin's last sample lies in that bin
+            result = reader.history.query(CHANNELS[:1], bucket=4, agg="last")
+            last = result.values[:, 0]
+            assert np.all((last >= result.times) & (last < result.times + 4))
+        assert reads > 100
+        reader.close()
+    finally:
+        writer.communicate("", timeout=10)
+
+
+def test_reader_gives_up_on_a_write_that_never_finishes():
+    name = f"nuc_test_dead_{os.getpid()}"
+    writer = SharedSnapshotWriter(name, ["CORE_TEMP"], CHANNELS[:1], CAPACITY)
+    try:
+        reader = SharedSnapshotReader(name)
+        assert reader.reading("CORE_TEMP").ok is False  # Nothing published yet
+        writer.publish({"CORE_TEMP": Reading(312.5)}, time.time())
+        assert reader.reading("CORE_TEMP").value == 312.5
+        writer._header[_SEQ] += 1  # Collector killed halfway through its next publish
+        started = time.monotonic()
+        assert reader.reading("CORE_TEMP").value == 312.5  # The last consistent copy
+        assert time.monotonic() - started < 1.0
+        reader.close()
+
+        fresh = SharedSnapshotReader(name)  # Never saw a consistent copy
+        assert fresh.latest() is None and fresh.reading("CORE_TEMP") is None
+        fresh.close()
+    finally:
+        writer.close()
@@ -1,51 +1,665 @@
 # utils.py
-import math  # Import math for isnan check
-
-import plotly.graph_objects as go
+import collections
+import concurrent.futures
+import contextlib
+import datetime
+import functools
+import math
+import threading
+import time
+
+import numpy as np
 import requests
 import streamlit as st
-
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequestType
+
+import anomaly
+import async_client
+import catalog
+import charts
+import client
 import config  # Import configuration
+import events
+import gauges
+import plant
+import recordings
+from decoding import ErrorKind, Reading, error_reading
+from forecast import LimitForecaster
+from frames import FrameBudget, FrameScheduler
+from freshness import FreshnessStats
+from history import HistoryStore
+from prefetch import Prefetcher
+from profiling import RerunProfiler
+from rate_limit import TokenBucket
+from shared_snapshot import SharedSnapshotLink
 
 
-# Cache data fetching
-@st.cache_data(ttl=config.DEFAULT_REFRESH_RATE_SECONDS * 0.9)
-def fetch_variable_value(variable_name):
-    """Fetches a single variable's value from the webserver."""
-    if not isinstance(variable_name, str):
-        return f"Error: Invalid variable name type ({type(variable_name)})"
-
-    params = {"Variable": variable_name}
-    value = f"Error: Var '{variable_name}' not found"
-    try:
-        response = requests.get(config.WEBSERVER_URL, params=params, timeout=1)
-        response.raise_for_status()
-        value = response.text.strip()
-        if value:
-            try:
-                value = float(value)
-                if math.isnan(value): value = "Error: Received NaN"
-            except ValueError:
-                if value.upper() == 'TRUE':
-                    value = True
-                elif value.upper() == 'FALSE':
-                    value = False
+# --- Data Fetching ---
+# Readings younger than this are served from the process-wide cache without a request
+FRESH_SECONDS = config.DEFAULT_REFRESH_RATE_SECONDS * 0.9
+
+
+@st.cache_resource
+def _reading_cache():
+    return client.ReadingCache()
+
+
+@st.cache_resource
+def get_rate_limiter():
+    """The process-wide request budget shared by every session and tab."""
+    return TokenBucket(config.RATE_LIMIT_REQUESTS_PER_SECOND, config.RATE_LIMIT_BURST,
+                       background_reserve=config.RATE_LIMIT_BACKGROUND_RESERVE)
+
+
+@st.cache_resource
+def _shared_snapshot_link():
+    return SharedSnapshotLink(config.SHARED_MEMORY_NAME, config.SHARED_SNAPSHOT_STALE_SECONDS)
+
+
+def get_shared_snapshot():
+    """The collector's shared snapshot reader, or None when collector.py isn't running."""
+    return _shared_snapshot_link().reader()
+
+
+@st.cache_resource
+def _async_engine():
+    """The process-wide async fetch engine, or None if it isn't configured / httpx is missing."""
+    if config.FETCH_ENGINE != "async" or not async_client.AVAILABLE:
+        return None
+    return async_client.AsyncFetchEngine()
+
+
+@st.cache_resource
+def _sync_pool():
+    """Worker threads for batched fetches on the sync engine, each with its own keep-alive session."""
+    return concurrent.futures.ThreadPoolExecutor(config.SYNC_FETCH_CONCURRENCY, thread_name_prefix="fetch")
+
+
+_pool_sessions = threading.local()
+
+
+def _pooled_fetch(variable_name):
+    if not hasattr(_pool_sessions, "session"):
+        _pool_sessions.session = requests.Session()
+    return variable_name, client.fetch_reading(variable_name, _pool_sessions.session)
+
+
+def fetch_snapshot(variable_names, background=False):
+    """
+    Refreshes many variables in one concurrent batch (see _fetch_batch) so the widgets that follow
+    read them from cache instead of making one round-trip each. Only stale variables are requested,
+    and only as many as the request budget allows: recently displayed ones first, the rest keep
+    their last known value. No-op when the collector's shared snapshot is live.
+    """
+    if get_shared_snapshot() is not None:
+        return
+    cache, limiter = _reading_cache(), get_rate_limiter()
+    stale = [name for name in client.CATALOG.filter(dict.fromkeys(variable_names))
+             if cache.get(name, FRESH_SECONDS) is None]
+    wanted_within = config.DEFAULT_REFRESH_RATE_SECONDS * 3
+    on_screen = [name for name in stale if cache.recently_wanted(name, wanted_within)]
+    off_screen = [name for name in stale if not cache.recently_wanted(name, wanted_within)]
+    granted = on_screen[:limiter.acquire(len(on_screen), background=background)]
+    granted += off_screen[:limiter.acquire(len(off_screen), background=True)]
+    limiter.note_stale(len(stale) - len(granted))
+    if not granted:
+        return
+    ctx = get_script_run_ctx()
+    cache.put_many(_fetch_batch(granted, owner=ctx.session_id if ctx else None,
+                                cancelled=ctx and functools.partial(_rerun_requested, ctx)))
+
+
+def _rerun_requested(ctx):
+    """True once the session has asked this script run to rerun or stop, which supersedes it."""
+    requests_ = getattr(ctx, "script_requests", None)
+    state = getattr(requests_, "_state", ScriptRequestType.CONTINUE)  # Streamlit keeps no public getter
+    return state is not ScriptRequestType.CONTINUE
+
+
+def _fetch_batch(variable_names, owner=None, cancelled=None):
+    """
+    Fetches a list of variables concurrently: with the async engine if enabled, else on the sync
+    engine's thread pool. The async engine drops the batch as soon as `cancelled()` is true (a
+    superseded rerun); cancelled readings are left out, so they never overwrite fresher data.
+    """
+    engine = _async_engine()
+    if engine is not None:
+        readings = engine.fetch_snapshot(variable_names, owner=owner, cancelled=cancelled)
+        return {name: r for name, r in readings.items() if r.error is not ErrorKind.CANCELLED}
+    return dict(_sync_pool().map(_pooled_fetch, variable_names))
+
+
+def _served_by_collector(variable_name):
+    shared = get_shared_snapshot()
+    return shared is not None and variable_name in shared.variables
+
+
+def _skip_prefetch(variable_name):
+    return client.CATALOG.is_missing(variable_name) or _served_by_collector(variable_name)
+
+
+@st.cache_resource
+def _prefetcher():
+    prefetcher = Prefetcher(
+        lambda names: _fetch_batch(names, owner="prefetch"), _reading_cache(), get_rate_limiter(),
+        fresh_seconds=FRESH_SECONDS, interval=config.PREFETCH_INTERVAL_SECONDS,
+        idle_after=config.PREFETCH_IDLE_AFTER_SECONDS, skip=_skip_prefetch,
+    )
+    prefetcher.start()
+    return prefetcher
+
+
+def keep_warm(variable_names):
+    """Asks the background prefetcher to keep these variables (other tabs') fresh in the cache."""
+    if not config.PREFETCH_ENABLED:
+        return
+    prefetcher = _prefetcher()
+    prefetcher.set_variables(variable_names)
+    prefetcher.touch()
+
+
+def fetch_reading(variable_name):
+    """
+    Returns a typed Reading: from the collector's shared snapshot when it polls this variable,
+    else from the process-wide cache while fresh, else fetched within the request budget.
+    Over budget, the last known value is served instead (slightly stale beats dropping game FPS).
+    Variables the catalog found missing are never requested.
+    """
+    shared = get_shared_snapshot()
+    if shared is not None:
+        reading = shared.reading(variable_name)
+        if reading is not None:
+            return reading
+    if client.CATALOG.is_missing(variable_name):
+        return error_reading(ErrorKind.MISSING)
+    cache = _reading_cache()
+    cache.mark_wanted(variable_name)
+    reading = cache.get(variable_name, FRESH_SECONDS)
+    if reading is not None:
+        return reading
+    limiter = get_rate_limiter()
+    if limiter.try_acquire():
+        reading = client.fetch_reading(variable_name)
+        cache.put(variable_name, reading)
+        return reading
+    limiter.note_stale()
+    entry = cache.get_entry(variable_name)
+    return entry[0] if entry is not None else error_reading(ErrorKind.RATE_LIMITED)
+
+
+def discover_variables(variable_names):
+    """
+    Probes in the background (within the background request budget) any of these names, or of the
+    catalog's candidates, that haven't been checked recently. Cheap to call every rerun.
+    """
+    names = client.CATALOG.unchecked(catalog.candidate_names() + list(variable_names), config.CATALOG_RECHECK_SECONDS)
+    if names:
+        client.CATALOG.discover_in_background(names, get_rate_limiter())
+
+
+def known_variables():
+    """config.VARIABLES plus every other name the catalog found on the server."""
+    return list(dict.fromkeys(config.VARIABLES + sorted(client.CATALOG.existing())))
+
+
+# --- Bounded Session State ---
+# Metric deltas need each variable's previous value. They live in one LRU-capped dict instead of a
+# session_state key per variable, so a session left open for days (Raw Data Viewer included) stays bounded.
+_PREVIOUS_VALUES_KEY = "_previous_values"
+
+
+def _previous_values():
+    if _PREVIOUS_VALUES_KEY not in st.session_state:
+        st.session_state[_PREVIOUS_VALUES_KEY] = collections.OrderedDict()
+    return st.session_state[_PREVIOUS_VALUES_KEY]
+
+
+def previous_value(variable_name):
+    """The value display_metric last showed for this variable in this session, or None."""
+    return _previous_values().get(variable_name)
+
+
+def remember_value(variable_name, value):
+    """Stores a variable's displayed value, evicting the least recently shown beyond the cap."""
+    store = _previous_values()
+    store[variable_name] = value
+    store.move_to_end(variable_name)
+    while len(store) > config.SESSION_PREVIOUS_VALUES_MAX:
+        store.popitem(last=False)
+
+
+# --- Frame Scheduling ---
+
+@st.cache_resource
+def _frame_budget():
+    return FrameBudget(config.FRAME_CPU_TARGET)
+
+
+def begin_frame():
+    """Starts timing this rerun as a frame; returns the session's FrameScheduler."""
+    if "_frames" not in st.session_state:
+        st.session_state["_frames"] = FrameScheduler(headroom=config.FRAME_OVERRUN_HEADROOM,
+                                                     max_interval=config.FRAME_MAX_INTERVAL_SECONDS)
+    scheduler = st.session_state["_frames"]
+    scheduler.begin()
+    st.session_state["_shown_readings"] = []
+    st.session_state["_stale_count"] = 0
+    return scheduler
+
+
+def pace_refresh(scheduler, requested_seconds, adaptive):
+    """The auto-refresh interval (seconds) to actually use, given the recent render cost."""
+    return scheduler.pace(requested_seconds, _frame_budget().share() if adaptive else None)
+
+
+def end_frame(scheduler, tab):
+    """
+    Closes this rerun's frame, counts its CPU against the process-wide render budget and adds the
+    ages / round trips of the values it displayed to `tab`'s freshness stats.
+    """
+    ctx = get_script_run_ctx()
+    _frame_budget().note(ctx.session_id if ctx else None, scheduler.end())
+    _freshness_stats().record(tab, st.session_state.get("_shown_readings", []))
+    st.session_state["_shown_readings"] = None
+
+
+def display_frame_stats(scheduler, requested_seconds):
+    """Sidebar line: render time, achieved vs target FPS, dropped / coalesced frames."""
+    stats = scheduler.stats()
+    if stats["avg_ms"] is None:
+        return
+    text = f"Render {stats['avg_ms']:.0f} ms · {stats['fps']:.2f} FPS"
+    if stats["target_fps"]:
+        text += f" of {stats['target_fps']:.2f}"
+    text += f" · {stats['dropped']} dropped · {stats['coalesced']} coalesced"
+    st.sidebar.caption(text, help=f"Render CPU, all sessions: {_frame_budget().usage():.0%} of a core "
+                                  f"(target {config.FRAME_CPU_TARGET:.0%}). {stats['overruns']} frame(s) "
+                                  f"overran the refresh interval.")
+    if stats["interval"] and stats["interval"] > requested_seconds + 0.05:
+        st.sidebar.caption(f"Refresh slowed to {stats['interval']:.1f}s to keep up with rendering.")
+
+
+# --- Profiling ---
+
+def request_profile(reruns):
+    """Profiles this session's next `reruns` reruns (sidebar button callback)."""
+    st.session_state["_profiler"] = RerunProfiler(reruns, config.PROFILE_OUTPUT_DIR,
+                                                  config.PROFILE_SAMPLE_INTERVAL_SECONDS)
+
+
+def start_rerun_profile(script_file):
+    """Starts sampling this rerun if a capture is pending (sidebar or DASHBOARD_PROFILE_RERUNS)."""
+    if config.PROFILE_RERUNS and "_profiler" not in st.session_state:
+        request_profile(config.PROFILE_RERUNS)  # Once per session
+    profiler = st.session_state.get("_profiler")
+    if profiler is None or profiler.done:
+        return None
+    profiler.start_rerun(script_file)
+    return profiler
+
+
+def finish_rerun_profile(profiler, tab):
+    """Ends this rerun's sample; keeps the summary in session_state once the capture completes."""
+    if profiler is None:
+        return
+    summary = profiler.finish_rerun(tab)
+    if summary is not None:
+        st.session_state["profile_summary"] = summary
+
+
+def display_profile_summary():
+    """Hot-function and per-tab helper tables from the last completed capture."""
+    summary = st.session_state.get("profile_summary")
+    if summary is None:
+        return
+    with st.expander("Profiler Results", expanded=False):
+        st.caption("Written to: " + ", ".join(f"`{path}`" for path in summary["files"]) +
+                   " (open the .speedscope.json at speedscope.app)")
+        st.markdown("**Per tab** (helper columns are inclusive time per rerun; gauges include their Plotly time)")
+        st.dataframe(summary["tabs"], hide_index=True, use_container_width=True)
+        st.markdown("**Hot functions** (by self time)")
+        st.dataframe(summary["hot_functions"], hide_index=True, use_container_width=True)
+
+
+@st.cache_resource
+def _local_history():
+    return HistoryStore(config.HISTORY_CHANNELS, config.MAX_HISTORY_POINTS, gap_seconds=config.HISTORY_GAP_SECONDS)
+
+
+def get_history():
+    """
+    Returns the history store shared by every browser session: zero-copy views over the collector's
+    ring buffer when it is running, otherwise a process-level store that main.py samples into.
+    """
+    shared = get_shared_snapshot()
+    return shared.history if shared is not None else _local_history()
+
+
+def display_history_chart(channels, labels=None, height=300, empty_text="Collecting data for chart...",
+                          secondary=()):
+    """
+    WebGL line chart of one or more history channels on the time axis picked in the sidebar.
+    `secondary` channels get their own right-hand axis. Long histories are drawn as trend buckets.
+    """
+    fig = charts.history_figure(get_history(), channels, labels,
+                                axis=st.session_state.get("chart_time_axis", "wall"),
+                                max_points=config.CHART_MAX_POINTS, height=height, secondary=secondary,
+                                bucket=charts.trend_bucket(config.HISTORY_RETENTION_SECONDS, config.CHART_MAX_POINTS))
+    if fig is None:
+        st.caption(empty_text)
+        return
+    st.plotly_chart(fig, use_container_width=True, key=f"history_{'_'.join(channels)}")
+
+
+def read_snapshot(variable_names):
+    """Reads each variable once into {name: Reading}, so a render pass can draw without fetching."""
+    return {name: fetch_reading(name) for name in dict.fromkeys(variable_names)}
+
+
+def _lookup(variable_name, readings):
+    """A widget's Reading: from the pre-read snapshot when one is given, else fetched."""
+    reading = fetch_reading(variable_name) if readings is None else readings[variable_name]
+    shown = st.session_state.get("_shown_readings")
+    if shown is not None:  # Counted towards this tab's freshness stats (see end_frame)
+        shown.append((reading.age(), reading.latency))
+    return reading
+
+
+# --- Data Freshness ---
+_STALE_STYLE = """
+    <style>
+        div[class*="st-key-stale_"] {
+            background-color: rgba(128, 128, 128, 0.18); border-radius: 0.5rem; opacity: 0.6;
+        }
+    </style>
+"""
+
+
+@st.cache_resource
+def _freshness_stats():
+    return FreshnessStats(config.FRESHNESS_SAMPLES_PER_TAB, config.STALE_AFTER_SECONDS)
+
+
+@contextlib.contextmanager
+def _stale_shading(reading):
+    """
+    Wraps a widget in a shaded container when its value is older than STALE_AFTER_SECONDS and the
+    sidebar's "Shade Stale Values" is on. Yields the value's age when shaded, else None.
+    """
+    age = reading.age()
+    if age is None or age <= config.STALE_AFTER_SECONDS or not st.session_state.get("shade_stale"):
+        yield None
+        return
+    count = st.session_state.get("_stale_count", 0)
+    st.session_state["_stale_count"] = count + 1
+    with st.container(key=f"stale_{count}"):
+        yield age
+
+
+def _with_age(help_text, age):
+    if age is None:
+        return help_text
+    prefix = f"{help_text} " if help_text else ""
+    return prefix + f"Stale: fetched {age:.0f}s ago."
+
+
+def display_freshness_summary():
+    """Sidebar expander: per-tab age and round-trip percentiles of the values shown."""
+    if st.session_state.get("shade_stale"):
+        st.sidebar.markdown(_STALE_STYLE, unsafe_allow_html=True)
+    rows = _freshness_stats().summary()
+    if not rows:
+        return
+    with st.sidebar.expander("Data Freshness", expanded=False):
+        st.caption(f"Age = time since each displayed value was fetched; stale = older than "
+                   f"{config.STALE_AFTER_SECONDS:g}s. RTT = request round trip.")
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+
+# --- Limit Forecasts ---
+
+@st.cache_resource
+def _limit_forecaster():
+    return LimitForecaster(config.FORECAST_LIMITS, config.FORECAST_LEVEL_TAU_SECONDS,
+                           config.FORECAST_TREND_TAU_SECONDS)
+
+
+def limit_forecast(channel, readings=None):
+    """
+    (seconds until `channel` reaches its FORECAST_LIMITS variable, rate per second) from the online
+    trend, brought up to date with any new history samples. Seconds is inf when not heading toward
+    the limit; both are None while the trend is warming up. Also usable as an alarm input.
+    """
+    forecaster = _limit_forecaster()
+    forecaster.consume(get_history())
+    limit = _lookup(config.FORECAST_LIMITS[channel], readings)
+    return forecaster.forecast(channel, limit.value if limit.is_numeric else None)
+
+
+def format_duration(seconds):
+    """Compact "1h 05m" / "4m 12s" / "38s" text for a duration in seconds."""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+# --- Anomaly Detection ---
+
+@st.cache_resource
+def _anomaly_detector():
+    return anomaly.AnomalyDetector(
+        anomaly.numeric_channels(client.POLLED_VARIABLES), config.ANOMALY_BASELINE_TAU_SECONDS,
+        config.ANOMALY_NOISE_TAU_SECONDS, config.ANOMALY_WARMUP_SAMPLES, min_std=config.ANOMALY_MIN_STD,
+        relative_std=config.ANOMALY_MIN_RELATIVE_STD)
+
+
+def update_anomalies():
+    """
+    Feeds the process-wide detector one tick of every numeric variable, at most once per sample
+    interval however many sessions rerun. Reads the collector's value vector when it is running,
+    otherwise the reading cache; never fetches. Stale or errored values count as missing.
+    """
+    detector = _anomaly_detector()
+    shared = get_shared_snapshot()
+    latest = None if shared is None else shared.latest()
+    if latest is not None:
+        values, _, wall_time, _ = latest
+        if detector.due(wall_time):  # One tick per collector publish
+            detector.update(wall_time, detector.gather(shared.variables, values))
+        return
+    now = time.time()
+    if not detector.due(now, config.ANOMALY_SAMPLE_INTERVAL_SECONDS):
+        return
+    cache = _reading_cache()
+    readings = (cache.get(name, config.HISTORY_GAP_SECONDS) for name in detector.channels)
+    values = [r.value if r is not None and r.is_numeric else float("nan") for r in readings]
+    detector.update(now, values, config.ANOMALY_SAMPLE_INTERVAL_SECONDS)
+
+
+def display_anomalies(limit=None):
+    """Ranked "unusual now" table: variables furthest from their own recent baseline."""
+    detector = _anomaly_detector()
+    rows = detector.unusual(config.ANOMALY_Z_THRESHOLD, limit or config.ANOMALY_PANEL_ROWS)
+    if detector.last_time is None or not detector.count.any():
+        st.caption("Learning baselines...")
+    elif not rows:
+        st.caption(f"Nothing unusual: all {len(detector.channels)} variables within "
+                   f"{config.ANOMALY_Z_THRESHOLD:g}σ of their recent baseline.")
+    else:
+        st.dataframe(rows, hide_index=True, use_container_width=True,
+                     column_config={"Value": st.column_config.NumberColumn(format="%.2f"),
+                                    "Baseline": st.column_config.NumberColumn(format="%.2f")})
+
+
+# --- Event Log ---
+
+@st.cache_resource
+def _event_log():
+    return events.EventLog(events.discrete_channels(client.POLLED_VARIABLES), config.EVENT_LOG_CAPACITY)
+
+
+def update_events():
+    """
+    Diffs the latest state codes / flags into the process-wide event log, at most once per sample
+    interval however many sessions rerun. Reads the collector's snapshot when it is running,
+    otherwise the reading cache; never fetches.
+    """
+    log = _event_log()
+    shared = get_shared_snapshot()
+    latest = None if shared is None else shared.latest()
+    if latest is not None:
+        _, _, wall_time, sim_time = latest
+        if log.due(wall_time):  # One tick per collector publish
+            readings = {name: shared.reading(name) for name in log.variables}
+            log.observe(wall_time, {name: r.value for name, r in readings.items() if r is not None and r.ok},
+                        sim_time=None if math.isnan(sim_time) else sim_time)
+        return
+    now = time.time()
+    if not log.due(now, config.EVENT_SAMPLE_INTERVAL_SECONDS):
+        return
+    cache = _reading_cache()
+    readings = {name: cache.get(name, config.HISTORY_GAP_SECONDS) for name in log.variables}
+    sim = cache.get(config.SIM_TIME_VARIABLE, config.HISTORY_GAP_SECONDS)
+    log.observe(now, {name: r.value for name, r in readings.items() if r is not None and r.ok},
+                sim_time=sim.value if sim is not None and sim.is_numeric else None,
+                interval=config.EVENT_SAMPLE_INTERVAL_SECONDS)
+
+
+def _clock_text(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
+
+
+def state_entered(variable_name, value):
+    """Wall-clock time ("HH:MM:SS") `variable_name` last changed to `value`, or None if not seen."""
+    event = _event_log().entered(variable_name, value)
+    return None if event is None else _clock_text(event.time)
+
+
+def display_event_log():
+    """Timeline of state transitions (newest first), filterable by variable and target state."""
+    log = _event_log()
+    cols = st.columns([2, 1])
+    with cols[0]:
+        variables = st.multiselect("Variables", log.variables, key="event_log_variables",
+                                   placeholder="All state variables")
+    with cols[1]:
+        state_options = log.states(variables[0]) if len(variables) == 1 else []
+        state = st.selectbox("Changed to", state_options, index=None, key="event_log_state",
+                             format_func=lambda value: plant.state_label(variables[0], value),
+                             disabled=not state_options, placeholder="Any state")
+    if state is not None:
+        event = log.entered(variables[0], state)
+        st.info(f"**{variables[0]}** last changed to **{plant.state_label(variables[0], state)}** at "
+                f"{_clock_text(event.time)}" + (f" (sim time {event.sim_time:g})" if event.sim_time is not None else ""))
+    rows = [{"Time": datetime.datetime.fromtimestamp(event.time), "Sim Time": event.sim_time,
+             "Variable": event.variable, "From": plant.state_label(event.variable, event.old),
+             "To": plant.state_label(event.variable, event.new)}
+            for event in log.events(variables or None, limit=config.EVENT_LOG_ROWS, state=state)]
+    if not rows:
+        st.caption(f"No state changes recorded yet ({len(log.variables)} variables watched).")
+        return
+    st.dataframe(rows, hide_index=True, use_container_width=True,
+                 column_config={"Time": st.column_config.DatetimeColumn(format="HH:mm:ss")})
+
+
+# --- Recorded Runs ---
+
+@st.cache_resource
+def get_recording_library():
+    """The process-wide index of recorded runs in RECORDINGS_DIR."""
+    return recordings.RecordingLibrary(config.RECORDINGS_DIR)
+
+
+def _run_label(run):
+    return f"{run['label']} ({run['name']})" if run["label"] else run["name"]
+
+
+def display_recorded_runs():
+    """Filterable list of the recording library; returns the runs that pass the filters."""
+    library = get_recording_library()
+    library.refresh()  # Only new or changed files are read
+    cols = st.columns([2, 2, 1])
+    with cols[0]:
+        label = st.text_input("Name contains", key="runs_label_filter")
+    with cols[1]:
+        variables = st.multiselect("Recorded variables include", config.VARIABLES, key="runs_variable_filter")
+    with cols[2]:
+        min_minutes = st.number_input("Min duration (min)", 0, 24 * 60, 0, key="runs_min_duration")
+    runs = library.runs(variables, label=label, min_duration=min_minutes * 60 or None)
+    if not runs:
+        st.caption(f"No recordings in `{config.RECORDINGS_DIR}/` match. Record one with "
+                   f"`python collector.py --record --label \"startup A\"`.")
+        return runs
+    rows = [{"Run": _run_label(run),
+             "Started": None if run["start_time"] is None else datetime.datetime.fromtimestamp(run["start_time"]),
+             "Duration": format_duration(run["duration"] or 0),
+             "Sim Span (s)": None if run["sim_start"] is None else round(run["sim_end"] - run["sim_start"], 1),
+             "Peak Core Temp": run["peak_core_temp"], "Max kW": run["max_kw"],
+             "Variables": len(run["variables"]), "Complete": run["finished"]}
+            for run in runs]
+    st.dataframe(rows, hide_index=True, use_container_width=True,
+                 column_config={"Started": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+                                "Peak Core Temp": st.column_config.NumberColumn(format="%.1f"),
+                                "Max kW": st.column_config.NumberColumn(format="%.0f")})
+    return runs
+
+
+def display_run_comparison(runs):
+    """Overlays the chosen variables of several runs, aligned on sim time since each run started."""
+    library = get_recording_library()
+    by_label = {_run_label(run): run for run in runs}
+    chosen = st.multiselect("Runs to compare", list(by_label), default=list(by_label)[:2], key="runs_compare")
+    chosen = [by_label[label] for label in chosen]
+    if not chosen:
+        st.caption("Pick one or more runs to overlay.")
+        return
+    shared = sorted(set.intersection(*(set(run["variables"]) for run in chosen)))
+    default = [channel for channel in config.HISTORY_CHANNELS if channel in shared][:1]
+    channels = st.multiselect("Variables", shared, default=default, key="runs_compare_channels")
+    spans = [run["sim_end"] - run["sim_start"] for run in chosen if run["sim_start"] is not None]
+    longest = max(spans, default=0.0)
+    window = None
+    if longest > 0:
+        window = st.slider("Sim time window (s since run start)", 0.0, float(longest), (0.0, float(longest)),
+                           key="runs_compare_window")
+        window = None if window == (0.0, float(longest)) else window  # Whole runs: no window to seek to
+    for channel in channels:
+        series = []
+        for run in chosen:  # Only this channel and window are decoded from each file
+            x, y = recordings.overlay(library.path(run["name"]), [channel], window,
+                                      config.RECORDING_OVERLAY_MAX_POINTS).get(channel, (np.empty(0),) * 2)
+            series.append((_run_label(run), x, y))
+        fig = charts.overlay_figure(series, channel)
+        if fig is None:
+            st.caption(f"{channel}: no samples in the selected window.")
         else:
-            value = "Error: Empty value received"
+            st.plotly_chart(fig, use_container_width=True, key=f"runs_overlay_{channel}")
+
+
+def fetch_variable_value(variable_name):
+    """Fetches a single variable's value as a plain float / int / bool, or an "Error: ..." string."""
+    return fetch_reading(variable_name).legacy()
+
 
-    except requests.exceptions.ConnectionError:
-        value = "Error: Connection refused."
-    except requests.exceptions.Timeout:
-        value = "Error: Timeout."
-    except requests.exceptions.RequestException as e:
-        value = f"Error: {e}"
-    return value
+def resolve_input(value_or_var, readings=None):
+    """Gauge range inputs may be variable names or numbers; returns a Reading either way."""
+    if isinstance(value_or_var, str):
+        return _lookup(value_or_var, readings)
+    if isinstance(value_or_var, Reading):
+        return value_or_var
+    if isinstance(value_or_var, (int, float)) and not isinstance(value_or_var, bool):
+        return Reading(value_or_var)
+    return error_reading(ErrorKind.EMPTY)
 
 # Generic metric display - UPDATED WITH DELTA LOGIC & FONT SIZE ADJUSTMENT
-def display_metric(label, variable_name, help_text=None, delta_color="normal"):
+def display_metric(label, variable_name, help_text=None, delta_color="normal", readings=None):
     """
     Fetches and displays a single metric, including a delta from the previous value.
-    Uses st.session_state to store the previous value.
+    Keeps the previous value in the session's LRU-capped store (see remember_value).
     Includes CSS to adjust the metric label and value font sizes.
     """
     # --- CSS Injection for Metric Label & Value Font Sizes ---
@@ -67,300 +681,164 @@ def display_metric(label, variable_name, help_text=None, delta_color="normal"):
         """, unsafe_allow_html=True)
     # --- End CSS Injection ---
 
-    current_value = fetch_variable_value(variable_name)
-    prev_value_key = f"previous_{variable_name}"
-    previous_value = st.session_state.get(prev_value_key, None)
-    delta_value_display = None  # For passing to st.metric
-
-    # Calculate delta only if current and previous values are numeric
-    is_current_numeric = isinstance(current_value, (int, float))
-    is_previous_numeric = isinstance(previous_value, (int, float))
-
-    if is_current_numeric and is_previous_numeric:
-        delta_raw = current_value - previous_value
-        # Only display delta if it's not zero (or handle as needed)
-        if delta_raw != 0:
-            delta_value_display = delta_raw  # Pass raw delta to st.metric
-
-    # Display the metric
-    if isinstance(current_value, str) and "Error:" in current_value:
-        st.metric(label=label, value="N/A", delta=current_value, delta_color="off", help=help_text)
-        # Do not update session state if current value is an error
-    else:
-        display_val_str = ""
-        if isinstance(current_value, float):
-            display_val_str = f"{current_value:.2f}"
-        elif isinstance(current_value, bool):
-            display_val_str = "TRUE" if current_value else "FALSE"
-            delta_value_display = None  # No delta for boolean changes
+    reading = _lookup(variable_name, readings)
+    with _stale_shading(reading) as age:
+        help_text = _with_age(help_text, age)
+        last_value = previous_value(variable_name)
+
+        # Display the metric
+        if not reading.ok:
+            st.metric(label=label, value="N/A", delta=reading.message, delta_color="off", help=help_text)
+            # Do not update session state if current value is an error
+            return
+
+        current_value = reading.value
+        delta_value_display = None  # For passing to st.metric
+        if reading.is_bool:
+            display_val_str = "TRUE" if current_value else "FALSE"  # No delta for boolean changes
         else:
-            display_val_str = str(current_value)  # Handle ints or other types
+            if isinstance(current_value, float):
+                display_val_str = f"{current_value:.2f}"
+            else:
+                display_val_str = str(current_value)  # Handle int codes or text
+            # Calculate delta only if current and previous values are numeric
+            if reading.is_numeric and isinstance(last_value, (int, float)) and not isinstance(last_value, bool):
+                delta_raw = current_value - last_value
+                # Only display delta if it's not zero (or handle as needed)
+                if delta_raw != 0:
+                    delta_value_display = delta_raw  # Pass raw delta to st.metric
 
         # Display the metric using Streamlit's built-in component
         st.metric(label=label, value=display_val_str, delta=delta_value_display, delta_color=delta_color,
                   help=help_text)
 
         # Update session state with the current value for the next run, only if it's valid
-        if is_current_numeric or isinstance(current_value, bool):
-            st.session_state[prev_value_key] = current_value
+        if reading.is_numeric or reading.is_bool:
+            remember_value(variable_name, current_value)
 
 
 # Gauge display (Handles direct values or variable names for ranges) - UPDATED for neutral display
-def display_gauge(title, value_var, range_min_input, range_max_input, op_min_input=None, op_max_input=None, unit=""):
+def display_gauge(title, value_var, range_min_input, range_max_input, op_min_input=None, op_max_input=None, unit="",
+                  readings=None):
     """
-    Fetches data and displays a Plotly gauge chart with clearer colors and adjusted fonts.
+    Fetches data and displays a gauge with clearer colors and adjusted fonts.
     Shows a neutral state if essential data (value, min, max) is invalid/unavailable.
     Range inputs can be variable names (str) or direct numerical values.
-    Includes specific logic for Frequency gauge colors.
+    Band rules live in gauges.gauge_spec; config.GAUGE_BACKEND picks Plotly or inline SVG.
+    Every display_* helper takes an optional `readings` snapshot (see read_snapshot) to draw from
+    instead of fetching.
     """
-    # Fetch all potentially needed values
-    value = fetch_variable_value(value_var)
-    range_min = fetch_variable_value(range_min_input) if isinstance(range_min_input, str) else range_min_input
-    range_max = fetch_variable_value(range_max_input) if isinstance(range_max_input, str) else range_max_input
-    op_min = fetch_variable_value(op_min_input) if isinstance(op_min_input, str) else op_min_input
-    op_max = fetch_variable_value(op_max_input) if isinstance(op_max_input, str) else op_max_input
-
-    # --- Check data validity ---
-    value_valid = isinstance(value, (int, float))
-    range_min_valid = isinstance(range_min, (int, float))
-    range_max_valid = isinstance(range_max, (int, float))
-    op_min_valid = isinstance(op_min, (int, float))
-    op_max_valid = isinstance(op_max, (int, float))
-
-    is_range_sensible = not (range_min_valid and range_max_valid) or (range_max > range_min)
-    is_data_valid = value_valid and range_min_valid and range_max_valid and is_range_sensible
-    display_value = value if is_data_valid else None
-    number_text = "N/A" if not is_data_valid else None  # Used to hide number display if N/A
-    gauge_range = [range_min, range_max] if is_data_valid else [0, 1]
-    gauge_title = f"{title} ({unit})" if unit and is_data_valid else title  # Add unit only if valid
-    steps = []
-    threshold_val = gauge_range[1]  # Default threshold
-
-    # Define colors (moved up for clarity)
-    color_cold = "cornflowerblue";
-    color_operative = "mediumseagreen";
-    color_hot = "indianred"
-    color_high_pressure = "indianred";
-    color_normal_pressure = "mediumseagreen"
-    color_good = "mediumseagreen";
-    color_bad = "indianred"
-    color_warning = "gold";
-    color_off = "lightsteelblue";
-    color_neutral = "lightgrey"
-
-    if is_data_valid:
-        # --- Determine Gauge Steps and Threshold based on Title/Data ---
-        op_range_valid = not (op_min_valid and op_max_valid) or (op_max > op_min)
-
-        if "Frequency" in title:
-            # Specific logic for Frequency gauge colors
-            freq_target_min = op_min if op_min_valid else 49.5
-            freq_target_max = op_max if op_max_valid else 50.5
-            freq_warn_low = freq_target_min - 1.5;
-            freq_warn_high = freq_target_max + 1.5
-            freq_off_threshold = 0.5
-            threshold_val = freq_target_min  # Red line at start of good zone
-            if abs(value) < freq_off_threshold:
-                steps = [{'range': gauge_range, 'color': color_off}];
-                gauge_title = f"{title} (Off)"
-            else:
-                steps = [
-                    {'range': [gauge_range[0], freq_warn_low], 'color': color_bad},
-                    {'range': [freq_warn_low, freq_target_min], 'color': color_warning},
-                    {'range': [freq_target_min, freq_target_max], 'color': color_good},
-                    {'range': [freq_target_max, freq_warn_high], 'color': color_warning},
-                    {'range': [freq_warn_high, gauge_range[1]], 'color': color_bad}]
-                # Filter out steps where start >= end (can happen with extreme ranges)
-                steps = [s for s in steps if s['range'][0] < s['range'][1]]
-
-        elif "Temperature" in title:
-            # Logic for Temperature (Cold/Operative/Hot)
-            if op_min_valid and op_max_valid and op_range_valid and op_max <= range_max and op_min >= range_min:
-                steps = [
-                    {'range': [range_min, op_min], 'color': color_cold},
-                    {'range': [op_min, op_max], 'color': color_operative},
-                    {'range': [op_max, range_max], 'color': color_hot}
-                ]
-                threshold_val = op_max  # Red line at start of hot zone
-            elif op_max_valid and op_max >= range_min and op_max <= range_max:  # Only upper threshold provided
-                steps = [
-                    {'range': [range_min, op_max], 'color': color_operative},  # Assume below op_max is operative
-                    {'range': [op_max, range_max], 'color': color_hot}
-                ]
-                threshold_val = op_max
-            else:  # No valid operative range defined
-                steps = [{'range': gauge_range, 'color': color_neutral}]
-                threshold_val = range_max  # No meaningful threshold
-
-        elif "Pressure" in title:
-            # Logic for Pressure (Normal/High)
-            if op_max_valid and op_max >= range_min and op_max <= range_max:
-                steps = [
-                    {'range': [range_min, op_max], 'color': color_normal_pressure},
-                    {'range': [op_max, range_max], 'color': color_high_pressure}
-                ]
-                threshold_val = op_max  # Red line at start of high pressure
-            else:  # No valid operative range defined
-                steps = [{'range': gauge_range, 'color': color_neutral}]
-                threshold_val = range_max
-
-        else:  # Default logic for other gauges (e.g., Integrity, Wear, Level)
-            if op_min_valid and op_max_valid and op_range_valid and op_max <= range_max and op_min >= range_min:
-                # Three zones defined (e.g., Bad/Good/Bad)
-                steps = [
-                    {'range': [range_min, op_min], 'color': color_bad},
-                    {'range': [op_min, op_max], 'color': color_good},
-                    {'range': [op_max, range_max], 'color': color_bad}
-                ]
-                threshold_val = op_min  # Red line typically at start of first 'bad' or end of 'good'
-            elif op_max_valid and op_max >= range_min and op_max <= range_max:
-                # Two zones defined by a single threshold (op_max)
-                threshold_val = op_max
-                # Determine if higher is better (Integrity) or worse (Wear, Level Low Fuel)
-                if "Integrity" in title:  # Higher is better
-                    steps = [
-                        {'range': [range_min, threshold_val], 'color': color_bad},
-                        {'range': [threshold_val, range_max], 'color': color_good}
-                    ]
-                else:  # Higher is worse (Wear) or below threshold is bad (Level)
-                    steps = [
-                        {'range': [range_min, threshold_val], 'color': color_good},
-                        {'range': [threshold_val, range_max], 'color': color_bad}
-                    ]
-            else:  # No valid operative range defined
-                steps = [{'range': gauge_range, 'color': color_neutral}]
-                threshold_val = range_min + (range_max - range_min) / 2  # Default threshold halfway
-
-    else:  # Data is invalid
-        gauge_title = f"{title} (N/A)"
-        steps = [{'range': gauge_range, 'color': color_neutral}]
-        threshold_val = gauge_range[1]  # Default threshold to max
-
-    # --- Create Plotly Gauge Figure ---
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=display_value,  # Will be None if data is invalid, hiding the needle
-        number={
-            # --- FONT SIZE ADJUSTMENT HERE ---
-            'font': {'size': 28},  # Reduced size from 36
-            # --- END FONT SIZE ADJUSTMENT ---
-            'valueformat': '.1f',  # Apply formatting, will be overridden by text below if N/A
-            'suffix': unit if is_data_valid and unit else ""  # Show unit only if valid
-        },
-        domain={'x': [0, 1], 'y': [0, 1]},
-        title={'text': gauge_title, 'font': {'size': 16}},  # Use the determined title
-        gauge={
-            'axis': {'range': list(gauge_range), 'tickwidth': 1, 'tickcolor': "darkblue"},
-            'bar': {'color': "rgba(0,0,0,0)"},  # Invisible bar to allow steps to show
-            'bgcolor': "white",
-            'borderwidth': 1,
-            'bordercolor': "gray",
-            'steps': steps,  # Use the determined steps
-            'threshold': {
-                'line': {'color': "red" if is_data_valid else "grey", 'width': 3},
-                'thickness': 0.9,
-                'value': threshold_val  # Use the determined threshold
-            }
-        }
-    ))
-
-    # If data is invalid, add "N/A" text annotation instead of trying to display a number
-    if not is_data_valid:
-        fig.add_annotation(
-            x=0.5, y=0.3,  # Position the text centrally below the title
-            text="N/A",
-            showarrow=False,
-            # Match the adjusted number font size for consistency when showing "N/A"
-            font=dict(size=28, color="grey"),  # Changed size from 36 to 28
-            align="center"
-        )
-        # Ensure the number part of the indicator is hidden when N/A
-        fig.update_traces(number={'valueformat': ''})  # Clear format to hide automatic number
-
-    # Update layout for consistent appearance
-    fig.update_layout(
-        height=190,  # Fixed height
-        margin=dict(l=20, r=20, t=50, b=10),  # Adjust margins
-        paper_bgcolor='rgba(0,0,0,0)',  # Transparent background
-        font={'color': "grey", 'family': "Arial"}  # Default font settings
-    )
-
-    # Display the chart
-    chart_key = f"gauge_{value_var}"  # Unique key for the chart element
-    st.plotly_chart(fig, use_container_width=True, key=chart_key)
+    # Fetch all potentially needed values; anything non-numeric counts as unavailable
+    value_reading = _lookup(value_var, readings)
+    with _stale_shading(value_reading):
+        inputs = [resolve_input(source, readings) for source in (range_min_input, range_max_input, op_min_input,
+                                                                 op_max_input)]
+        range_min, range_max, op_min, op_max = (r.value if r.is_numeric else None for r in inputs)
+        spec = gauges.gauge_spec(title, value_reading.value if value_reading.is_numeric else None,
+                                 range_min, range_max, op_min, op_max, unit)
+
+        if config.GAUGE_BACKEND == "svg":
+            st.markdown(gauges.svg(spec), unsafe_allow_html=True)
+        else:
+            chart_key = f"gauge_{value_var}"  # Unique key for the chart element
+            st.plotly_chart(gauges.plotly_figure(spec), use_container_width=True, key=chart_key)
+
+
+# Time-to-limit metric driven by the streaming forecaster
+def display_limit_forecast(label, channel, unit="", readings=None):
+    """Shows how long until `channel` hits its limit at the current trend, with the rate as delta."""
+    seconds, rate = limit_forecast(channel, readings)
+    limit_var = config.FORECAST_LIMITS[channel]
+    help_text = f"Estimated time until {channel} reaches {limit_var} at its current smoothed rate of change."
+    if seconds is None:
+        st.metric(label=label, value="N/A", delta="Collecting trend..." if rate is None else f"{limit_var} unavailable",
+                  delta_color="off", help=help_text)
+        return
+    if seconds == 0:
+        value = "At limit"
+    elif seconds == float("inf"):
+        value = "Not rising"
+    else:
+        value = format_duration(seconds)
+    if seconds < config.FORECAST_ALARM_SECONDS:
+        label = f"⚠️ {label}"
+    st.metric(label=label, value=value, delta=f"{rate:+.2f} {unit}/s", delta_color="inverse", help=help_text)
 
 
 # Generic progress display
-def display_progress(label, variable_name, max_value=100, help_text=None):
+def display_progress(label, variable_name, max_value=100, help_text=None, readings=None):
     """Fetches and displays a progress bar."""
-    value = fetch_variable_value(variable_name)
-    if isinstance(value, (int, float)):
-        # Ensure value is within 0 to max_value before calculating percentage
-        clamped_value = max(0.0, min(float(value), float(max_value)))
-        progress_percentage = clamped_value / float(max_value)
-        # Format text based on whether it's a percentage or absolute value
-        progress_text = f"{clamped_value:.1f}%" if max_value == 100 else f"{clamped_value:.1f} / {max_value}"
-        # Display label separately for better control
-        st.text(label)
-        st.progress(progress_percentage, text=progress_text)
-    else:
-        st.text(f"{label}: N/A ({value})")
-        st.progress(0.0, text="N/A")  # Show an empty progress bar
+    reading = _lookup(variable_name, readings)
+    with _stale_shading(reading):
+        if reading.is_numeric:
+            value = reading.value
+            # Ensure value is within 0 to max_value before calculating percentage
+            clamped_value = max(0.0, min(float(value), float(max_value)))
+            progress_percentage = clamped_value / float(max_value)
+            # Format text based on whether it's a percentage or absolute value
+            progress_text = f"{clamped_value:.1f}%" if max_value == 100 else f"{clamped_value:.1f} / {max_value}"
+            # Display label separately for better control
+            st.text(label)
+            st.progress(progress_percentage, text=progress_text)
+        else:
+            st.text(f"{label}: N/A ({reading})")
+            st.progress(0.0, text="N/A")  # Show an empty progress bar
 
 
 # Helper for Boolean Status
-def display_boolean_status(label, variable_name):
+def display_boolean_status(label, variable_name, readings=None):
     """Fetches a boolean variable and displays status with a larger icon."""
-    value = fetch_variable_value(variable_name)
-    icon = "❓"  # Default icon: Unknown
-    status_text = f"<small>Invalid ({value})</small>"  # Default text for non-boolean/non-error
-
-    if isinstance(value, bool):
-        icon = "✅" if value else "❌"  # Green check for True, Red X for False
-        status_text = ""  # No extra text needed for clear boolean
-    elif isinstance(value, str) and "Error:" in value:
-        icon = "⚠️"  # Warning icon for errors
-        status_text = f"<small>N/A ({value})</small>"  # Show error message small
-
-    # Use markdown to display label, icon, and status text
-    st.markdown(f"""
-    <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-        <span style="font-weight: bold; margin-right: 8px;">{label}:</span>
-        <span style="font-size: 1.2em; margin-right: 4px;">{icon}</span>
-        {status_text}
-    </div>
-    """, unsafe_allow_html=True)
+    reading = _lookup(variable_name, readings)
+    with _stale_shading(reading):
+        icon = "❓"  # Default icon: Unknown
+        status_text = f"<small>Invalid ({reading})</small>"  # Default text for non-boolean/non-error
+
+        if reading.is_bool:
+            icon = "✅" if reading.value else "❌"  # Green check for True, Red X for False
+            status_text = ""  # No extra text needed for clear boolean
+        elif not reading.ok:
+            icon = "⚠️"  # Warning icon for errors
+            status_text = f"<small>N/A ({reading.message})</small>"  # Show error message small
+
+        # Use markdown to display label, icon, and status text
+        st.markdown(f"""
+        <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
+            <span style="font-weight: bold; margin-right: 8px;">{label}:</span>
+            <span style="font-size: 1.2em; margin-right: 4px;">{icon}</span>
+            {status_text}
+        </div>
+        """, unsafe_allow_html=True)
 
 
 # --- NEW: Custom Component Health Indicator ---
-def display_component_health_indicator(label, wear_var, integrity_var=None):
+def display_component_health_indicator(label, wear_var, integrity_var=None, readings=None):
     """
     Displays a custom indicator for component health using icons, progress bars, and metrics.
     """
-    wear_value = fetch_variable_value(wear_var)
-    integrity_value = fetch_variable_value(integrity_var) if integrity_var else None
+    wear = _lookup(wear_var, readings)
+    integrity = _lookup(integrity_var, readings) if integrity_var else None
 
     # Determine status icon based on wear and integrity
     status_icon = "✅"  # Default: Good
     wear_percent = 0.0
     integrity_percent = 100.0  # Assume 100% if not provided or invalid
 
-    if isinstance(wear_value, (int, float)):
-        wear_percent = float(wear_value)
+    if wear.is_numeric:
+        wear_percent = float(wear.value)
         if wear_percent > 75:
             status_icon = "❌"  # Critical wear
         elif wear_percent > 50:
             status_icon = "⚠️"  # Moderate wear
-    elif isinstance(wear_value, str) and "Error" in wear_value:
+    elif not wear.ok:
         status_icon = "❓"  # Unknown status due to error
 
-    if isinstance(integrity_value, (int, float)):
-        integrity_percent = float(integrity_value)
+    if integrity is not None and integrity.is_numeric:
+        integrity_percent = float(integrity.value)
         if integrity_percent < 30:
             status_icon = "❌"  # Critical integrity loss
         elif integrity_percent < 60 and status_icon != "❌":  # Don't override critical wear status
             status_icon = "⚠️"  # Moderate integrity loss
-    elif isinstance(integrity_value, str) and "Error" in integrity_value and status_icon != "❌":
+    elif integrity is not None and not integrity.ok and status_icon != "❌":
         status_icon = "❓"  # Unknown status due to error
 
     # Display using container and markdown/progress/metric
@@ -374,20 +852,20 @@ def display_component_health_indicator(label, wear_var, integrity_var=None):
         """, unsafe_allow_html=True)
 
         # Display Wear Progress Bar
-        if isinstance(wear_value, (int, float)):
+        if wear.is_numeric:
             wear_progress_val = max(0.0, min(wear_percent, 100.0)) / 100.0
             st.progress(wear_progress_val, text=f"Wear: {wear_percent:.1f}%")
         else:
-            st.progress(0.0, text=f"Wear: N/A ({wear_value})")
+            st.progress(0.0, text=f"Wear: N/A ({wear})")
 
         # Display Integrity Metric (if applicable)
         if integrity_var:
-            if isinstance(integrity_value, (int, float)):
+            if integrity.is_numeric:
                 # Use a smaller text display instead of full metric for compactness
                 st.markdown(f"**Integrity:** {integrity_percent:.1f}%")
                 # Or use display_metric if you prefer that style:
                 # display_metric("Integrity", integrity_var) # This will apply default metric styling
             else:
-                st.markdown(f"**Integrity:** N/A ({integrity_value})")
+                st.markdown(f"**Integrity:** N/A ({integrity})")
 
 # --- END NEW FUNCTION ---